@@ -1,6 +1,16 @@
+import argparse
+import os
+import pickle
+from dataclasses import dataclass, replace
+from typing import Optional
+
 import numpy as np
-import matplotlib.pyplot as plt
-import random
+
+from board import load_board, BOARD_SIZE, JAIL_INDEX, CODE_COUNT, PROPERTY, RAILROAD, UTILITY, TAX, CHANCE, CHEST, \
+    GO_TO_JAIL, PARKING, RAILROAD_GROUP, UTILITY_GROUP, HOTEL, CARD_DECKS, CARD_ADVANCE, CARD_RAILROAD, CARD_UTILITY, \
+    CARD_BACK, CARD_JAIL, CARD_JAIL_FREE, CARD_MONEY, CARD_REPAIRS, CARD_PLAYERS
+from auctions import ASCENDING, AUCTION_TYPES, clear_auction
+from strategies import DEFAULT_STRATEGY
 
 """
 COMP3531 - Simulation & Modelling
@@ -13,6 +23,49 @@ April 8, 2023
 """
 
 
+# bump whenever a change to the rules changes the outcome of a game for a given seed
+ENGINE_VERSION = 6
+
+# how a game ended: one player left, the turn cap, or a stalemate
+END_BANKRUPTCY = 0
+END_MAX_TURNS = 1
+END_STALEMATE = 2
+
+END_REASONS = ("bankruptcy", "max_turns", "stalemate")
+
+# the turn count a policy that is switched off is checked at
+NEVER = float("inf")
+
+
+@dataclass(frozen=True)
+class GameConfig:
+    """Holds the settings of a game.
+
+    Attributes:
+        player_count (int): The number of players in the game.
+        house_rules (bool): Whether Free Parking pays $500 and declined properties aren't auctioned.
+        inflation_turn (int): The number of turns between rent inflation steps.
+        inflation_increase (int): The amount the inflation rate increases by each step.
+        max_turns (int): The turn cap, the richest player wins once it is reached. None for no cap.
+        stalemate_window (int): The turns between stalemate checks, None to never check.
+        auction (str): How declined properties are auctioned, one of auctions.AUCTION_TYPES.
+        auction_increment (int): The opening bid of an auction, and the step an ascending auction rises in.
+        full_rules (bool): Whether to play with Chance and Community Chest cards, houses, hotels and mortgages.
+        board (str): The path of the board file, the standard board if None.
+    """
+
+    player_count: int = 4
+    house_rules: bool = False
+    inflation_turn: int = 50
+    inflation_increase: int = 1
+    max_turns: Optional[int] = None
+    stalemate_window: Optional[int] = None
+    auction: str = ASCENDING
+    auction_increment: int = 10
+    full_rules: bool = False
+    board: Optional[str] = None
+
+
 class Player:
     """Holds the information/state of a player within a Game instance.
 
@@ -22,49 +75,149 @@ class Player:
         properties (list): A list of the player's owned properties.
         tile_index (int): The index of the tile the player is currently on.
         doubles_count (int): The number of doubles the player has rolled in a row.
+        group_counts (list): The number of properties the player owns in each color group.
         railroads_owned (int): The number of railroads the player owns.
         utilities_owned (int): The number of utilities the player owns.
         jailed (bool): Whether the player is in jail or not.
         jail_time (int): The number of turns the player has been in jail for.
         lost (bool): Whether the player has lost the game or not.
+        bankrupt_turn (int): The turn the player lost on, -1 if they haven't lost.
+        strategy (strategies.Strategy): Makes the player's buying, bidding and jail decisions.
+        jail_cards (list): The deck of each get out of jail free card the player holds.
+        mortgages (int): The number of the player's properties that are mortgaged.
+        sets (int): The number of complete color sets the player owns that can be built on.
     """
 
-    def __init__(self, id):
+    __slots__ = ("id", "money", "properties", "tile_index", "doubles_count", "group_counts", "jailed", "jail_time",
+                 "lost", "bankrupt_turn", "strategy", "jail_cards", "mortgages", "sets")
+
+    def __init__(self, id, strategy=DEFAULT_STRATEGY, group_count=None):
         self.id = id
         self.money = 1500
         self.properties = []
         self.tile_index = 0
         self.doubles_count = 0
-        self.railroads_owned = 0
-        self.utilities_owned = 0
+        self.group_counts = [0] * (group_count if group_count is not None else len(BOARD.group_sizes))
         self.jailed = False
         self.jail_time = 0
         self.lost = False
+        self.bankrupt_turn = -1
+        self.strategy = strategy
+        self.jail_cards = []
+        self.mortgages = 0
+        self.sets = 0
+
+    @property
+    def railroads_owned(self):
+        """int: The number of railroads the player owns."""
+
+        return self.group_counts[RAILROAD_GROUP]
+
+    @property
+    def utilities_owned(self):
+        """int: The number of utilities the player owns."""
+
+        return self.group_counts[UTILITY_GROUP]
+
 
+class RandomStream:
+    """Buffered source of the dice rolls and random decisions of a Game.
 
-class Tile:
-    """Holds the information about a board tile.
+    Dice pairs and uniform draws are generated in blocks and handed out one at
+    a time. Blocks start small and double up to block_size, so a short game
+    doesn't pay for a huge block while a long-lived stream still draws in bulk.
+
+    The dice and the decisions come from two independent generators spawned
+    from the seed, so the n-th roll of a stream is the same however many
+    decisions were drawn before it. Two games with different rules driven by
+    streams with the same seed therefore roll the same dice, which is what
+    makes common random number comparisons work.
+
+    With antithetic set, every die shows 7 minus the value it would have shown,
+    giving the mirror image of the stream with the same seed.
 
     Attributes:
-        tile_index (int): The index of the tile on the board.
-        name (str): The name of the tile.
-        cost (int): The cost to buy the tile.
-        rent (int): The rent of the tile.
-        type (str): The type of the tile.
-        color (str): The color of the tile.
-        bought (bool): Whether the tile has been bought or not.
-        owner (Player): The owner of the tile.
+        seed (np.random.SeedSequence): The seed of the stream, a game can be replayed exactly from it.
+        block_size (int): The largest number of values drawn at once.
+        antithetic (bool): Whether the dice are mirrored.
+        dice_generator (np.random.Generator): The generator the dice are drawn from.
+        generator (np.random.Generator): The generator the decisions are drawn from.
     """
 
-    def __init__(self, tile_index, name, cost, rent, type, color):
-        self.tile_index = tile_index
-        self.name = name
-        self.cost = cost
-        self.rent = rent
-        self.type = type
-        self.color = color
-        self.bought = False
-        self.owner = None
+    def __init__(self, seed=None, block_size=65536, first_block_size=1024, antithetic=False):
+        self.seed = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+        self.block_size = block_size
+        self.antithetic = antithetic
+        dice_seed, decision_seed = (np.random.SeedSequence(self.seed.entropy, spawn_key=self.seed.spawn_key + (i,),
+                                                           pool_size=self.seed.pool_size) for i in range(2))
+        self.dice_generator = np.random.Generator(np.random.PCG64(dice_seed))
+        self.generator = np.random.Generator(np.random.PCG64(decision_seed))
+        self.doubles = []
+        self.totals = []
+        self.dice_index = 0
+        self.dice_block_size = first_block_size
+        self.uniforms = []
+        self.uniform_index = 0
+        self.uniform_block_size = first_block_size
+
+    def refill_dice(self):
+        """Draws the next block of dice pairs."""
+
+        dice = self.dice_generator.integers(1, 7, size=(2, self.dice_block_size), dtype=np.int8)
+        if self.antithetic:
+            dice = 7 - dice
+        self.doubles = (dice[0] == dice[1]).tolist()
+        self.totals = (dice[0] + dice[1]).tolist()
+        self.dice_index = 0
+        self.dice_block_size = min(2 * self.dice_block_size, self.block_size)
+
+    def refill_uniforms(self):
+        """Draws the next block of uniform values."""
+
+        self.uniforms = self.generator.random(self.uniform_block_size).tolist()
+        self.uniform_index = 0
+        self.uniform_block_size = min(2 * self.uniform_block_size, self.block_size)
+
+    def roll_two_dice(self):
+        """Rolls two dice then returns whether the player rolled doubles and the sum.
+
+        Returns:
+            bool: True if doubles, False if not.
+            int: The sum of the two dice.
+        """
+
+        if self.dice_index == len(self.totals):
+            self.refill_dice()
+
+        i = self.dice_index
+        self.dice_index = i + 1
+        return self.doubles[i], self.totals[i]
+
+    def random(self):
+        """Draws a uniform value.
+
+        Returns:
+            float: A value in [0, 1).
+        """
+
+        if self.uniform_index == len(self.uniforms):
+            self.refill_uniforms()
+
+        i = self.uniform_index
+        self.uniform_index = i + 1
+        return self.uniforms[i]
+
+    def choice(self, options):
+        """Picks a random element of a non-empty sequence.
+
+        Args:
+            options (list): The sequence to pick from.
+
+        Returns:
+            The chosen element.
+        """
+
+        return options[int(self.random() * len(options))]
 
 
 class Game:
@@ -76,37 +229,110 @@ class Game:
         player_count (int): The number of players in the game.
         remaining_players (int): The number of players that have not lost.
         current_player (Player): The player whose turn it is.
+        player_index (int): The index of the player whose turn is next, kept up to date when play returns.
         current_roll (int): The current roll of the dice.
-        board (list): A list of the tiles on the board.
+        layout (board.Board): The board the game is played on, shared with every other game on it.
+        board (tuple): The tiles on the board, shared with every other game.
+        owners (list): The owner of each tile, None if it hasn't been bought.
+        tile_handlers (tuple): The handler for each tile type code.
         winner (Player): The winner of the game.
+        end_reason (int): How the game ended, one of END_BANKRUPTCY, END_MAX_TURNS or END_STALEMATE.
+        stalemate_check (tuple): The bankruptcies and the poorest remaining net worth at the last stalemate check.
         trip_around_board (int): The number of times the players have gone around the board.
-        properties_bought_counter (int): The number of properties that have been bought.
+        properties_bought_counter (int): The number of properties that are owned by a player.
         all_properties_bought (bool): Whether all properties have been bought or not.
         all_properties_bought_turn_count (int): The number of turns it took to buy all properties.
         inflation (int): The inflation rate of the game.
+        rng (RandomStream): The source of the game's dice rolls and random decisions.
+        config (GameConfig): The settings of the game.
+        tracer (tracing.Tracer): Records every turn of the game, None when tracing is off.
+        full_rules (bool): Whether the game is played with the full rules.
+        houses (list): The development level of each tile, 1 to 4 houses or HOTEL, under the full rules.
+        mortgaged (list): Whether each tile is mortgaged, under the full rules.
+        houses_left (int): The houses the bank has left to sell.
+        hotels_left (int): The hotels the bank has left to sell.
+        decks (list): The shuffled order of the Chance and Community Chest cards, as indices into CARD_DECKS.
+        deck_positions (list): The position of the next card to draw from each deck.
+        cards_held (list): Whether a player holds the get out of jail free card of each deck.
+        card_move (int): RAILROAD or UTILITY while a card's special rent is due, None otherwise.
     """
 
-    def __init__(self, player_count):
+    def __init__(self, player_count=None, rng=None, config=None, tracer=None, strategies=None):
+        # player_count, if given, overrides the player count of the config
+        if config is None:
+            config = GameConfig()
+        if player_count is not None and player_count != config.player_count:
+            config = replace(config, player_count=player_count)
+
+        self.config = config
         self.turn_count = 0
-        self.players = [Player(i) for i in range(player_count)]
-        self.player_count = player_count
-        self.remaining_players = player_count
+        if strategies is None:
+            strategies = [DEFAULT_STRATEGY] * config.player_count
+        elif len(strategies) != config.player_count:
+            raise ValueError("expected a strategy for each of the {} players".format(config.player_count))
+        self.layout = load_board(config.board)
+        self.players = [Player(i, strategy, len(self.layout.group_sizes)) for i, strategy in enumerate(strategies)]
+        self.player_count = config.player_count
+        self.remaining_players = config.player_count
         self.current_player = None
+        self.player_index = 0
         self.current_roll = -1
-        self.board = createBoard()
+        self.board = self.layout.tiles
+        self.owners = [None] * len(self.board)
         self.winner = None
+        self.end_reason = END_BANKRUPTCY
+        self.stalemate_check = None
         self.trip_around_board = -1
         self.properties_bought_counter = 0
         self.all_properties_bought = False
         self.all_properties_bought_turn_count = -1
         self.inflation = 0
+        self.rng = rng if rng is not None else RandomStream()
+
+        self.full_rules = config.full_rules
+        self.tile_handlers = self.build_tile_handlers()
+
+        # the state of the full rules, the decks are only shuffled when they are played with
+        self.houses = [0] * len(self.board)
+        self.mortgaged = [False] * len(self.board)
+        self.houses_left = 32
+        self.hotels_left = 12
+        self.decks = [self.rng.generator.permutation(len(deck)).tolist() for deck in CARD_DECKS] \
+            if self.full_rules else None
+        self.deck_positions = [0] * len(CARD_DECKS)
+        self.cards_held = [False] * len(CARD_DECKS)
+        self.card_move = None
+
+        self.tracer = tracer
+        if tracer is not None:
+            tracer.start(self)
+
+    def build_tile_handlers(self):
+        """Finds the handler of each tile type under the game's rules.
+
+        Returns:
+            tuple: The handler for each tile type code, tiles without a handler do nothing.
+        """
+
+        handlers = {
+            PROPERTY: self.handle_property_tile,
+            RAILROAD: self.handle_railroad,
+            UTILITY: self.handle_utility,
+            TAX: self.handle_taxes,
+            GO_TO_JAIL: self.handle_go_to_jail,
+            PARKING: self.handle_parking,
+        }
+        if self.full_rules:
+            handlers[CHANCE] = self.handle_card
+            handlers[CHEST] = self.handle_card
+        return tuple(handlers.get(code, self.handle_nothing) for code in range(CODE_COUNT))
 
     def enough_funds(self, player, tile):
         """Checks if the player has enough money to buy a property.
 
         Args:
             player (Player): The player to check.
-            tile (Tile): The tile to check.
+            tile (board.Tile): The tile to check.
 
         Returns:
             bool: Whether the player has enough money to buy the tile.
@@ -114,105 +340,118 @@ class Game:
 
         return player.money >= tile.cost
 
-    def choose_to_buy(self):
-        """Randomly chooses whether the player will buy the property.
+    def choose_to_buy(self, new_tile=None):
+        """Asks the current player's strategy whether they will buy the property.
 
-        The player has a 70% chance of buying the property.
+        With the default strategy the player has a 70% chance of buying the property.
+
+        Args:
+            new_tile (board.Tile): The property the player landed on, the tile they stand on if None.
 
         Returns:
             bool: Whether the player will buy the property.
         """
 
-        decision_to_buy = np.random.random()
-        return decision_to_buy > 0.30
+        if new_tile is None:
+            new_tile = self.board[self.current_player.tile_index]
+        return self.current_player.strategy.wants_to_buy(self, self.current_player, new_tile)
 
     def check_all_props_bought(self):
         """Checks if all properties have been bought.
 
-        If all properties have been bought, the all_properties_bought flag is set to True.
+        The first time all properties have been bought, the all_properties_bought flag is set to True.
         The all_properties_bought_turn_count is set to the current turn count.
         """
 
-        if self.properties_bought_counter == 28:
+        # under the full rules properties can go back to the bank and be bought again, only the first time counts
+        if self.properties_bought_counter == self.layout.property_count and not self.all_properties_bought:
             self.all_properties_bought = True
             self.all_properties_bought_turn_count = self.trip_around_board
 
-    def buy_property(self, player, property):
+    def buy_property(self, player, property, price=None):
         """Buys a property for the player.
 
-        Will check if the tile is a railroad or utility and increment the appropriate counter.
+        Increments the player's count for the property's group, which also
+        counts the railroads and utilities they own.
 
         Args:
             player (Player): The player buying the property.
-            property (Tile): The property being bought.
+            property (board.Tile): The property being bought.
+            price (int): The price paid, the property's cost if None.
         """
 
-        player.money -= property.cost
+        player.money -= property.cost if price is None else price
         player.properties.append(property)
-        property.owner = player
-        property.bought = True
+        self.owners[property.tile_index] = player
+        player.group_counts[property.group] += 1
+        if player.group_counts[property.group] == self.layout.group_sizes[property.group] \
+                and self.layout.house_costs[property.tile_index]:
+            player.sets += 1
         self.properties_bought_counter += 1
         self.check_all_props_bought()
 
-        if property.type == "railroad":
-            player.railroads_owned += 1
-        elif property.type == "utility":
-            player.utilities_owned += 1
-
     def auction_off(self, property):
         """Auctions off a property to the other players.
 
         When a player lands on an unowned property, and chooses not to buy it,
-        the other players are given the chance to buy it.
+        the other players are given the chance to buy it. Each player still in
+        the game bids, in turn order from the player after the current one, and
+        the auction is cleared from their bids by auctions.clear_auction.
 
         Args:
-            property (Tile): The property being auctioned off.
+            property (board.Tile): The property being auctioned off.
 
         Returns:
-            Player: The player that bought the property.
+            Player: The player that bought the property, None if nobody did.
         """
 
-        # create a list of players excluding the current player
-        possible_buyers = self.players.copy()
-        possible_buyers.remove(self.current_player)
+        # every player still in the game, other than the current player, bids up to what they can pay
+        bidders = []
+        bids = []
+        for offset in range(1, self.player_count):
+            player = self.players[(self.current_player.id + offset) % self.player_count]
+            if not player.lost:
+                bidders.append(player)
+                bids.append(min(player.strategy.bid(self, player, property), player.money))
 
-        # if property cost is more than each player's money
-        # remove them from the list of possible buyers
-        for player in possible_buyers:
-            if not self.enough_funds(player, property):
-                possible_buyers.remove(player)
+        winner, price = clear_auction(bids, self.config.auction_increment, self.config.auction)
 
-        # if there are no possible buyers, the property is not bought
-        if len(possible_buyers) == 0:
-            return
+        # if nobody bid, the property is not bought
+        if winner < 0:
+            return None
 
-        buyer = random.choice(possible_buyers)
-        self.buy_property(buyer, property)
+        self.buy_property(bidders[winner], property, price)
+        return bidders[winner]
 
     def pay_rent(self, new_tile):
         """Pays rent to the owner of a property.
 
         Args:
-            new_tile (Tile): The tile the player landed on.
+            new_tile (board.Tile): The tile the player landed on.
         """
 
+        if self.full_rules:
+            self.pay_full_rent(new_tile)
+            return
+
+        owner = self.owners[new_tile.tile_index]
         rent = new_tile.rent + new_tile.rent * self.inflation
 
         # if the property is a railroad
-        # the rent is 25 * 2^(no. of railroads owned by owner - 1)
-        # 1 = 25, 2 = 50, 3 = 100, 4 = 200
-        if new_tile.type == "railroad":
-            rent = 25 * (2 ** (new_tile.owner.railroads_owned - 1))
+        # the rent is its base rent * 2^(no. of railroads owned by owner - 1)
+        # on the standard board 1 = 25, 2 = 50, 3 = 100, 4 = 200
+        if new_tile.code == RAILROAD:
+            rent = new_tile.rent * (2 ** (owner.group_counts[RAILROAD_GROUP] - 1))
 
         # if the property is a utility
         # the rent is 4 * dice roll if the owner owns 1 utility
         # and 10 * dice roll if the owner owns 2 utilities
         # the dice roll being the roll that the player made
         # to get to the new tile (both dice)
-        elif new_tile.type == "utility":
-            if new_tile.owner.utilities_owned == 1:
+        elif new_tile.code == UTILITY:
+            if owner.group_counts[UTILITY_GROUP] == 1:
                 rent = 4 * self.current_roll
-            elif new_tile.owner.utilities_owned == 2:
+            elif owner.group_counts[UTILITY_GROUP] == 2:
                 rent = 10 * self.current_roll
 
         # check if property owner owns the color set,
@@ -224,6 +463,7 @@ class Game:
         # then they lose the game
         if self.current_player.money < rent:
             self.current_player.lost = True
+            self.current_player.bankrupt_turn = self.turn_count
             self.remaining_players -= 1
 
         # if the player has enough money to pay rent,
@@ -231,38 +471,31 @@ class Game:
         # and add the rent to the owner's money
         else:
             self.current_player.money -= rent
-            new_tile.owner.money += rent
+            owner.money += rent
 
     def set_owned(self, property):
         """Checks if the owner of a property owns a set.
 
         Args:
-            property (Tile): The property to check.
+            property (board.Tile): The property to check.
 
         Returns:
             bool: Whether the owner of the property owns a set.
         """
 
         # count the number of properties with the same color
-        # as the property landed on that the owner owns
-        set_counter = 1
-        for i in range(len(property.owner.properties)):
-            if property.owner.properties[i].color == property.color:
-                set_counter += 1
-
-        # if the property color is blue or purple
-        # then the player only needs 2 properties to own a set
-        # otherwise they need 3 properties to own a set
-        if property.color == "blue" or property.color == "purple":
-            return set_counter == 2
-        else:
-            return set_counter == 3
+        # as the property landed on that the owner owns, the landed one included
+        owner = self.owners[property.tile_index]
+        set_counter = owner.group_counts[property.group]
+
+        # blue and purple sets have 2 properties, the other sets have 3
+        return set_counter == self.layout.group_sizes[property.group]
 
     def potential_buy(self, new_tile):
         """Checks if the player can/wants to buy a property.
 
         Args:
-            new_tile (Tile): The property the player landed on.
+            new_tile (board.Tile): The property the player landed on.
 
         Returns:
             bool: Whether the player can/wants to buy the property.
@@ -271,14 +504,14 @@ class Game:
         # if the player has enough money to buy the property,
         # and they would like to buy it
         # then the player buys the property
-        if self.enough_funds(self.current_player, new_tile) and self.choose_to_buy():
+        if self.enough_funds(self.current_player, new_tile) and self.choose_to_buy(new_tile):
             self.buy_property(self.current_player, new_tile)
 
         # if the player either can't afford the property
         # or they don't want to buy it
         # and the house rules are disabled
         # then the property is auctioned off
-        elif not house_rules:
+        elif not self.config.house_rules:
             self.auction_off(new_tile)
 
         # if the player can't/won't buy the property
@@ -291,7 +524,7 @@ class Game:
         """Handles the logic for when a player lands on a property tile.
 
         Args:
-            new_tile (Tile): The property the player landed on.
+            new_tile (board.Tile): The property the player landed on.
 
         Returns:
             bool: Whether the player can/wants to buy the property.
@@ -299,7 +532,7 @@ class Game:
 
         # if the tile the player lands on is already bought,
         # check if the player has enough money to pay the rent
-        if new_tile.bought:
+        if self.owners[new_tile.tile_index] is not None:
             self.pay_rent(new_tile)
 
         # if the tile the player lands on has not been bought,
@@ -311,7 +544,7 @@ class Game:
         """Handles the logic for when a player lands on a railroad.
 
         Args:
-            new_tile (Tile): The railroad the player landed on.
+            new_tile (board.Tile): The railroad the player landed on.
 
         Returns:
             bool: Whether the player can/wants to buy the property.
@@ -323,7 +556,7 @@ class Game:
         """Handles the logic for when a player lands on a utility.
 
         Args:
-            new_tile (Tile): The utility the player landed on.
+            new_tile (board.Tile): The utility the player landed on.
 
         Returns:
             bool: Whether the player can/wants to buy the property.
@@ -335,31 +568,45 @@ class Game:
         """Handles the logic for when a player lands on a tax tile.
 
         Args:
-            new_tile (Tile): The tax tile the player landed on.
+            new_tile (board.Tile): The tax tile the player landed on.
         """
 
+        # under the full rules the player can sell and mortgage to pay
+        if self.full_rules:
+            self.charge(self.current_player, new_tile.cost)
+            return
+
         # if the player doesn't have enough money to pay the tax
         # then they lose the game
         if not self.enough_funds(self.current_player, new_tile):
             self.current_player.lost = True
+            self.current_player.bankrupt_turn = self.turn_count
             self.remaining_players -= 1
 
         # otherwise they pay the tax cost listed on the tile
         else:
             self.current_player.money -= new_tile.cost
 
-    def handle_go_to_jail(self):
-        """Handles the logic for when a player lands on the "Go To Jail" tile."""
+    def handle_go_to_jail(self, new_tile=None):
+        """Handles the logic for when a player lands on the "Go To Jail" tile.
+
+        Args:
+            new_tile (board.Tile): The tile the player landed on, unused.
+        """
 
         self.current_player.jailed = True
         self.current_player.doubles_count = 0
-        self.current_player.tile_index = 10
+        self.current_player.tile_index = JAIL_INDEX
+
+    def handle_parking(self, new_tile=None):
+        """Handles the logic for when a player lands on the "Free Parking" tile.
 
-    def handle_parking(self):
-        """Handles the logic for when a player lands on the "Free Parking" tile."""
+        Args:
+            new_tile (board.Tile): The tile the player landed on, unused.
+        """
 
         # give the player 500 bucks if house rules are enabled
-        if house_rules:
+        if self.config.house_rules:
             self.current_player.money += 500
 
     def handle_GO(self):
@@ -370,49 +617,416 @@ class Game:
         self.current_player.money += 200
         self.trip_around_board += 1
 
-    def handle_tile(self, new_tile):
-        """Handles the logic for when a player lands on a tile.
+    def handle_nothing(self, new_tile):
+        """Handles the tiles that don't do anything when landed on (GO, jail, chance and chest).
 
         Args:
-            new_tile (Tile): The tile the player landed on.
+            new_tile (board.Tile): The tile the player landed on.
         """
 
-        if new_tile.type == "property":
-            self.handle_property_tile(new_tile)
-            return
+        return  # do nothing
 
-        elif new_tile.type == "railroad":
-            self.handle_railroad(new_tile)
-            return
+    def charge(self, player, amount, creditor=None):
+        """Makes a player pay an amount under the full rules, raising the money if they have to.
 
-        elif new_tile.type == "go to jail":
-            self.handle_go_to_jail()
-            return
+        If the player can't pay even after selling their buildings and
+        mortgaging their properties, they go bankrupt to the creditor.
+
+        Args:
+            player (Player): The player paying.
+            amount (int): The amount owed.
+            creditor (Player): The player owed the amount, None for the bank.
+
+        Returns:
+            bool: Whether the player paid.
+        """
+
+        if player.money < amount:
+            self.raise_funds(player, amount)
+        if player.money < amount:
+            self.go_bankrupt(player, creditor)
+            return False
+
+        player.money -= amount
+        if creditor is not None:
+            creditor.money += amount
+        return True
 
-        elif new_tile.type == "utility":
-            self.handle_utility(new_tile)
+    def raise_funds(self, player, amount):
+        """Sells a player's buildings, then mortgages their properties, until they have the amount.
+
+        Buildings are sold back one at a time from the most developed
+        property, for half their cost, and properties are mortgaged cheapest
+        first, for half their cost.
+
+        Args:
+            player (Player): The player raising money.
+            amount (int): The money they need.
+        """
+
+        houses = self.houses
+        while player.money < amount:
+            developed = [tile.tile_index for tile in player.properties if houses[tile.tile_index]]
+            if not developed:
+                break
+            self.sell_building(player, max(developed, key=houses.__getitem__))
+
+        if player.money < amount:
+            for tile in sorted(player.properties, key=lambda tile: tile.cost):
+                if not self.mortgaged[tile.tile_index]:
+                    self.mortgaged[tile.tile_index] = True
+                    player.mortgages += 1
+                    player.money += tile.cost // 2
+                    if player.money >= amount:
+                        break
+
+    def sell_building(self, player, index):
+        """Sells one building on a tile back to the bank for half its cost.
+
+        A hotel is swapped back for four houses, or sold off along with its
+        houses if the bank hasn't got four houses left.
+
+        Args:
+            player (Player): The owner of the tile.
+            index (int): The index of the tile.
+        """
+
+        level = self.houses[index]
+        refund = self.layout.house_costs[index] // 2
+        if level == HOTEL and self.houses_left < 4:
+            self.hotels_left += 1
+            self.houses[index] = 0
+            player.money += HOTEL * refund
             return
 
-        elif new_tile.type == "tax":
-            self.handle_taxes(new_tile)
+        if level == HOTEL:
+            self.hotels_left += 1
+            self.houses_left -= 4
+        else:
+            self.houses_left += 1
+        self.houses[index] = level - 1
+        player.money += refund
+
+    def go_bankrupt(self, player, creditor=None):
+        """Takes a player out of the game under the full rules.
+
+        Everything the player has left goes to the creditor, mortgages and
+        all, or back to the bank if they owe the bank, where their properties
+        can be bought again.
+
+        Args:
+            player (Player): The bankrupt player.
+            creditor (Player): The player they couldn't pay, None for the bank.
+        """
+
+        player.lost = True
+        player.bankrupt_turn = self.turn_count
+        self.remaining_players -= 1
+
+        if creditor is not None:
+            creditor.money += player.money
+            for tile in player.properties:
+                self.owners[tile.tile_index] = creditor
+                creditor.properties.append(tile)
+                creditor.group_counts[tile.group] += 1
+            creditor.mortgages += player.mortgages
+            creditor.sets = sum(creditor.group_counts[group] == self.layout.group_sizes[group]
+                                for group in self.layout.color_groups)
+            creditor.jail_cards.extend(player.jail_cards)
+
+        else:
+            for tile in player.properties:
+                self.owners[tile.tile_index] = None
+                self.mortgaged[tile.tile_index] = False
+            self.properties_bought_counter -= len(player.properties)
+            for deck in player.jail_cards:
+                self.cards_held[deck] = False
+
+        player.money = 0
+        player.properties = []
+        player.group_counts = [0] * len(self.layout.group_sizes)
+        player.mortgages = 0
+        player.sets = 0
+        player.jail_cards = []
+
+    def pay_full_rent(self, new_tile):
+        """Pays rent to the owner of a tile under the full rules.
+
+        Property rent is looked up in the board's rent table by development,
+        nothing is due on mortgaged tiles or on the player's own.
+
+        Args:
+            new_tile (board.Tile): The tile the player landed on.
+        """
+
+        index = new_tile.tile_index
+        owner = self.owners[index]
+        if owner is self.current_player or self.mortgaged[index]:
             return
 
-        elif new_tile.type == "parking":
-            self.handle_parking()
+        if new_tile.code == PROPERTY:
+            group = new_tile.group
+            level = self.houses[index] + 1 if owner.group_counts[group] == self.layout.group_sizes[group] else 0
+            rent = self.layout.rent_levels[index][level] * (1 + self.inflation)
+
+        elif new_tile.code == RAILROAD:
+            rent = new_tile.rent * (2 ** (owner.group_counts[RAILROAD_GROUP] - 1))
+            if self.card_move == RAILROAD:
+                rent *= 2
+
+        # a card sending the player to a utility makes them roll again and pay ten times the roll
+        elif self.card_move == UTILITY:
+            rent = 10 * self.rng.roll_two_dice()[1]
+        else:
+            rent = (4 if owner.group_counts[UTILITY_GROUP] == 1 else 10) * self.current_roll
+
+        self.charge(self.current_player, rent, owner)
+
+    def draw_card(self, deck):
+        """Draws the next card of a deck, skipping a get out of jail free card that a player holds.
+
+        Args:
+            deck (int): The index of the deck in CARD_DECKS.
+
+        Returns:
+            tuple: The (action, value, second value) of the card.
+        """
+
+        order = self.decks[deck]
+        while True:
+            position = self.deck_positions[deck]
+            self.deck_positions[deck] = (position + 1) % len(order)
+            card = CARD_DECKS[deck][order[position]]
+            if card[0] != CARD_JAIL_FREE or not self.cards_held[deck]:
+                return card
+
+    def move_to(self, index):
+        """Moves the current player forward to a tile and handles it, collecting $200 if they pass GO.
+
+        Args:
+            index (int): The index of the tile.
+        """
+
+        if index < self.current_player.tile_index:
+            self.handle_GO()
+        self.current_player.tile_index = index
+        new_tile = self.board[index]
+        self.tile_handlers[new_tile.code](new_tile)
+
+    def handle_card(self, new_tile):
+        """Handles the logic for when a player lands on a Chance or Community Chest tile under the full rules.
+
+        Args:
+            new_tile (board.Tile): The tile the player landed on.
+        """
+
+        deck = 0 if new_tile.code == CHANCE else 1
+        action, value, second_value = self.draw_card(deck)
+        player = self.current_player
+
+        if action == CARD_ADVANCE:
+            self.move_to(value)
+
+        elif action == CARD_RAILROAD or action == CARD_UTILITY:
+            targets = self.layout.railroads if action == CARD_RAILROAD else self.layout.utilities
+            target = next((index for index in targets if index > player.tile_index), targets[0] if targets else None)
+            if target is not None:
+                self.card_move = RAILROAD if action == CARD_RAILROAD else UTILITY
+                self.move_to(target)
+                self.card_move = None
+
+        elif action == CARD_BACK:
+            player.tile_index = (player.tile_index - value) % BOARD_SIZE
+            new_tile = self.board[player.tile_index]
+            self.tile_handlers[new_tile.code](new_tile)
+
+        elif action == CARD_JAIL:
+            self.handle_go_to_jail(new_tile)
+
+        elif action == CARD_JAIL_FREE:
+            player.jail_cards.append(deck)
+            self.cards_held[deck] = True
+
+        elif action == CARD_MONEY:
+            if value >= 0:
+                player.money += value
+            else:
+                self.charge(player, -value)
+
+        elif action == CARD_REPAIRS:
+            levels = [self.houses[tile.tile_index] for tile in player.properties]
+            hotels = levels.count(HOTEL)
+            self.charge(player, value * (sum(levels) - HOTEL * hotels) + second_value * hotels)
+
+        elif action == CARD_PLAYERS:
+            others = [other for other in self.players if not other.lost and other is not player]
+            if value >= 0:
+                for other in others:
+                    self.charge(other, value, player)
+            elif self.charge(player, -value * len(others)):
+                for other in others:
+                    other.money -= value
+
+    def use_jail_card(self, player):
+        """Gets a player out of jail with a get out of jail free card, returning it to its deck.
+
+        Args:
+            player (Player): The jailed player.
+        """
+
+        self.cards_held[player.jail_cards.pop()] = False
+        player.jailed = False
+        player.jail_time = 0
+
+    def develop(self, player):
+        """Lifts a player's mortgages and builds on their color sets under the full rules.
+
+        Mortgages are lifted for their value plus 10%, then houses are built
+        evenly across each complete set without a mortgage, most expensive set
+        first, a hotel going on a property once the set has four houses each.
+        The player never spends below their strategy's build reserve, and
+        can't build once the bank runs out of houses or hotels.
+
+        Args:
+            player (Player): The player developing.
+        """
+
+        reserve = player.strategy.build_reserve(self, player)
+        mortgaged = self.mortgaged
+        if player.mortgages:
+            for tile in player.properties:
+                payoff = tile.cost // 2 + tile.cost // 20
+                if mortgaged[tile.tile_index] and player.money - payoff >= reserve:
+                    mortgaged[tile.tile_index] = False
+                    player.mortgages -= 1
+                    player.money -= payoff
+
+        if not player.sets:
             return
 
-        elif new_tile.type == "chance" or new_tile.type == "chest":
-            return  # do nothing
+        houses = self.houses
+        sizes = self.layout.group_sizes
+        for group in self.layout.color_groups:
+            tiles = self.layout.group_tiles[group]
+            if player.group_counts[group] != sizes[group] or any(mortgaged[index] for index in tiles):
+                continue
+
+            while True:
+                index = min(tiles, key=houses.__getitem__)
+                level = houses[index]
+                cost = self.layout.house_costs[index]
+                if level == HOTEL or player.money - cost < reserve:
+                    break
+
+                if level == HOTEL - 1:
+                    if not self.hotels_left:
+                        break
+                    self.hotels_left -= 1
+                    self.houses_left += HOTEL - 1
+                elif self.houses_left:
+                    self.houses_left -= 1
+                else:
+                    break
+
+                houses[index] = level + 1
+                player.money -= cost
+
+    def net_worth(self, player):
+        """Calculates a player's money plus the cost of their properties.
+
+        Under the full rules mortgaged properties count for half, and buildings for what they cost.
+
+        Args:
+            player (Player): The player to value.
+
+        Returns:
+            int: The player's net worth.
+        """
+
+        if not self.full_rules:
+            return player.money + sum(tile.cost for tile in player.properties)
+
+        worth = player.money
+        for tile in player.properties:
+            worth += tile.cost // 2 if self.mortgaged[tile.tile_index] else tile.cost
+            worth += self.houses[tile.tile_index] * self.layout.house_costs[tile.tile_index]
+        return worth
+
+    def next_termination_check(self):
+        """Finds the turn count the termination policies next have to be checked at.
+
+        Returns:
+            int: The turn count of the next check, NEVER if both policies are off.
+        """
+
+        check = self.config.max_turns if self.config.max_turns is not None else NEVER
+        window = self.config.stalemate_window
+        if window:
+            check = min(check, (self.turn_count // window + 1) * window)
+        return check
+
+    def check_termination(self):
+        """Ends the game early if it has reached the turn cap or stalled.
+
+        A game has stalled when nobody has gone bankrupt since the last check
+        and the poorest remaining player is no worse off, so the money of the
+        players has stopped converging on a winner. Either way the remaining
+        player with the highest net worth wins, the lowest id on a tie.
+        """
+
+        if self.config.max_turns is not None and self.turn_count >= self.config.max_turns:
+            self.end_reason = END_MAX_TURNS
 
         else:
-            return  # do nothing
+            remaining = [player for player in self.players if not player.lost]
+            bankruptcies = self.player_count - self.remaining_players
+            poorest = min(self.net_worth(player) for player in remaining)
+            last_check, self.stalemate_check = self.stalemate_check, (bankruptcies, poorest)
+            if last_check is None or last_check[0] != bankruptcies or poorest < last_check[1]:
+                return
+            self.end_reason = END_STALEMATE
+
+        self.winner = max((player for player in self.players if not player.lost), key=self.net_worth)
+
+    def handle_tile(self, new_tile):
+        """Handles the logic for when a player lands on a tile.
+
+        Dispatches to the handler for the tile's type code.
+
+        Args:
+            new_tile (board.Tile): The tile the player landed on.
+        """
+
+        self.tile_handlers[new_tile.code](new_tile)
+
+    def play(self, stop_turn=None):
+        """Plays the game.
+
+        A game paused at stop_turn can be saved with save_game, and carries on
+        exactly as if it had never stopped when play is called again.
+
+        Args:
+            stop_turn (int): The turn count to pause the game at, None to play it to the end.
+
+        Returns:
+            tuple: The turns played, the loops before every property was bought
+                and the id of the winner, or None if the game was paused.
+        """
 
-    def play(self):
-        """Plays the game."""
+        inflation_turn = self.config.inflation_turn
+        inflation_increase = self.config.inflation_increase
+        termination_check = self.next_termination_check()
+        full_rules = self.full_rules
+        stop_turn = stop_turn if stop_turn is not None else NEVER
 
-        player_index = 0
+        player_index = self.player_index
         while self.winner is None:
 
+            # pause at the top of the loop, where the game picks up again
+            if self.turn_count >= stop_turn:
+                self.player_index = player_index
+                return None
+
             # calculate the current inflation rate
             if self.turn_count % inflation_turn == 0:
                 self.inflation += inflation_increase
@@ -423,7 +1037,19 @@ class Game:
                 continue
 
             self.current_player = self.players[player_index]
-            doubles, self.current_roll = roll_two_dice()
+
+            # a jailed player can use a get out of jail free card,
+            # or pay $50 to leave before rolling if their strategy says so
+            if self.current_player.jailed:
+                if self.current_player.jail_cards:
+                    self.use_jail_card(self.current_player)
+                elif self.current_player.money >= 50 \
+                        and self.current_player.strategy.leave_jail(self, self.current_player):
+                    self.current_player.money -= 50
+                    self.current_player.jail_time = 0
+                    self.current_player.jailed = False
+
+            doubles, self.current_roll = self.rng.roll_two_dice()
 
             # if the player rolled doubles, increment the doubles counter
             if self.current_player.jailed:
@@ -441,7 +1067,10 @@ class Game:
                 # pay the $50
                 # reset attributes
                 if self.current_player.jail_time == 3:
-                    self.current_player.money -= 50
+                    if full_rules:
+                        self.charge(self.current_player, 50)
+                    else:
+                        self.current_player.money -= 50
                     self.current_player.jail_time = 0
                     self.current_player.jailed = False
 
@@ -452,7 +1081,10 @@ class Game:
                 # if the player rolled doubles 3 times in a row
                 # send them to jail and then skip their turn
                 if self.current_player.doubles_count == 3:
+                    previous_place = self.current_player.tile_index
                     self.handle_go_to_jail()
+                    if self.tracer is not None:
+                        self.tracer.record(self, doubles, previous_place, None)
                     player_index = (player_index + 1) % self.player_count
                     continue
 
@@ -460,10 +1092,14 @@ class Game:
             else:
                 self.current_player.doubles_count = 0
 
-            # modulate the player's tile_index by 40 to wrap around the board
+            # modulate the player's tile_index by the board size to wrap around the board
             # when the player passes go
+            # under the full rules a player who is still in jail, or went bankrupt paying their way out, stays put
+            roll = self.current_roll
+            if full_rules and (self.current_player.jailed or self.current_player.lost):
+                roll = 0
             previous_place = self.current_player.tile_index
-            self.current_player.tile_index = (self.current_player.tile_index + self.current_roll) % 40
+            self.current_player.tile_index = (self.current_player.tile_index + roll) % BOARD_SIZE
 
             # if the player passes go, execute the handle_GO() function
             # (if the players tile_index is less than the roll, then the player passed go)
@@ -473,7 +1109,12 @@ class Game:
 
             # set new_tile to the tile the player landed on and handle the tile
             new_tile = self.board[self.current_player.tile_index]
-            self.handle_tile(new_tile)
+            self.tile_handlers[new_tile.code](new_tile)
+            if full_rules and (self.current_player.sets or self.current_player.mortgages) \
+                    and not self.current_player.lost:
+                self.develop(self.current_player)
+            if self.tracer is not None:
+                self.tracer.record(self, doubles, previous_place, new_tile)
 
             # set player_index to the next player
             player_index = (player_index + 1) % self.player_count
@@ -487,137 +1128,214 @@ class Game:
 
             self.turn_count += 1
 
-        return self.turn_count, self.all_properties_bought_turn_count, self.winner.id
-
+            # end long games early if the turn cap or a stalemate says so
+            if self.turn_count >= termination_check and self.winner is None:
+                self.check_termination()
+                termination_check = self.next_termination_check()
 
-def createBoard():
-    """Creates the board.
+        self.player_index = player_index
+        return self.turn_count, self.all_properties_bought_turn_count, self.winner.id
 
-    Initializes a game board by creating a list tile objects for each tile on the board.
+    def __getstate__(self):
+        # the board is shared with every other game on it and the handlers are bound to this game,
+        # so neither is saved, they are found again from the config when the game is loaded
+        state = self.__dict__.copy()
+        del state["layout"], state["board"], state["tile_handlers"]
+        return state
 
-    Returns:
-        board (list): A list of all the tiles on the board.
-    """
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.layout = load_board(self.config.board)
+        self.board = self.layout.tiles
+        self.tile_handlers = self.build_tile_handlers()
 
-    go = Tile(0, "GO", 0, 0, "go", None)
+        # the players' properties were saved as copies, swap them back for the board's own tiles
+        for player in self.players:
+            player.properties = [self.board[tile.tile_index] for tile in player.properties]
 
-    mediterranean_ave = Tile(1, "Mediterranean Ave", 60, 2, "property", "purple")
-    chest_1 = Tile(2, "Chance", 0, 0, "chest", None)
-    baltic_ave = Tile(3, "Baltic Ave", 0, 4, "property", "purple")
-    income_tax = Tile(4, "Income Tax", 0, 200, "tax", None)
 
-    reading_railroad = Tile(5, "Reading Railroad", 200, 25, "railroad", None)
+def save_game(game, path):
+    """Saves a game, whether it is finished or paused part way through, so it can be picked up later.
 
-    oriental_ave = Tile(6, "Oriental Ave", 100, 6, "property", "grey")
-    chance_tile_1 = Tile(7, "Chance", 0, 0, "chance", None)
-    vermont_ave = Tile(8, "Vermont Ave", 100, 6, "property", "grey")
-    conn_ave = Tile(9, "Connecticut Ave", 120, 8, "property", "grey")
+    The game is pickled with its random stream, so a paused game plays on
+    with exactly the rolls and decisions it would have had.
 
-    jail = Tile(10, "Jail", 0, 0, "jail", None)
+    Args:
+        game (Game): The game to save.
+        path (str): The file to save it to.
+    """
 
-    st_charles_pl = Tile(11, "St. Charles Place", 140, 10, "property", "pink")
-    electric = Tile(12, "Electric", 150, 0, "utility", None)
-    states_ave = Tile(13, "States Ave", 140, 10, "property", "pink")
-    virginia_ave = Tile(14, "Virginia Ave", 160, 12, "property", "pink")
+    # renamed into place, so an interrupted save never overwrites a good one
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        pickle.dump(game, file, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(temporary, path)
 
-    penn_railroad = Tile(15, "Pennsylvania Railroad", 200, 25, "railroad", None)
 
-    st_james_pl = Tile(16, "St. James Place", 180, 14, "property", "orange")
-    chest_2 = Tile(17, "Chest", 0, 0, "chest", None)
-    tenn_ave = Tile(18, "Tennessee Ave", 180, 14, "property", "orange")
-    ny_ave = Tile(19, "New York Ave", 200, 16, "property", "orange")
+def load_game(path):
+    """Loads a game saved by save_game.
 
-    free_parking = Tile(20, "Free Parking", 0, 0, "free parking", None)
+    Only load files you trust, they are unpickled.
 
-    ken_ave = Tile(21, "Kentucky Ave", 220, 18, "property", "red")
-    chance_tile_2 = Tile(22, "Chance", 0, 0, "chance", None)
-    indi_ave = Tile(23, "Indiana Ave", 220, 18, "property", "red")
-    illi_ave = Tile(24, "Illinois Ave", 240, 20, "property", "red")
+    Args:
+        path (str): The file the game was saved to.
 
-    bo_railroad = Tile(25, "B & O Railroad", 200, 25, "railroad", None)
+    Returns:
+        Game: The game, ready to play on from where it was saved.
+    """
 
-    atla_ave = Tile(26, "Atlantic Ave", 260, 22, "property", "yellow")
-    vent_ave = Tile(27, "Ventnor Ave", 260, 22, "property", "yellow")
-    water_works = Tile(28, "Water Works", 150, 0, "utility", None)
-    marv_grdn = Tile(29, "Marvin Garden", 280, 24, "property", "yellow")
+    with open(path, "rb") as file:
+        return pickle.load(file)
 
-    goto_jail = Tile(30, "Go To Jail", 0, 0, "go to jail", None)
 
-    pac_ave = Tile(31, "Pacific Ave", 300, 26, "property", "green")
-    ncar_ave = Tile(32, "North Carolina Avenue", 300, 26, "property", "green")
-    chest_3 = Tile(33, "Chance", 0, 0, "chance", None)
-    penn_ave = Tile(34, "Pennsylvania Ave", 320, 28, "property", "green")
+# the standard board, read once and shared by every game that isn't given another
+BOARD = load_board()
 
-    short_line_railroad = Tile(35, "Short Line Railroad", 200, 25, "railroad", None)
 
-    chance_3 = Tile(36, "Chance", 0, 0, "chance", None)
-    park_pl = Tile(37, "Park Place", 350, 35, "property", "blue")
-    lux_tax = Tile(38, "Luxury Tax", 0, 100, "tax", None)
-    boardwalk = Tile(39, "Boardwalk", 400, 50, "property", "blue")
+def parse_args(argv=None):
+    """Reads the settings of a run from the command line.
 
-    return [go, mediterranean_ave, chest_1, baltic_ave, income_tax, reading_railroad, oriental_ave, chance_tile_1,
-            vermont_ave, conn_ave, jail, st_charles_pl, electric, states_ave, virginia_ave, penn_railroad,
-            st_james_pl, chest_2, tenn_ave, ny_ave, free_parking, ken_ave, chance_tile_2, indi_ave, illi_ave,
-            bo_railroad, atla_ave, vent_ave, water_works, marv_grdn, goto_jail, pac_ave, ncar_ave, chest_3,
-            penn_ave, short_line_railroad, chance_3, park_pl, lux_tax, boardwalk]
+    Args:
+        argv (list): The arguments, sys.argv[1:] if None.
 
+    Returns:
+        argparse.Namespace: The settings of the run.
+    """
 
-def roll_die():
-    """Rolls a die.
+    parser = argparse.ArgumentParser(prog="python -m Monopoly", description="Simulates games of Monopoly.")
+    parser.add_argument("-n", "--games", type=int, default=50000, help="the number of games to play")
+    parser.add_argument("-p", "--players", type=int, default=4, help="the number of players in each game")
+    parser.add_argument("--house-rules", action="store_true", help="pay $500 on Free Parking and skip auctions")
+    parser.add_argument("--full-rules", action="store_true",
+                        help="play with cards, houses, hotels and mortgages")
+    parser.add_argument("--board", help="the JSON or TOML file of the board to play on, the standard board if unset")
+    parser.add_argument("--inflation-turn", type=int, default=50, help="the turns between rent inflation steps")
+    parser.add_argument("--inflation-increase", type=int, default=1, help="the inflation rate added each step")
+    parser.add_argument("--max-turns", type=int, help="end games at this many turns, the richest player winning")
+    parser.add_argument("--auction", choices=AUCTION_TYPES, default=ASCENDING, help="how declined properties are sold")
+    parser.add_argument("--auction-increment", type=int, default=10,
+                        help="the opening bid of an auction, and the step it rises in")
+    parser.add_argument("--stalemate-window", type=int,
+                        help="end games that stop converging on a winner, checked every this many turns")
+    parser.add_argument("-w", "--workers", type=int, help="the number of worker processes, the CPU count if unset")
+    parser.add_argument("-s", "--seed", type=int, help="the seed of the run, a fresh one is drawn if unset")
+    parser.add_argument("--block-size", type=int, default=1000,
+                        help="the number of games seeded together, the results depend only on it and the seed")
+    parser.add_argument("--engine", choices=("game", "batch"), default="game", help="the engine to play with")
+    parser.add_argument("--precision", type=float,
+                        help="play until every win rate is known to within this, instead of a fixed number of games")
+    parser.add_argument("--time-budget", type=float, help="the most seconds to play for with --precision")
+    parser.add_argument("-o", "--output",
+                        help="directory to store the per-game results in, analysed instead of re-simulated if it "
+                             "already holds a run")
+    parser.add_argument("--report", help="directory to render the figures and summary table of the run to")
+    parser.add_argument("-q", "--quiet", action="store_true", help="don't report progress after every block")
+    parser.add_argument("--checkpoint",
+                        help="file to checkpoint the run to as it goes, and to resume it from if it already exists")
+    parser.add_argument("--checkpoint-interval", type=float, default=60.0,
+                        help="the seconds between checkpoints with --checkpoint")
+
+    args = parser.parse_args(argv)
+    if args.checkpoint is not None and (args.output is not None or args.precision is not None):
+        parser.error("--checkpoint can't be combined with --output or --precision")
+    return args
+
+
+def main(argv=None):
+    """Runs the simulation from the command line.
+
+    Args:
+        argv (list): The arguments, sys.argv[1:] if None.
 
     Returns:
-        int: The value of the die.
+        SimulationStats: The summary of the games.
     """
 
-    return np.random.randint(1, 7)
+    from report import render_report
+    from results import ResultWriter, load_results, load_stats, run_metadata, save_stats
+    from runner import WorkerUsage, iter_simulations, run_checkpointed, run_until_converged
+    from stats import SimulationStats
+
+    args = parse_args(argv)
+    config = GameConfig(player_count=args.players, house_rules=args.house_rules,
+                        inflation_turn=args.inflation_turn, inflation_increase=args.inflation_increase,
+                        max_turns=args.max_turns, stalemate_window=args.stalemate_window, auction=args.auction,
+                        auction_increment=args.auction_increment, full_rules=args.full_rules,
+                        board=args.board)
+    N = args.games
+    seed = args.seed
+
+    def print_progress(stats):
+        if args.quiet:
+            return
+        low, high = stats.turns.confidence_interval()
+        print(stats.games, "games, average turns", round(stats.turns.mean, 2),
+              "(95% CI", round(low, 2), "-", round(high, 2), ")")
+
+    # read the stored games back rather than playing them again
+    if args.output is not None and os.path.exists(os.path.join(args.output, "metadata.json")):
+        stats = load_stats(args.output)
+        config = GameConfig(**load_results(args.output)[1]["config"])
+        N = stats.games
+        print("Loaded", N, "games from", args.output)
+
+    else:
+        # record the seed, so the stored run can be reproduced, a checkpointed run records it in its checkpoint
+        if seed is None and args.checkpoint is None:
+            seed = np.random.SeedSequence().entropy
+        writer = None
+        if args.output is not None:
+            writer = ResultWriter(args.output, run_metadata(config, seed, args.engine, args.block_size))
+
+        # play the games with checkpoints, picking up where an earlier run with the same checkpoint stopped
+        if args.checkpoint is not None:
+            usage = WorkerUsage()
+            stats = run_checkpointed(N, args.checkpoint, config, args.workers, seed, args.engine, args.block_size,
+                                     args.checkpoint_interval, print_progress, usage)
+            usage = usage.summary()
+
+        # aggregate the games block by block, reporting progress as they come in
+        elif args.precision is None:
+            stats = SimulationStats(config.player_count)
+            usage = WorkerUsage()
+            for results in iter_simulations(N, config, workers=args.workers, seed=seed, engine=args.engine,
+                                            block_size=args.block_size, usage=usage):
+                stats.add(results)
+                if writer is not None:
+                    writer.add(results)
+                print_progress(stats)
+            usage = usage.summary()
+
+        # or keep playing until the win rates are known to within the precision
+        else:
+            stats, report = run_until_converged(config, args.precision, max_time=args.time_budget,
+                                                workers=args.workers, seed=seed, engine=args.engine,
+                                                block_size=args.block_size, progress=print_progress, writer=writer)
+            N = report["games"]
+            usage = report["usage"]
+            print("Stopped after", N, "games:", report["stopped"])
 
+        if writer is not None:
+            writer.close()
+            save_stats(args.output, stats)
 
-def roll_two_dice():
-    """Rolls two dice then returns whether the player rolled doubles and the sum.
+        print(usage["workers"], "workers,", usage["chunks"], "chunks,", round(100 * usage["utilization"], 1),
+              "% utilization")
 
-    Returns:
-        bool: True if doubles, False if not.
-        int: The sum of the two dice.
-    """
+    if args.report is not None:
+        render_report(stats, args.report, config)
+
+    print("House rules: " + ("ON" if config.house_rules else "OFF"))
+
+    if stats.end_reasons[END_MAX_TURNS] or stats.end_reasons[END_STALEMATE]:
+        print("Ended early:", stats.end_reasons[END_MAX_TURNS], "at the turn cap,", stats.end_reasons[END_STALEMATE],
+              "in stalemate")
 
-    roll_1 = roll_die()
-    roll_2 = roll_die()
-    return (roll_1 == roll_2), (roll_1 + roll_2)
+    print(N, "Games", "took on average", stats.turns.mean, "turns and on average ", stats.loops.mean,
+          "loops around the board before all properties bought")
+    return stats
 
 
 """  Main loop  """
-N = 50000
-player_count = 4
-house_rules = False
-inflation_turn = 50
-inflation_increase = 1
-turn_data = []
-turns_before_all_props_bought = []
-winners = []
-
-for i in range(N):
-    game = Game(player_count)
-    turns, loops, winner = game.play()
-    turn_data.append(turns)
-    turns_before_all_props_bought.append(loops)
-    winners.append(winner)
-
-plt.hist(winners)
-plt.xlabel("Player")
-plt.ylabel("Games Won")
-
-if house_rules:
-    plt.title("Player win rate with House Rules")
-else:
-    plt.title("Player win rate without House Rules")
-
-plt.xticks([0, 1, 2, 3], [1, 2, 3, 4])
-plt.show()
-
-turn_avg = np.mean(turn_data)
-loop_avg = np.mean(turns_before_all_props_bought)
-
-print("House rules: " + "ON" if house_rules else "OFF")
-
-print(N, "Games", "took on average", turn_avg, "turns and on average ", loop_avg,
-      "loops around the board before all properties bought")
\ No newline at end of file
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+import numpy as np
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Auctions of declined properties. Every bidder submits the most they would
+pay, and the auction is cleared in one calculation from those bids instead of
+bid by bid:
+
+    ascending  an open auction rising in fixed increments, won by the highest
+               bidder at one increment over the second highest bid, or at the
+               opening bid if nobody else bids
+    sealed     a first-price sealed-bid auction, won by the highest bidder at
+               their own bid
+
+Bids below the opening bid, which is one increment, don't enter. Ties go to
+the bidder who comes first in the bidding order, and no price is ever more
+than the winner's bid, so properties can clear well below their list price.
+"""
+
+ASCENDING = "ascending"
+SEALED = "sealed"
+
+AUCTION_TYPES = (ASCENDING, SEALED)
+
+
+def clear_auction(bids, increment, kind=ASCENDING):
+    """Clears a single auction.
+
+    Args:
+        bids (list): The highest bid of each bidder, in bidding order.
+        increment (int): The opening bid, and the step an ascending auction rises in.
+        kind (str): ASCENDING or SEALED.
+
+    Returns:
+        tuple: The index of the winning bidder, -1 if nobody bid, and the price they pay.
+    """
+
+    winner = -1
+    highest = second = increment - 1
+    for i, bid in enumerate(bids):
+        if bid > highest:
+            winner, highest, second = i, bid, highest
+        elif bid > second:
+            second = bid
+
+    if winner < 0:
+        return -1, 0
+    if kind == SEALED:
+        return winner, highest
+
+    # nobody else bid when the runner-up is still below the opening bid
+    if second < increment:
+        return winner, increment
+    return winner, min(highest, second + increment)
+
+
+def clear_auctions(bids, increment, kind=ASCENDING):
+    """Clears many auctions at once, like clear_auction.
+
+    Args:
+        bids (np.ndarray): The (auctions, bidders) highest bids, each row in bidding order.
+            Bidders that can't take part should bid below the increment.
+        increment (int): The opening bid, and the step an ascending auction rises in.
+        kind (str): ASCENDING or SEALED.
+
+    Returns:
+        tuple: The index of the winning bidder of each auction, -1 if nobody
+            bid, and the price they pay, 0 if nobody bid.
+    """
+
+    bids = np.where(bids >= increment, bids, -1)
+    winners = np.argmax(bids, axis=1)
+    highest = bids[np.arange(len(bids)), winners]
+    has_winner = highest >= 0
+
+    if kind == SEALED:
+        prices = highest
+    else:
+        second = np.sort(bids, axis=1)[:, -2] if bids.shape[1] > 1 else np.full(len(bids), -1)
+        prices = np.where(second >= 0, np.minimum(highest, second + increment), increment)
+
+    return np.where(has_winner, winners, -1), np.where(has_winner, prices, 0)
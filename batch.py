@@ -0,0 +1,454 @@
+import numpy as np
+
+import Monopoly
+from auctions import clear_auctions
+from strategies import DEFAULT_STRATEGY
+from board import BOARD_SIZE, JAIL_INDEX, PROPERTY, RAILROAD, UTILITY, TAX, GO_TO_JAIL, PARKING, OTHER, load_board
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Vectorized batch engine. Holds the state of many games as NumPy arrays and
+advances all of them one iteration of the Game.play loop at a time.
+"""
+
+# railroad rent multiplier by the number of railroads owned, 2^(railroads owned - 1)
+RAILROAD_MULTIPLIERS = np.array([0, 1, 2, 4, 8])
+
+
+class GameBatch:
+    """Holds the state of a batch of Monopoly games as arrays.
+
+    Every call to step() runs one iteration of the Game.play loop in every
+    unfinished game, so the batch reproduces the outcome distributions of
+    Game.play for the same GameConfig and strategies. At most width
+    games are held at once; finished games are replaced by fresh ones so the
+    arrays stay full until the last games of the run.
+
+    Attributes:
+        size (int): The number of games to play.
+        width (int): The maximum number of games advanced together.
+        config (Monopoly.GameConfig): The settings of the games.
+        player_count (int): The number of players in each game.
+        rng (np.random.Generator): The random generator for dice and decisions.
+        strategies (tuple): The strategy of each seat, all of them vectorized.
+        started (int): The number of games that have been started.
+        turns (np.ndarray): The number of turns each game took.
+        loops (np.ndarray): The trips around the board before all properties were bought.
+        winners (np.ndarray): The id of the winner of each game.
+        final_money (np.ndarray): Each player's money at the end of each game.
+        bankrupt_turns (np.ndarray): The turn each player lost on in each game, -1 for the winner.
+        end_reasons (np.ndarray): How each game ended, one of the Monopoly.END_REASONS codes.
+    """
+
+    # per-game state arrays, compacted and refilled as games finish
+    STATE = ("ids", "tile_index", "money", "doubles_count", "jailed", "jail_time", "lost", "bankrupt_turn",
+             "group_counts", "owner",
+             "turn_count", "stalemate_bankruptcies", "stalemate_poorest", "inflation", "player_index",
+             "trip_around_board", "properties_bought_counter", "all_properties_bought_turn_count",
+             "remaining_players", "finished")
+
+    def __init__(self, size, config=None, rng=None, width=10000, strategies=None):
+        self.size = size
+        self.width = min(width, size)
+        self.config = config if config is not None else Monopoly.GameConfig()
+        self.player_count = self.config.player_count
+        self.rng = np.random.default_rng(rng)
+
+        self.strategies = tuple(strategies) if strategies is not None else (DEFAULT_STRATEGY,) * self.player_count
+        if len(self.strategies) != self.player_count:
+            raise ValueError("expected a strategy for each of the {} players".format(self.player_count))
+        if not all(strategy.vectorized for strategy in self.strategies):
+            raise ValueError("the batch engine can only play vectorized strategies")
+        if self.config.full_rules:
+            raise ValueError("the batch engine only plays the simplified rules")
+
+        board = load_board(self.config.board)
+        self.codes = board.codes
+        self.costs = board.costs
+        self.rents = board.rents
+        self.groups = board.groups
+        self.group_sizes = np.array(board.group_sizes)
+        self.property_count = board.property_count
+        self.group_count = len(board.group_sizes)
+
+        # results, indexed by game id
+        self.turns = np.zeros(size, dtype=np.int32)
+        self.loops = np.full(size, -1, dtype=np.int16)
+        self.winners = np.zeros(size, dtype=np.uint8)
+        self.final_money = np.zeros((size, self.player_count), dtype=np.int32)
+        self.bankrupt_turns = np.zeros((size, self.player_count), dtype=np.int32)
+        self.end_reasons = np.zeros(size, dtype=np.uint8)
+
+        self.started = 0
+        for name, value in self.new_games(self.width).items():
+            setattr(self, name, value)
+
+    def new_games(self, n):
+        """Creates the starting state for the next n games.
+
+        Args:
+            n (int): The number of games to start.
+
+        Returns:
+            dict: The state arrays of the new games, keyed by attribute name.
+        """
+
+        players = (n, self.player_count)
+        ids = np.arange(self.started, self.started + n)
+        self.started += n
+
+        return {
+            "ids": ids,
+            "tile_index": np.zeros(players, dtype=np.int32),
+            "money": np.full(players, 1500, dtype=np.int32),
+            "doubles_count": np.zeros(players, dtype=np.int32),
+            "jailed": np.zeros(players, dtype=bool),
+            "jail_time": np.zeros(players, dtype=np.int32),
+            "lost": np.zeros(players, dtype=bool),
+            "bankrupt_turn": np.full(players, -1, dtype=np.int32),
+            "group_counts": np.zeros((n, self.player_count, self.group_count), dtype=np.int32),
+            "owner": np.full((n, len(self.codes)), -1, dtype=np.int32),
+            "turn_count": np.zeros(n, dtype=np.int32),
+            "stalemate_bankruptcies": np.full(n, -1, dtype=np.int32),
+            "stalemate_poorest": np.zeros(n, dtype=np.int32),
+            "inflation": np.zeros(n, dtype=np.int32),
+            "player_index": np.zeros(n, dtype=np.int32),
+            "trip_around_board": np.full(n, -1, dtype=np.int32),
+            "properties_bought_counter": np.zeros(n, dtype=np.int32),
+            "all_properties_bought_turn_count": np.full(n, -1, dtype=np.int32),
+            "remaining_players": np.full(n, self.player_count, dtype=np.int32),
+            "finished": np.zeros(n, dtype=bool),
+        }
+
+    def buy_property(self, g, buyer, tile):
+        """Buys the tiles for the buyers in games g.
+
+        The buyers' money is not touched, the caller charges them the cost.
+
+        Args:
+            g (np.ndarray): The games buying a property.
+            buyer (np.ndarray): The player buying in each game.
+            tile (np.ndarray): The tile being bought in each game.
+        """
+
+        self.owner.reshape(-1)[g * BOARD_SIZE + tile] = buyer
+        self.group_counts.reshape(-1)[(g * self.player_count + buyer) * self.group_count + self.groups[tile]] += 1
+        self.properties_bought_counter[g] += 1
+
+        all_bought = g[self.properties_bought_counter[g] == self.property_count]
+        self.all_properties_bought_turn_count[all_bought] = self.trip_around_board[all_bought]
+
+    def decide(self, method, seats, dtype, *arrays):
+        """Asks the strategy of each seat for the decisions of its players.
+
+        Args:
+            method (str): The name of the vectorized strategy method.
+            seats (np.ndarray): The seat of each deciding player.
+            dtype (np.dtype): The dtype of the decisions.
+            *arrays (np.ndarray): The arguments of the method, one entry per deciding player.
+
+        Returns:
+            np.ndarray: The decision of each player.
+        """
+
+        # one call covers everyone when the seats share a strategy
+        if all(strategy is self.strategies[0] for strategy in self.strategies):
+            return np.asarray(getattr(self.strategies[0], method)(*arrays), dtype=dtype)
+
+        decisions = np.empty(len(seats), dtype=dtype)
+        for seat, strategy in enumerate(self.strategies):
+            mask = seats == seat
+            if mask.any():
+                decisions[mask] = getattr(strategy, method)(*(array[mask] for array in arrays))
+        return decisions
+
+    def auction_off(self, g, current, tile):
+        """Auctions off the tiles in games g to the other players.
+
+        Like Game.auction_off, every player still in the game other than the
+        current one bids, in turn order, and all the auctions are cleared at
+        once by auctions.clear_auctions.
+
+        Args:
+            g (np.ndarray): The games holding an auction.
+            current (np.ndarray): The player that declined the tile in each game.
+            tile (np.ndarray): The tile being auctioned in each game.
+        """
+
+        if len(g) == 0:
+            return
+
+        # the bidders of each auction in turn order, starting after the current player
+        bidders = (current[:, None] + np.arange(1, self.player_count)[None, :]) % self.player_count
+        money = self.money[g[:, None], bidders]
+        cost = np.broadcast_to(self.costs[tile][:, None], bidders.shape).ravel()
+        bids = self.decide("bid_many", bidders.ravel(), np.int64, money.ravel(), cost,
+                           np.broadcast_to(tile[:, None], bidders.shape).ravel(), self.rng.random(bidders.size))
+        bids = np.minimum(bids.reshape(bidders.shape), money)
+        bids[self.lost[g[:, None], bidders]] = -1
+
+        winner, price = clear_auctions(bids, self.config.auction_increment, self.config.auction)
+        sold = winner >= 0
+        g, tile, price = g[sold], tile[sold], price[sold]
+        buyer = bidders[sold, winner[sold]]
+        self.money.reshape(-1)[g * self.player_count + buyer] -= price.astype(self.money.dtype)
+        self.buy_property(g, buyer, tile)
+
+    def rent_due(self, g, owner, tile, roll):
+        """Calculates the rent owed for the tiles landed on in games g.
+
+        Args:
+            g (np.ndarray): The games where rent is due.
+            owner (np.ndarray): The owner of the tile in each game.
+            tile (np.ndarray): The tile landed on in each game.
+            roll (np.ndarray): The roll that moved the player in each game.
+
+        Returns:
+            np.ndarray: The rent owed to the owner in each game.
+        """
+
+        code = self.codes[tile]
+        group = self.groups[tile]
+        owned = self.group_counts.reshape(-1)[(g * self.player_count + owner) * self.group_count + group]
+
+        rent = self.rents[tile] * (1 + self.inflation[g])
+        rent = np.where(code == RAILROAD, self.rents[tile] * RAILROAD_MULTIPLIERS[owned], rent)
+        rent = np.where((code == UTILITY) & (owned == 1), 4 * roll, rent)
+        rent = np.where((code == UTILITY) & (owned == 2), 10 * roll, rent)
+
+        set_owned = (code == PROPERTY) & (owned == self.group_sizes[group])
+        rent = np.where(set_owned, 2 * rent, rent)
+
+        return rent
+
+    def step(self):
+        """Runs one iteration of the Game.play loop in every unfinished game.
+
+        The state of the player taking the turn is gathered into flat arrays,
+        updated with masks, and scattered back at the end of the step.
+        """
+
+        count = self.player_count
+        running = ~self.finished
+
+        # calculate the current inflation rate
+        inflate = running & (self.turn_count % self.config.inflation_turn == 0)
+        self.inflation[inflate] += self.config.inflation_increase
+
+        # if the player has lost, skip their turn
+        g = np.flatnonzero(running)
+        p = self.player_index[g]
+        gp = g * count + p
+        skipped = self.lost.reshape(-1)[gp]
+        self.player_index[g[skipped]] = (p[skipped] + 1) % count
+        g, p, gp = g[~skipped], p[~skipped], gp[~skipped]
+
+        tile_index = self.tile_index.reshape(-1)[gp]
+        money = self.money.reshape(-1)[gp]
+        doubles_count = self.doubles_count.reshape(-1)[gp]
+        jailed = self.jailed.reshape(-1)[gp]
+        jail_time = self.jail_time.reshape(-1)[gp]
+
+        # jailed players can pay $50 to leave before rolling, if their strategy says so
+        leave = jailed & (money >= 50)
+        if leave.any():
+            leave[leave] = self.decide("leave_jail_many", p[leave], bool, money[leave], jail_time[leave])
+            money -= 50 * leave
+            jailed = jailed & ~leave
+            jail_time[leave] = 0
+
+        dice = self.rng.integers(1, 7, size=(2, len(g)))
+        doubles = dice[0] == dice[1]
+        roll = dice[0] + dice[1]
+
+        # jailed players leave on doubles, or pay $50 after 3 turns
+        stayed = jailed & ~doubles
+        jail_time = np.where(stayed, jail_time + 1, 0)
+        paid = jail_time == 3
+        money -= 50 * paid
+        jail_time[paid] = 0
+
+        # free players count their doubles, and go to jail on the third
+        doubles_count = np.where(jailed, doubles_count, np.where(doubles, doubles_count + 1, 0))
+        triple = doubles_count == 3
+        jailed = (stayed & ~paid) | triple
+        moving = ~triple
+
+        # move the player, passing go if they wrapped around the board
+        new_index = (tile_index + roll) % BOARD_SIZE
+        passed_go = moving & (new_index < tile_index)
+        tile_index = np.where(moving, new_index, JAIL_INDEX)
+        money += 200 * passed_go
+        self.trip_around_board[g[passed_go]] += 1
+
+        # handle the tile the player landed on
+        code = np.where(moving, self.codes[tile_index], OTHER)
+
+        go_to_jail = triple | (code == GO_TO_JAIL)
+        jailed |= go_to_jail
+        doubles_count[go_to_jail] = 0
+        tile_index[go_to_jail] = JAIL_INDEX
+
+        if self.config.house_rules:
+            money += 500 * (code == PARKING)
+
+        buyable = (code == PROPERTY) | (code == RAILROAD) | (code == UTILITY)
+        owner = self.owner.reshape(-1)[g * BOARD_SIZE + tile_index]
+        owned = buyable & (owner >= 0)
+        owner = owner[owned]
+        rent = self.rent_due(g[owned], owner, tile_index[owned], roll[owned])
+
+        tax = code == TAX
+        due = np.zeros(len(g), dtype=money.dtype)
+        due[owned] = rent
+        due[tax] = self.costs[tile_index[tax]]
+        broke = (owned | tax) & (money < due)
+        money -= np.where(broke, 0, due)
+
+        unowned = buyable & ~owned
+        cost = self.costs[tile_index[unowned]]
+        uniforms = self.rng.random(len(cost))
+        buys = money[unowned] >= cost
+        if buys.any():
+            buys &= self.decide("buy_many", p[unowned], bool, money[unowned], cost, tile_index[unowned], uniforms)
+        bought = np.flatnonzero(unowned)[buys]
+        money[bought] -= cost[buys]
+
+        # scatter the player's state back before paying owners and auction buyers
+        self.tile_index.reshape(-1)[gp] = tile_index
+        self.money.reshape(-1)[gp] = money
+        self.doubles_count.reshape(-1)[gp] = doubles_count
+        self.jailed.reshape(-1)[gp] = jailed
+        self.jail_time.reshape(-1)[gp] = jail_time
+
+        paying = ~broke[owned]
+        self.money.reshape(-1)[g[owned][paying] * count + owner[paying]] += rent[paying]
+
+        self.lost.reshape(-1)[gp[broke]] = True
+        self.bankrupt_turn.reshape(-1)[gp[broke]] = self.turn_count[g[broke]]
+        self.remaining_players[g[broke]] -= 1
+
+        self.buy_property(g[bought], p[bought], tile_index[bought])
+        if not self.config.house_rules:
+            declined = np.flatnonzero(unowned)[~buys]
+            self.auction_off(g[declined], p[declined], tile_index[declined])
+
+        self.player_index[g] = (p + 1) % count
+
+        # if there is only one player left, they are the winner
+        won = g[moving & (self.remaining_players[g] == 1)]
+        self.finish(won, np.argmax(~self.lost[won], axis=1), Monopoly.END_BANKRUPTCY, self.turn_count[won] + 1)
+
+        self.turn_count[g] += moving
+        self.check_termination(g[moving & ~self.finished[g]])
+
+    def finish(self, g, winners, end_reason, turns):
+        """Records the results of the games g and marks them finished.
+
+        Args:
+            g (np.ndarray): The games that have ended.
+            winners (np.ndarray): The winner of each game.
+            end_reason (int): How the games ended.
+            turns (np.ndarray): The turns each game took.
+        """
+
+        self.finished[g] = True
+        ids = self.ids[g]
+        self.winners[ids] = winners
+        self.end_reasons[ids] = end_reason
+        self.loops[ids] = self.all_properties_bought_turn_count[g]
+        self.turns[ids] = turns
+        self.final_money[ids] = self.money[g]
+        self.bankrupt_turns[ids] = self.bankrupt_turn[g]
+
+    def net_worth(self, g):
+        """Calculates every player's money plus the cost of their properties in games g.
+
+        Args:
+            g (np.ndarray): The games to value.
+
+        Returns:
+            np.ndarray: The net worth of each player in each game.
+        """
+
+        owner = self.owner[g]
+        rows, tiles = np.nonzero(owner >= 0)
+        worth = self.money[g].astype(np.int64)
+        np.add.at(worth, (rows, owner[rows, tiles]), self.costs[tiles])
+        return worth
+
+    def check_termination(self, g):
+        """Ends the games g early if they have reached the turn cap or stalled, like Game.check_termination.
+
+        Args:
+            g (np.ndarray): The games that just finished a turn.
+        """
+
+        max_turns = self.config.max_turns
+        window = self.config.stalemate_window
+        if max_turns is None and not window:
+            return
+
+        turn_count = self.turn_count[g]
+        capped = turn_count >= max_turns if max_turns is not None else np.zeros(len(g), dtype=bool)
+        checked = ~capped & (turn_count % window == 0) if window else np.zeros(len(g), dtype=bool)
+        if not (capped.any() or checked.any()):
+            return
+
+        # the richest remaining player wins, the lowest id on a tie
+        worth = self.net_worth(g)
+        lost = self.lost[g]
+        richest = np.argmax(np.where(lost, np.iinfo(np.int64).min, worth), axis=1)
+
+        poorest = np.where(lost, np.iinfo(np.int64).max, worth).min(axis=1)
+        bankruptcies = self.player_count - self.remaining_players[g]
+        stalled = (checked & (self.stalemate_bankruptcies[g] == bankruptcies)
+                   & (poorest >= self.stalemate_poorest[g]))
+        self.stalemate_bankruptcies[g[checked]] = bankruptcies[checked]
+        self.stalemate_poorest[g[checked]] = poorest[checked]
+
+        self.finish(g[capped], richest[capped], Monopoly.END_MAX_TURNS, turn_count[capped])
+        self.finish(g[stalled], richest[stalled], Monopoly.END_STALEMATE, turn_count[stalled])
+
+    def compact(self):
+        """Drops the finished games from the state arrays and starts new ones in their place."""
+
+        keep = ~self.finished
+        fresh = self.new_games(min(self.width - np.count_nonzero(keep), self.size - self.started))
+        for name in self.STATE:
+            setattr(self, name, np.concatenate((getattr(self, name)[keep], fresh[name])))
+
+    def play(self):
+        """Plays every game to completion.
+
+        Returns:
+            tuple: Arrays of the turns, loops, winner, final money, bankruptcy turns and end reason of each game.
+        """
+
+        while len(self.finished):
+            self.step()
+
+            # compact once an eighth of the held games have finished
+            if 8 * np.count_nonzero(self.finished) >= len(self.finished):
+                self.compact()
+
+        return self.turns, self.loops, self.winners, self.final_money, self.bankrupt_turns, self.end_reasons
+
+
+def play_batches(n_games, config=None, width=10000, seed=None):
+    """Plays n_games games with the batch engine, at most width games at a time.
+
+    Args:
+        n_games (int): The number of games to play.
+        config (Monopoly.GameConfig): The settings of the games.
+        width (int): The maximum number of games held in memory at once.
+        seed (int | np.random.SeedSequence): The seed for the run.
+
+    Returns:
+        dict: The "turns", "loops", "winners", "money", "bankrupt_turn" and "end_reason" arrays, one entry per game.
+    """
+
+    results = GameBatch(n_games, config, rng=seed, width=width).play()
+    return dict(zip(("turns", "loops", "winners", "money", "bankrupt_turn", "end_reason"), results))
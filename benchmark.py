@@ -0,0 +1,271 @@
+import argparse
+import json
+import platform
+import sys
+import time
+
+import numpy as np
+
+import Monopoly
+from board import read_board
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Benchmark suite. Times whole games across player counts and house rules, and
+the hot methods of Game on their own, and saves the results as JSON so a new
+version can be compared against an older run and its regressions flagged.
+
+    python benchmark.py --output new.json --baseline old.json
+"""
+
+PLAYER_COUNTS = range(2, 9)
+
+
+def time_games(config, n_games, seed=0, repeats=3):
+    """Times playing games with one config.
+
+    The same seeded games are played every repeat and the fastest repeat is
+    kept, which is the least disturbed by anything else running.
+
+    Args:
+        config (Monopoly.GameConfig): The settings of the games.
+        n_games (int): The number of games per repeat.
+        seed (int): The seed of the games.
+        repeats (int): The number of times to play the games.
+
+    Returns:
+        dict: The games and turns played, the seconds taken, and the games
+            and turns per second.
+    """
+
+    seeds = np.random.SeedSequence(seed).spawn(n_games)
+    best = float("inf")
+    for _ in range(repeats):
+        turns = 0
+        start = time.perf_counter()
+        for game_seed in seeds:
+            turns += Monopoly.Game(rng=Monopoly.RandomStream(game_seed), config=config).play()[0]
+        best = min(best, time.perf_counter() - start)
+
+    return {
+        "player_count": config.player_count,
+        "house_rules": config.house_rules,
+        "games": n_games,
+        "turns": turns,
+        "seconds": best,
+        "games_per_second": n_games / best,
+        "turns_per_second": turns / best,
+    }
+
+
+def time_calls(calls, repeats=3):
+    """Times a list of calls, each made once per repeat.
+
+    Args:
+        calls (list): The functions to call, each taking no arguments.
+        repeats (int): The number of times to make the calls.
+
+    Returns:
+        float: The fastest repeat's nanoseconds per call.
+    """
+
+    best = float("inf")
+    for _ in range(repeats):
+        start = time.perf_counter_ns()
+        for call in calls:
+            call()
+        best = min(best, time.perf_counter_ns() - start)
+
+    return best / len(calls)
+
+
+def mid_game(seed=0, owned=20):
+    """Sets up a game partway through, with a player about to land on a property.
+
+    Args:
+        seed (int): The seed of the game.
+        owned (int): The number of properties handed out to the players.
+
+    Returns:
+        Monopoly.Game: The game, with current_player and current_roll set.
+    """
+
+    game = Monopoly.Game(rng=Monopoly.RandomStream(seed))
+    properties = [tile for tile in game.board if tile.group >= 0]
+    for i in game.rng.generator.permutation(len(properties))[:owned]:
+        game.buy_property(game.rng.choice(game.players[1:]), properties[i])
+
+    # rich enough to never go bankrupt however many times it pays
+    game.current_player = game.players[0]
+    game.current_player.money = 10 ** 12
+    game.current_roll = 7
+    return game
+
+
+def time_methods(n_calls=20000, seed=0, repeats=3):
+    """Times the hot methods of Game on their own.
+
+    Methods that change the state, like auction_off, are called once each
+    on their own freshly set up game.
+
+    Args:
+        n_calls (int): The number of calls per repeat.
+        seed (int): The seed of the games.
+        repeats (int): The number of times to make the calls.
+
+    Returns:
+        dict: The nanoseconds per call of each method.
+    """
+
+    game = mid_game(seed)
+    owned = [tile for tile in game.board if game.owners[tile.tile_index] is not None]
+    chance = next(tile for tile in game.board if tile.type == "chance")
+    rent_tiles = [owned[i % len(owned)] for i in range(n_calls)]
+
+    # auctions need an unowned property each, the games share a stream so none pays for drawing its first block
+    stream = Monopoly.RandomStream(seed)
+    stream.refill_uniforms()
+    auction_calls = []
+    for i in range(min(n_calls, 2000)):
+        fresh = Monopoly.Game(rng=stream)
+        fresh.current_player = fresh.players[0]
+        auction_calls.append(lambda fresh=fresh: fresh.auction_off(fresh.board[1]))
+
+    return {
+        "roll_two_dice": time_calls([game.rng.roll_two_dice] * n_calls, repeats),
+        "handle_tile": time_calls([lambda tile=tile: game.handle_tile(tile) for tile in rent_tiles[:n_calls // 2]]
+                                  + [lambda: game.handle_tile(chance)] * (n_calls // 2), repeats),
+        "pay_rent": time_calls([lambda tile=tile: game.pay_rent(tile) for tile in rent_tiles], repeats),
+        "set_owned": time_calls([lambda tile=tile: game.set_owned(tile) for tile in rent_tiles], repeats),
+        "auction_off": time_calls(auction_calls, 1),
+        # reading the standard board back from its compiled form in the cache
+        "read_board": time_calls([read_board] * max(1, n_calls // 100), repeats),
+    }
+
+
+def run_benchmarks(n_games=200, n_calls=20000, seed=0, repeats=3, player_counts=PLAYER_COUNTS):
+    """Runs the whole suite.
+
+    Args:
+        n_games (int): The number of games per config.
+        n_calls (int): The number of calls per method.
+        seed (int): The seed of the games.
+        repeats (int): The number of times to repeat each measurement.
+        player_counts (list): The player counts to time games with.
+
+    Returns:
+        dict: The environment, the timings of the games and the timings of the methods.
+    """
+
+    games = [time_games(Monopoly.GameConfig(player_count=player_count, house_rules=house_rules), n_games, seed,
+                        repeats)
+             for player_count in player_counts for house_rules in (False, True)]
+
+    return {
+        "environment": {
+            "engine_version": Monopoly.ENGINE_VERSION,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "machine": platform.machine(),
+            "processor": platform.processor(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        },
+        "settings": {"n_games": n_games, "n_calls": n_calls, "seed": seed, "repeats": repeats},
+        "games": games,
+        "methods": time_methods(n_calls, seed, repeats),
+    }
+
+
+def compare(baseline, current, threshold=0.1):
+    """Finds the benchmarks that got slower than the baseline.
+
+    Args:
+        baseline (dict): The results of an earlier run_benchmarks.
+        current (dict): The results of the new run_benchmarks.
+        threshold (float): The fraction a benchmark may slow down by before it is flagged.
+
+    Returns:
+        list: A (name, baseline, current, change) tuple for every regression,
+            change being the fraction it slowed down by.
+    """
+
+    regressions = []
+    old_games = {(entry["player_count"], entry["house_rules"]): entry for entry in baseline["games"]}
+    for entry in current["games"]:
+        key = (entry["player_count"], entry["house_rules"])
+        if key in old_games:
+            old = old_games[key]["games_per_second"]
+            change = old / entry["games_per_second"] - 1
+            if change > threshold:
+                name = "games, {} players, house rules {}".format(*key)
+                regressions.append((name, old, entry["games_per_second"], change))
+
+    for name, nanoseconds in current["methods"].items():
+        old = baseline["methods"].get(name)
+        if old is not None and nanoseconds / old - 1 > threshold:
+            regressions.append((name, old, nanoseconds, nanoseconds / old - 1))
+
+    return regressions
+
+
+def print_results(results):
+    """Prints the results of run_benchmarks as a table.
+
+    Args:
+        results (dict): The results to print.
+    """
+
+    print("players  house rules  games/s    turns/s")
+    for entry in results["games"]:
+        print("{:7d}  {:11}  {:8.1f}  {:9.0f}".format(entry["player_count"], str(entry["house_rules"]),
+                                                    entry["games_per_second"], entry["turns_per_second"]))
+
+    print()
+    print("method          ns/call")
+    for name, nanoseconds in results["methods"].items():
+        print("{:14}  {:9.0f}".format(name, nanoseconds))
+
+
+def main(argv=None):
+    """Runs the suite from the command line.
+
+    Args:
+        argv (list): The arguments, sys.argv[1:] if None.
+
+    Returns:
+        int: 1 if any benchmark regressed against the baseline, 0 otherwise.
+    """
+
+    parser = argparse.ArgumentParser(description="Benchmarks the Monopoly simulation.")
+    parser.add_argument("-n", "--games", type=int, default=200, help="the number of games per config")
+    parser.add_argument("--calls", type=int, default=20000, help="the number of calls per method")
+    parser.add_argument("-s", "--seed", type=int, default=0, help="the seed of the games")
+    parser.add_argument("-r", "--repeats", type=int, default=3, help="the times each measurement is repeated")
+    parser.add_argument("-o", "--output", help="save the results to this JSON file")
+    parser.add_argument("-b", "--baseline", help="compare against the results in this JSON file")
+    parser.add_argument("-t", "--threshold", type=float, default=0.1,
+                        help="the fraction a benchmark may slow down by before it is flagged")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(args.games, args.calls, args.seed, args.repeats)
+    print_results(results)
+
+    if args.output is not None:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline is None:
+        return 0
+
+    with open(args.baseline) as file:
+        regressions = compare(json.load(file), results, args.threshold)
+
+    for name, old, new, change in regressions:
+        print("REGRESSION", name + ":", round(old, 1), "->", round(new, 1), "({:+.0%})".format(change))
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
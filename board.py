@@ -0,0 +1,470 @@
+import hashlib
+import json
+import os
+
+import numpy as np
+
+try:
+    import tomllib
+except ImportError:
+    tomllib = None
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Immutable board definitions. A board is described in a JSON (or TOML) file,
+validated once, compiled into an array of tile records and cached on disk under
+the hash of the file, so later runs load the compiled records straight away.
+Each board is built once per process and shared by every game, with the tile
+data flattened into integer codes and arrays.
+"""
+
+BOARD_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "boards")
+STANDARD_BOARD = os.path.join(BOARD_DIR, "standard.json")
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".board_cache")
+
+# bump whenever compile_board changes, so boards compiled by older code aren't loaded from the cache
+COMPILED_FORMAT = 1
+
+# the compiled record of a tile, the rents of a property with 1 to 4 houses and a hotel in rents
+TILE_DTYPE = np.dtype([("name", "U40"), ("type", "U12"), ("color", "U20"), ("cost", np.int32), ("rent", np.int32),
+                       ("house_cost", np.int32), ("rents", np.int32, (5,))])
+
+# the engine moves players around a board of this many tiles, jails them on JAIL_INDEX, and its cards
+# send them to fixed tiles, so every board has to keep the standard layout
+BOARD_SIZE = 40
+JAIL_INDEX = 10
+
+# tile type codes
+GO = 0
+PROPERTY = 1
+RAILROAD = 2
+UTILITY = 3
+TAX = 4
+CHANCE = 5
+CHEST = 6
+JAIL = 7
+GO_TO_JAIL = 8
+PARKING = 9
+OTHER = 10
+
+CODE_COUNT = 11
+
+# group ids reserved for the railroads and utilities, color groups follow
+RAILROAD_GROUP = 0
+UTILITY_GROUP = 1
+
+# the development level of a property with a hotel, levels 1 to 4 being houses
+HOTEL = 5
+
+# card actions, each card being an (action, value, second value) triple
+CARD_ADVANCE = 0        # move forward to tile value, collecting $200 for passing GO
+CARD_RAILROAD = 1       # move forward to the nearest railroad and pay twice its rent
+CARD_UTILITY = 2        # move forward to the nearest utility and pay ten times a fresh roll
+CARD_BACK = 3           # move back value tiles
+CARD_JAIL = 4           # go to jail
+CARD_JAIL_FREE = 5      # kept until it gets the player out of jail
+CARD_MONEY = 6          # collect value from the bank, or pay it if negative
+CARD_REPAIRS = 7        # pay value per house and second value per hotel
+CARD_PLAYERS = 8        # collect value from every other player, or pay each of them if negative
+
+CHANCE_CARDS = (
+    (CARD_ADVANCE, 39, 0),      # advance to Boardwalk
+    (CARD_ADVANCE, 0, 0),       # advance to GO
+    (CARD_ADVANCE, 24, 0),      # advance to Illinois Ave
+    (CARD_ADVANCE, 11, 0),      # advance to St. Charles Place
+    (CARD_RAILROAD, 0, 0),
+    (CARD_RAILROAD, 0, 0),
+    (CARD_UTILITY, 0, 0),
+    (CARD_MONEY, 50, 0),        # bank pays you a dividend
+    (CARD_JAIL_FREE, 0, 0),
+    (CARD_BACK, 3, 0),
+    (CARD_JAIL, 0, 0),
+    (CARD_REPAIRS, 25, 100),    # general repairs
+    (CARD_MONEY, -15, 0),       # speeding fine
+    (CARD_ADVANCE, 5, 0),       # take a trip to Reading Railroad
+    (CARD_PLAYERS, -50, 0),     # chairman of the board
+    (CARD_MONEY, 150, 0),       # building loan matures
+)
+
+CHEST_CARDS = (
+    (CARD_ADVANCE, 0, 0),       # advance to GO
+    (CARD_MONEY, 200, 0),       # bank error in your favor
+    (CARD_MONEY, -50, 0),       # doctor's fee
+    (CARD_MONEY, 50, 0),        # sale of stock
+    (CARD_JAIL_FREE, 0, 0),
+    (CARD_JAIL, 0, 0),
+    (CARD_MONEY, 100, 0),       # holiday fund matures
+    (CARD_MONEY, 20, 0),        # income tax refund
+    (CARD_PLAYERS, 10, 0),      # it is your birthday
+    (CARD_MONEY, 100, 0),       # life insurance matures
+    (CARD_MONEY, -100, 0),      # hospital fees
+    (CARD_MONEY, -50, 0),       # school fees
+    (CARD_MONEY, 25, 0),        # consultancy fee
+    (CARD_REPAIRS, 40, 115),    # street repairs
+    (CARD_MONEY, 10, 0),        # second prize in a beauty contest
+    (CARD_MONEY, 100, 0),       # you inherit
+)
+
+# the decks a card can be drawn from, indexed like Game.decks
+CARD_DECKS = (CHANCE_CARDS, CHEST_CARDS)
+
+# the type of the tile each advance card moves to
+CARD_TARGETS = {5: "railroad", 11: "property", 24: "property", 39: "property"}
+
+TILE_CODES = {
+    "go": GO,
+    "property": PROPERTY,
+    "railroad": RAILROAD,
+    "utility": UTILITY,
+    "tax": TAX,
+    "chance": CHANCE,
+    "chest": CHEST,
+    "jail": JAIL,
+    "go to jail": GO_TO_JAIL,
+    "parking": PARKING,
+}
+
+
+class Tile:
+    """Holds the information about a board tile.
+
+    Tiles are shared by every game on the board, the owner of a tile is kept
+    by each Game in its owners list.
+
+    Attributes:
+        tile_index (int): The index of the tile on the board.
+        name (str): The name of the tile.
+        cost (int): The cost to buy the tile, or the tax charged on it.
+        rent (int): The rent of the tile.
+        type (str): The type of the tile.
+        color (str): The color of the tile.
+        code (int): The type code of the tile, used to dispatch its handler.
+        group (int): The color group of the tile, -1 if it can't be owned.
+    """
+
+    __slots__ = ("tile_index", "name", "cost", "rent", "type", "color", "code", "group")
+
+    def __init__(self, tile_index, name, cost, rent, type, color):
+        self.tile_index = tile_index
+        self.name = name
+        self.cost = cost
+        self.rent = rent
+        self.type = type
+        self.color = color
+        self.code = tile_code(type)
+        self.group = -1
+
+
+def tile_code(type):
+    """Looks up the code of a tile type.
+
+    Args:
+        type (str): The type of the tile.
+
+    Returns:
+        int: The tile's code, OTHER if the type is not recognised.
+    """
+
+    return TILE_CODES.get(type, OTHER)
+
+
+class Board:
+    """Holds the immutable definition of a game board.
+
+    Properties are grouped by color, and railroads and utilities each form a
+    group of their own with the reserved ids RAILROAD_GROUP and UTILITY_GROUP.
+    Tiles that can't be owned have group -1.
+
+    The rents of the full rules are precomputed into rent_levels, a row per
+    tile indexed by development: 0 for the base rent, 1 for the doubled rent
+    of an undeveloped set, and 2 to 6 for 1 to 4 houses and a hotel.
+
+    Attributes:
+        name (str): The name of the board.
+        digest (str): The hash of the file the board was loaded from, None if it wasn't.
+        tiles (tuple): The tiles on the board.
+        codes (np.ndarray): The type code of each tile.
+        costs (np.ndarray): The cost of each tile.
+        rents (np.ndarray): The base rent of each tile.
+        groups (np.ndarray): The group id of each tile.
+        group_names (tuple): The color, or "railroad"/"utility", of each group.
+        group_sizes (tuple): The number of tiles in each group.
+        property_count (int): The number of tiles that can be owned.
+        house_costs (tuple): The cost of a house on each tile, 0 if it can't be built on.
+        rent_levels (tuple): The rent of each tile at each development index, see above.
+        rent_table (np.ndarray): rent_levels as a (tiles, 7) array.
+        group_tiles (tuple): The indices of the tiles in each group.
+        color_groups (tuple): The ids of the color groups, which can be built on, most expensive first.
+        railroads (tuple): The indices of the railroad tiles.
+        utilities (tuple): The indices of the utility tiles.
+    """
+
+    def __init__(self, tiles, developments=None, name=None, digest=None):
+        self.name = name
+        self.digest = digest
+        self.tiles = tuple(tiles)
+        developments = developments or {}
+
+        groups = {"railroad": RAILROAD_GROUP, "utility": UTILITY_GROUP}
+        for tile in self.tiles:
+            if tile.code == PROPERTY:
+                tile.group = groups.setdefault(tile.color, len(groups))
+            elif tile.code == RAILROAD or tile.code == UTILITY:
+                tile.group = groups.setdefault(tile.type, len(groups))
+
+        self.codes = np.array([tile.code for tile in self.tiles], dtype=np.int32)
+        self.costs = np.array([tile.cost for tile in self.tiles], dtype=np.int32)
+        self.rents = np.array([tile.rent for tile in self.tiles], dtype=np.int32)
+        self.groups = np.array([tile.group for tile in self.tiles], dtype=np.int32)
+        for array in (self.codes, self.costs, self.rents, self.groups):
+            array.flags.writeable = False
+
+        self.group_names = tuple(groups)
+        self.group_sizes = tuple(np.bincount(self.groups[self.groups >= 0], minlength=len(groups)).tolist())
+        self.property_count = sum(self.group_sizes)
+
+        # full rules, every property without a development entry can't be built on
+        house_costs = np.zeros(len(self.tiles), dtype=np.int32)
+        rent_table = np.zeros((len(self.tiles), HOTEL + 2), dtype=np.int32)
+        for tile in self.tiles:
+            rent_table[tile.tile_index, 0] = tile.rent
+            if tile.code == PROPERTY:
+                rent_table[tile.tile_index, 1] = 2 * tile.rent
+                if tile.tile_index in developments:
+                    house_cost, rents = developments[tile.tile_index]
+                    house_costs[tile.tile_index] = house_cost
+                    rent_table[tile.tile_index, 2:] = rents
+        rent_table.flags.writeable = False
+
+        self.house_costs = tuple(house_costs.tolist())
+        self.rent_table = rent_table
+        self.rent_levels = tuple(tuple(row) for row in rent_table.tolist())
+        self.group_tiles = tuple(tuple(np.flatnonzero(self.groups == group).tolist()) for group in range(len(groups)))
+        self.color_groups = tuple(sorted(
+            (group for group in range(len(groups)) if group not in (RAILROAD_GROUP, UTILITY_GROUP)
+             and all(house_costs[index] for index in self.group_tiles[group])),
+            key=lambda group: -max(self.costs[index] for index in self.group_tiles[group])))
+        self.railroads = tuple(np.flatnonzero(self.codes == RAILROAD).tolist())
+        self.utilities = tuple(np.flatnonzero(self.codes == UTILITY).tolist())
+
+
+def parse_board(raw, path):
+    """Parses the description of a board from the contents of its file.
+
+    Args:
+        raw (bytes): The contents of the file.
+        path (str): The path of the file, read as TOML if it ends in .toml and as JSON otherwise.
+
+    Returns:
+        dict: The description of the board.
+    """
+
+    if path.endswith(".toml"):
+        if tomllib is None:
+            raise ImportError("reading TOML boards needs Python 3.11 or later")
+        return tomllib.loads(raw.decode())
+    return json.loads(raw)
+
+
+def validate_board(data):
+    """Checks a board description against what the engine can play.
+
+    Every problem found is reported at once.
+
+    Args:
+        data (dict): The description of the board, a "tiles" list of tile dicts
+            with a name and type, and where they apply a cost, rent, color,
+            house_cost and the 5 rents with houses and a hotel.
+
+    Raises:
+        ValueError: If the board can't be played.
+    """
+
+    problems = []
+    tiles = data.get("tiles") if isinstance(data, dict) else None
+    if not isinstance(tiles, list):
+        raise ValueError("invalid board: expected a \"tiles\" list")
+
+    if len(tiles) != BOARD_SIZE:
+        problems.append("the board has {} tiles, expected {}".format(len(tiles), BOARD_SIZE))
+
+    groups = {}
+    for index, tile in enumerate(tiles):
+        where = "tile {}".format(index)
+        if not isinstance(tile, dict) or not isinstance(tile.get("name"), str) or not tile["name"]:
+            problems.append(where + " has no name")
+            continue
+        where += " ({})".format(tile["name"])
+        if len(tile["name"]) > TILE_DTYPE["name"].itemsize // 4:
+            problems.append("{} has a name longer than {} characters".format(where, TILE_DTYPE["name"].itemsize // 4))
+        if len(str(tile.get("color", ""))) > TILE_DTYPE["color"].itemsize // 4:
+            problems.append("{} has a color longer than {} characters".format(where, TILE_DTYPE["color"].itemsize // 4))
+
+        type = tile.get("type")
+        if type not in TILE_CODES:
+            problems.append("{} has unknown type {!r}, expected one of {}".format(where, type, ", ".join(TILE_CODES)))
+            continue
+
+        for key in ("cost", "rent", "house_cost"):
+            value = tile.get(key, 0)
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                problems.append("{} has {} {!r}, expected a whole number of dollars".format(where, key, value))
+
+        code = TILE_CODES[type]
+        if code in (PROPERTY, RAILROAD, UTILITY, TAX) and not tile.get("cost"):
+            problems.append("{} is a {} without a cost".format(where, type))
+        if code not in (PROPERTY, RAILROAD, UTILITY, TAX) and tile.get("cost"):
+            problems.append("{} is a {} with a cost".format(where, type))
+
+        if code == PROPERTY:
+            if not tile.get("color"):
+                problems.append(where + " is a property without a color")
+            elif tile["color"] in ("railroad", "utility"):
+                problems.append("{} is a property with the reserved color {!r}".format(where, tile["color"]))
+                continue
+            groups.setdefault(tile.get("color"), []).append(tile)
+        elif code == RAILROAD or code == UTILITY:
+            groups.setdefault(type, []).append(tile)
+
+        if "house_cost" in tile or "rents" in tile:
+            rents = tile.get("rents")
+            if code != PROPERTY:
+                problems.append("{} is a {} with houses".format(where, type))
+            elif not tile.get("house_cost") or not isinstance(rents, list) or len(rents) != HOTEL \
+                    or not all(isinstance(rent, int) for rent in rents) or rents != sorted(rents):
+                problems.append("{} needs a house_cost and {} increasing rents with houses and a hotel"
+                                .format(where, HOTEL))
+
+    if len(tiles) == BOARD_SIZE:
+        types = [tile.get("type") if isinstance(tile, dict) else None for tile in tiles]
+        if types[0] != "go":
+            problems.append("tile 0 has to be GO")
+        if types[JAIL_INDEX] != "jail":
+            problems.append("tile {} has to be the jail".format(JAIL_INDEX))
+        for index, type in sorted(CARD_TARGETS.items()):
+            if types[index] != type:
+                problems.append("tile {} has to be a {}, the cards move players there".format(index, type))
+
+    # the cards move players to the nearest railroad and utility
+    if not groups.get("railroad"):
+        problems.append("the board has no railroad")
+    if not groups.get("utility"):
+        problems.append("the board has no utility")
+
+    # rents are only defined for up to 4 railroads and 2 utilities
+    if len(groups.get("railroad", [])) > 4:
+        problems.append("the board has more than 4 railroads")
+    if len(groups.get("utility", [])) > 2:
+        problems.append("the board has more than 2 utilities")
+
+    for color, members in groups.items():
+        if color in ("railroad", "utility") or not color:
+            continue
+        if not 2 <= len(members) <= 4:
+            problems.append("the {} set has {} properties, expected 2 to 4".format(color, len(members)))
+        if len({"house_cost" in member for member in members}) > 1:
+            problems.append("the {} set has houses on only some of its properties".format(color))
+
+    if problems:
+        raise ValueError("invalid board: " + "; ".join(problems))
+
+
+def compile_board(data):
+    """Compiles a validated board description into a record of each tile.
+
+    Args:
+        data (dict): The description of the board, see validate_board.
+
+    Returns:
+        np.ndarray: The TILE_DTYPE record of each tile.
+    """
+
+    return np.array([(tile["name"], tile["type"], tile.get("color", ""), tile.get("cost", 0), tile.get("rent", 0),
+                      tile.get("house_cost", 0), tile.get("rents", [0] * HOTEL)) for tile in data["tiles"]],
+                    dtype=TILE_DTYPE)
+
+
+def build_board(compiled, name=None, digest=None):
+    """Builds a Board from the compiled records of its tiles.
+
+    Args:
+        compiled (np.ndarray): The TILE_DTYPE records from compile_board.
+        name (str): The name of the board.
+        digest (str): The hash of the board's file.
+
+    Returns:
+        Board: The board.
+    """
+
+    tiles = []
+    developments = {}
+    for index, (tile_name, type, color, cost, rent, house_cost, rents) in enumerate(compiled.tolist()):
+        tiles.append(Tile(index, tile_name, cost, rent, type, color or None))
+        if house_cost:
+            developments[index] = (house_cost, tuple(rents))
+    return Board(tiles, developments, name, digest)
+
+
+def read_board(path=STANDARD_BOARD, cache_dir=CACHE_DIR):
+    """Reads a board file, compiling it unless its compiled form is already cached.
+
+    The board is named after its file.
+
+    The compiled records are cached as an .npy file named after the hash of
+    the board file, so a cached board skips parsing and validation, and an
+    edited board is validated and compiled again.
+
+    Args:
+        path (str): The path of the board file.
+        cache_dir (str): The directory of the compiled boards, None to not cache them.
+
+    Returns:
+        Board: The board.
+    """
+
+    with open(path, "rb") as file:
+        raw = file.read()
+    digest = hashlib.sha256(b"%d:" % COMPILED_FORMAT + raw).hexdigest()
+    name = os.path.splitext(os.path.basename(path))[0]
+    cached = os.path.join(cache_dir, digest + ".npy") if cache_dir is not None else None
+
+    if cached is not None and os.path.exists(cached):
+        return build_board(np.load(cached), name, digest)
+
+    data = parse_board(raw, path)
+    validate_board(data)
+    compiled = compile_board(data)
+    if cached is not None:
+        # written under a temporary name and renamed into place, so workers never read half a file
+        temporary = "{}.{}.tmp.npy".format(cached[:-len(".npy")], os.getpid())
+        try:
+            os.makedirs(cache_dir, exist_ok=True)
+            np.save(temporary, compiled)
+            os.replace(temporary, cached)
+        except OSError:
+            # a read-only or full disk only costs compiling the board again next time
+            pass
+
+    return build_board(compiled, name, digest)
+
+
+# every board read so far in this process, by path
+BOARDS = {}
+
+
+def load_board(path=None):
+    """Finds a board, reading it the first time it is asked for in this process.
+
+    Args:
+        path (str): The path of the board file, the standard board if None.
+
+    Returns:
+        Board: The board, shared by everyone who loads it.
+    """
+
+    path = path if path is not None else STANDARD_BOARD
+    if path not in BOARDS:
+        BOARDS[path] = read_board(path)
+    return BOARDS[path]
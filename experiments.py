@@ -0,0 +1,208 @@
+import argparse
+import math
+
+import numpy as np
+
+import Monopoly
+from runner import BLOCK_SIZE, block_seed, run_blocks
+from stats import Z_95, RunningStats
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Paired experiments. Every game seed is played once under each configuration,
+so the configurations see the same dice and the same decision draws (common
+random numbers), and the differences are measured game by game. The noise the
+configurations share cancels out of the differences, so far fewer games are
+needed to tell them apart than with independent runs. Antithetic dice can be
+added on top, playing every seed a second time with mirrored dice.
+"""
+
+
+def metric_names(player_count):
+    """Names the values measured for each game.
+
+    Args:
+        player_count (int): The number of player slots measured.
+
+    Returns:
+        list: "turns", then "win_0", "win_1", ... for each player.
+    """
+
+    return ["turns"] + ["win_" + str(player) for player in range(player_count)]
+
+
+def pair_block(n_games, configs, seed_seq, antithetic=False):
+    """Plays a block of games under every configuration inside a worker process.
+
+    Each game seed drives one game per configuration. With antithetic dice,
+    each seed also drives a game with mirrored dice, and the two are averaged.
+
+    Args:
+        n_games (int): The number of game seeds to play.
+        configs (list): The Monopoly.GameConfig of each configuration.
+        seed_seq (np.random.SeedSequence): The seed sequence for this block.
+        antithetic (bool): Whether to average every game with its antithetic twin.
+
+    Returns:
+        np.ndarray: The (n_games, configurations, metrics) values of every game,
+            the metrics being those of metric_names, with the win columns of
+            missing players left at 0.
+    """
+
+    player_count = max(config.player_count for config in configs)
+    values = np.zeros((n_games, len(configs), 1 + player_count))
+    mirrors = (False, True) if antithetic else (False,)
+
+    for i, game_seed in enumerate(seed_seq.spawn(n_games)):
+        for c, config in enumerate(configs):
+            for mirrored in mirrors:
+                game = Monopoly.Game(rng=Monopoly.RandomStream(game_seed, antithetic=mirrored), config=config)
+                turns, _, winner = game.play()
+                values[i, c, 0] += turns
+                values[i, c, 1 + winner] += 1
+
+    return values / len(mirrors)
+
+
+class PairedStats:
+    """Holds the running stats of paired games, and of their differences from the baseline.
+
+    The first configuration is the baseline. Every measured value of every
+    other configuration is differenced with the baseline's value for the same
+    game seed before it is accumulated.
+
+    Attributes:
+        names (list): The metric names, see metric_names.
+        values (list): A RunningStats per metric, for each configuration.
+        differences (list): A RunningStats per metric of each configuration's
+            difference from the baseline, the baseline's own being all zeros.
+    """
+
+    def __init__(self, config_count, player_count):
+        self.names = metric_names(player_count)
+        self.values = [[RunningStats() for _ in self.names] for _ in range(config_count)]
+        self.differences = [[RunningStats() for _ in self.names] for _ in range(config_count)]
+
+    @property
+    def games(self):
+        """int: The number of game seeds played."""
+
+        return self.values[0][0].count
+
+    def add(self, values):
+        """Adds a block of paired games.
+
+        Args:
+            values (np.ndarray): The (games, configurations, metrics) values from pair_block.
+        """
+
+        for c, (stats, differences) in enumerate(zip(self.values, self.differences)):
+            for m in range(len(self.names)):
+                stats[m].add(values[:, c, m])
+                differences[m].add(values[:, c, m] - values[:, 0, m])
+
+    def compare(self, config, metric, z=Z_95):
+        """Compares a configuration against the baseline on one metric.
+
+        Args:
+            config (int): The index of the configuration.
+            metric (str): The name of the metric.
+            z (float): The z-score of the interval, 95% by default.
+
+        Returns:
+            dict: The baseline and configuration means, the mean paired
+                difference with its standard deviation, standard error and
+                interval, the variance an unpaired difference of the same games
+                would have had, and how many times smaller the paired variance
+                is.
+        """
+
+        m = self.names.index(metric)
+        baseline = self.values[0][m]
+        stats = self.values[config][m]
+        difference = self.differences[config][m]
+
+        standard_error = difference.std / math.sqrt(difference.count) if difference.count else math.inf
+        unpaired_variance = baseline.variance + stats.variance
+        if difference.variance > 0:
+            reduction = unpaired_variance / difference.variance
+        else:
+            reduction = math.inf if unpaired_variance > 0 else 1.0
+
+        return {
+            "metric": metric,
+            "baseline_mean": baseline.mean,
+            "mean": stats.mean,
+            "difference": difference.mean,
+            "difference_std": difference.std,
+            "standard_error": standard_error,
+            "interval": (difference.mean - z * standard_error, difference.mean + z * standard_error),
+            "unpaired_variance": unpaired_variance,
+            "paired_variance": difference.variance,
+            "variance_reduction": reduction,
+        }
+
+
+def paired_experiment(configs, n_games, seed=None, workers=None, block_size=BLOCK_SIZE, antithetic=False):
+    """Plays the same game seeds under every configuration across a pool of worker processes.
+
+    The game seeds are spawned like runner.iter_simulations, so the baseline
+    games play out exactly like a plain run with the same seed and block size.
+
+    Args:
+        configs (list): The Monopoly.GameConfig of each configuration, the first being the baseline.
+        n_games (int): The number of game seeds to play.
+        seed (int): The seed for the run, a fresh one is drawn if None.
+        workers (int): The number of worker processes, defaults to the CPU count.
+        block_size (int): The number of game seeds per block.
+        antithetic (bool): Whether to average every game with its antithetic twin.
+
+    Returns:
+        PairedStats: The stats of every configuration and of the differences.
+    """
+
+    configs = list(configs)
+    root = np.random.SeedSequence(seed)
+
+    def block(index):
+        return min(block_size, n_games - index * block_size), configs, block_seed(root, index), antithetic
+
+    stats = PairedStats(len(configs), max(config.player_count for config in configs))
+    for _, values in run_blocks(-(-n_games // block_size), block, workers, pair_block):
+        stats.add(values)
+
+    return stats
+
+
+def main(argv=None):
+    """Compares a game with and without house rules from the command line.
+
+    Args:
+        argv (list): The arguments, sys.argv[1:] if None.
+    """
+
+    parser = argparse.ArgumentParser(description="Compares Monopoly with and without house rules on paired games.")
+    parser.add_argument("-n", "--games", type=int, default=10000, help="the number of paired games")
+    parser.add_argument("-p", "--players", type=int, default=4, help="the number of players")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="the number of worker processes")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="the seed of the run")
+    parser.add_argument("--block-size", type=int, default=BLOCK_SIZE, help="the number of games seeded together")
+    parser.add_argument("--antithetic", action="store_true", help="also play every game with mirrored dice")
+    args = parser.parse_args(argv)
+
+    baseline = Monopoly.GameConfig(player_count=args.players)
+    configs = [baseline, Monopoly.GameConfig(player_count=args.players, house_rules=True)]
+    stats = paired_experiment(configs, args.games, args.seed, args.workers, args.block_size, args.antithetic)
+
+    print("house rules ON - OFF over", stats.games, "paired games")
+    for metric in stats.names:
+        result = stats.compare(1, metric)
+        print("{:6}  {:10.4f} -> {:10.4f}  difference {:+.4f} ({:+.4f}, {:+.4f})  variance reduction {:.2f}x".format(
+            metric, result["baseline_mean"], result["mean"], result["difference"], *result["interval"],
+            result["variance_reduction"]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,235 @@
+import time
+
+import numpy as np
+
+import Monopoly
+from runner import BLOCK_SIZE, block_seed, run_blocks
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Instrumentation of Game. An InstrumentedGame counts how often each branch of
+the rules fires and can time its tile handlers, while a plain Game carries no
+instrumentation at all. Counters merge across worker processes and export as a
+flat dict.
+"""
+
+COUNTER_NAMES = (
+    "games",
+    "turns",
+    "jail_entries",         # free players sent to jail, by the tile or by a third double
+    "jail_exits",           # jailed players released, by doubles or by paying
+    "triple_doubles",
+    "go_to_jail_tile",      # sent to jail by the tile, or by a card under the full rules
+    "properties_bought",    # bought by the player who landed on them
+    "auctions",
+    "auctions_unsold",      # auctions no one could afford
+    "rent_payments",
+    "rent_paid",
+    "bankruptcies_rent",
+    "bankruptcies_tax",
+    "inflation_steps",
+)
+
+
+class Counters:
+    """Holds the counts of the branches taken by a set of games, and the time spent in their handlers.
+
+    Attributes:
+        counts (dict): The count of each of COUNTER_NAMES.
+        handler_ns (dict): The nanoseconds spent in each timed handler.
+        handler_calls (dict): The number of calls to each timed handler.
+    """
+
+    def __init__(self):
+        self.counts = dict.fromkeys(COUNTER_NAMES, 0)
+        self.handler_ns = {}
+        self.handler_calls = {}
+
+    def update(self, other):
+        """Merges the counts of another Counters into this one.
+
+        Args:
+            other (Counters): The counters to merge in.
+        """
+
+        for name, count in other.counts.items():
+            self.counts[name] = self.counts.get(name, 0) + count
+        for name, nanoseconds in other.handler_ns.items():
+            self.handler_ns[name] = self.handler_ns.get(name, 0) + nanoseconds
+            self.handler_calls[name] = self.handler_calls.get(name, 0) + other.handler_calls[name]
+
+    def as_dict(self):
+        """Flattens the counters into one dict.
+
+        Returns:
+            dict: Every count, then the total nanoseconds, calls and mean
+                nanoseconds per call of each timed handler, e.g.
+                "handle_taxes.ns", "handle_taxes.calls" and "handle_taxes.mean_ns".
+        """
+
+        flat = dict(self.counts)
+        for name in sorted(self.handler_ns):
+            flat[name + ".ns"] = self.handler_ns[name]
+            flat[name + ".calls"] = self.handler_calls[name]
+            flat[name + ".mean_ns"] = self.handler_ns[name] / max(1, self.handler_calls[name])
+        return flat
+
+
+class InstrumentedGame(Monopoly.Game):
+    """A Game that counts the branches its rules take.
+
+    The counting is done by overriding the handlers, and by reading what
+    play leaves behind, so Game.play itself is untouched. With timing on, every
+    tile handler and handle_GO is wrapped in time.perf_counter_ns calls.
+
+    Attributes:
+        counters (Counters): The counters the game adds to.
+        jail_entries_before (int): The jail entries the counters held before the game started.
+    """
+
+    def __init__(self, player_count=None, rng=None, config=None, tracer=None, strategies=None, counters=None,
+                 timing=False):
+        super().__init__(player_count, rng, config, tracer, strategies)
+        self.counters = counters if counters is not None else Counters()
+        self.counts = self.counters.counts
+
+        # the jail entries counted before this game, the counters can be shared with earlier games
+        self.jail_entries_before = self.counts["jail_entries"]
+
+        if timing:
+            self.tile_handlers = tuple(self.timed(handler) for handler in self.tile_handlers)
+            self.handle_GO = self.timed(self.handle_GO)
+
+    def timed(self, handler):
+        """Wraps a handler so the time spent in it is recorded.
+
+        Args:
+            handler (function): The handler to wrap.
+
+        Returns:
+            function: The wrapped handler.
+        """
+
+        name = handler.__name__
+        handler_ns = self.counters.handler_ns
+        handler_calls = self.counters.handler_calls
+        handler_ns.setdefault(name, 0)
+        handler_calls.setdefault(name, 0)
+        perf_counter_ns = time.perf_counter_ns
+
+        def timed_handler(*args):
+            start = perf_counter_ns()
+            handler(*args)
+            handler_ns[name] += perf_counter_ns() - start
+            handler_calls[name] += 1
+
+        return timed_handler
+
+    def potential_buy(self, new_tile):
+        # anything else is an auction, or a declined property under house rules
+        super().potential_buy(new_tile)
+        if self.owners[new_tile.tile_index] is self.current_player:
+            self.counts["properties_bought"] += 1
+
+    def auction_off(self, property):
+        super().auction_off(property)
+        self.counts["auctions"] += 1
+        if self.owners[property.tile_index] is None:
+            self.counts["auctions_unsold"] += 1
+
+    def pay_rent(self, new_tile):
+        # the simplified rules have players pay themselves on their own properties, which isn't a payment
+        owner = self.owners[new_tile.tile_index]
+        money = self.current_player.money
+        super().pay_rent(new_tile)
+        paid = money - self.current_player.money
+        if self.current_player.lost:
+            self.counts["bankruptcies_rent"] += 1
+        elif owner is not self.current_player and paid > 0:
+            self.counts["rent_payments"] += 1
+            self.counts["rent_paid"] += paid
+
+    def handle_taxes(self, new_tile):
+        super().handle_taxes(new_tile)
+        if self.current_player.lost:
+            self.counts["bankruptcies_tax"] += 1
+
+    def handle_go_to_jail(self, new_tile=None):
+        # play sends a third double to jail without a tile
+        if new_tile is None:
+            self.counts["triple_doubles"] += 1
+        else:
+            self.counts["go_to_jail_tile"] += 1
+        if not self.current_player.jailed:
+            self.counts["jail_entries"] += 1
+        super().handle_go_to_jail(new_tile)
+
+    def play(self, stop_turn=None):
+        result = super().play(stop_turn)
+        if result is None:
+            return None
+
+        # the whole game is counted once it has finished, however many times it was paused
+        # every jail entry ends in an exit, unless the player was still in jail at the end
+        counts = self.counts
+        jail_entries = self.jail_entries_before
+        counts["games"] += 1
+        counts["turns"] += self.turn_count
+        counts["jail_exits"] += counts["jail_entries"] - jail_entries - sum(player.jailed for player in self.players)
+        if self.config.inflation_increase:
+            counts["inflation_steps"] += self.inflation // self.config.inflation_increase
+        return result
+
+
+def count_block(n_games, config, seed_seq, timing=False):
+    """Plays a block of instrumented games inside a worker process.
+
+    The games are seeded like runner._simulate_block, so they play out exactly
+    like the games of a run with the same seed and block size.
+
+    Args:
+        n_games (int): The number of games to play.
+        config (Monopoly.GameConfig): The settings of the games.
+        seed_seq (np.random.SeedSequence): The seed sequence for this block.
+        timing (bool): Whether to time the handlers.
+
+    Returns:
+        Counters: The counters of the block.
+    """
+
+    counters = Counters()
+    for game_seed in seed_seq.spawn(n_games):
+        InstrumentedGame(rng=Monopoly.RandomStream(game_seed), config=config, counters=counters,
+                         timing=timing).play()
+
+    return counters
+
+
+def collect_counters(n_games, config=None, workers=None, seed=None, block_size=BLOCK_SIZE, timing=False):
+    """Plays n_games instrumented games across a pool of worker processes.
+
+    Args:
+        n_games (int): The number of games to play.
+        config (Monopoly.GameConfig): The settings of the games, the defaults if None.
+        workers (int): The number of worker processes, defaults to the CPU count.
+        seed (int): The seed for the run, a fresh one is drawn if None.
+        block_size (int): The number of games per block.
+        timing (bool): Whether to time the handlers.
+
+    Returns:
+        Counters: The merged counters of every game.
+    """
+
+    config = config if config is not None else Monopoly.GameConfig()
+    root = np.random.SeedSequence(seed)
+
+    def block(index):
+        return min(block_size, n_games - index * block_size), config, block_seed(root, index), timing
+
+    counters = Counters()
+    for _, block_counters in run_blocks(-(-n_games // block_size), block, workers, count_block):
+        counters.update(block_counters)
+
+    return counters
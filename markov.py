@@ -0,0 +1,234 @@
+import numpy as np
+
+import Monopoly
+from board import GO_TO_JAIL, JAIL_INDEX, PROPERTY, RAILROAD, UTILITY
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Markov chain model of a player's movement around the board. Gives the exact
+steady-state landing probabilities, GO passing rate and expected rent per tile
+that the simulation otherwise estimates over millions of turns.
+"""
+
+# the 36 equally likely rolls of two dice, as (doubles, total)
+ROLLS = [(d1 == d2, d1 + d2) for d1 in range(1, 7) for d2 in range(1, 7)]
+
+
+class MarkovChain:
+    """Holds the Markov chain of a single player's turns, as played by Game.play.
+
+    A player's state is their tile, whether they are jailed, and a counter: the
+    doubles in a row for a free player, or the turns served for a jailed one.
+    Each turn follows Game.play: three doubles in a row send a free player to
+    jail without moving, a jailed player is released on doubles or after paying
+    on the third turn, jailed players still move with their roll, and landing on
+    the "Go To Jail" tile sends the player to jail.
+
+    Attributes:
+        tile_count (int): The number of tiles on the board.
+        state_count (int): The number of states in the chain.
+        transition (np.ndarray): The state_count x state_count transition matrix.
+        landing (np.ndarray): The probability of landing on each tile from each state.
+        roll_landing (np.ndarray): The expected roll of the landings on each tile from each state.
+        passes_go (np.ndarray): The probability of passing GO from each state.
+        stationary (np.ndarray): The stationary distribution over the states.
+        landing_probabilities (np.ndarray): The probability of landing on each tile in a turn.
+        go_rate (float): The probability of passing GO in a turn.
+    """
+
+    def __init__(self, board=None):
+        self.board = board if board is not None else Monopoly.BOARD
+        self.tile_count = len(self.board.tiles)
+        self.state_count = 2 * 3 * self.tile_count
+        self.go_to_jail = set(np.flatnonzero(self.board.codes == GO_TO_JAIL).tolist())
+
+        self.transition = np.zeros((self.state_count, self.state_count))
+        self.landing = np.zeros((self.state_count, self.tile_count))
+        self.roll_landing = np.zeros((self.state_count, self.tile_count))
+        self.passes_go = np.zeros(self.state_count)
+        self.build()
+
+        self.stationary = stationary_distribution(self.transition)
+        self.landing_probabilities = self.stationary @ self.landing
+        self.go_rate = float(self.stationary @ self.passes_go)
+
+    def state_index(self, tile_index, jailed, counter):
+        """Finds the index of a state in the chain.
+
+        Args:
+            tile_index (int): The tile the player is on.
+            jailed (bool): Whether the player is jailed.
+            counter (int): The doubles in a row if free, or the turns served if jailed.
+
+        Returns:
+            int: The index of the state.
+        """
+
+        return (3 * jailed + counter) * self.tile_count + tile_index
+
+    def build(self):
+        """Fills in the transition, landing and GO matrices from the rules of Game.play."""
+
+        probability = 1 / len(ROLLS)
+        for jailed in (False, True):
+            for counter in range(3):
+                for tile_index in range(self.tile_count):
+                    state = self.state_index(tile_index, jailed, counter)
+
+                    for doubles, roll in ROLLS:
+                        if jailed:
+                            # released on doubles, or after paying on the third turn
+                            jail_time = 0 if doubles else counter + 1
+                            still_jailed = not doubles and jail_time < 3
+                            next_counter = jail_time if still_jailed else 0
+
+                        else:
+                            # three doubles in a row go to jail without moving
+                            doubles_count = counter + 1 if doubles else 0
+                            if doubles_count == 3:
+                                self.transition[state, self.state_index(JAIL_INDEX, True, 0)] += probability
+                                continue
+
+                            still_jailed = False
+                            next_counter = doubles_count
+
+                        new_index = (tile_index + roll) % self.tile_count
+                        self.landing[state, new_index] += probability
+                        self.roll_landing[state, new_index] += probability * roll
+                        if new_index < tile_index:
+                            self.passes_go[state] += probability
+
+                        # landing on "Go To Jail" keeps the turns already served
+                        if new_index in self.go_to_jail:
+                            next_state = self.state_index(JAIL_INDEX, True, next_counter if still_jailed else 0)
+                        else:
+                            next_state = self.state_index(new_index, still_jailed, next_counter)
+
+                        self.transition[state, next_state] += probability
+
+    def expected_rent(self, owners, inflation=0):
+        """Calculates the expected rent paid on each tile per turn.
+
+        Rent follows Game.pay_rent for the given ownership, with the utilities
+        charged on the roll that landed on them.
+
+        Args:
+            owners (list): The owner id of each tile, or None if it hasn't been bought.
+            inflation (int): The inflation rate applied to property rents.
+
+        Returns:
+            np.ndarray: The expected rent paid to the owner of each tile in a turn.
+        """
+
+        group_counts = {}
+        for tile, owner in zip(self.board.tiles, owners):
+            if owner is not None and tile.group >= 0:
+                group_counts[owner, tile.group] = group_counts.get((owner, tile.group), 0) + 1
+
+        roll_landings = self.stationary @ self.roll_landing
+        rent = np.zeros(self.tile_count)
+        for tile, owner in zip(self.board.tiles, owners):
+            if owner is None:
+                continue
+
+            owned = group_counts[owner, tile.group]
+            if tile.code == RAILROAD:
+                rent[tile.tile_index] = self.landing_probabilities[tile.tile_index] * tile.rent * 2 ** (owned - 1)
+            elif tile.code == UTILITY:
+                rent[tile.tile_index] = roll_landings[tile.tile_index] * (4 if owned == 1 else 10)
+            elif tile.code == PROPERTY:
+                multiplier = 2 if owned == self.board.group_sizes[tile.group] else 1
+                rent[tile.tile_index] = (self.landing_probabilities[tile.tile_index] * multiplier
+                                         * (tile.rent + tile.rent * inflation))
+
+        return rent
+
+
+def stationary_distribution(transition):
+    """Solves for the stationary distribution of a Markov chain.
+
+    Args:
+        transition (np.ndarray): The transition matrix, each row summing to 1.
+
+    Returns:
+        np.ndarray: The stationary distribution.
+    """
+
+    # solve pi (P - I) = 0 with the last equation replaced by sum(pi) = 1
+    n = len(transition)
+    a = transition.T - np.eye(n)
+    a[-1] = 1
+    b = np.zeros(n)
+    b[-1] = 1
+    stationary = np.maximum(np.linalg.solve(a, b), 0)
+    return stationary / stationary.sum()
+
+
+class LandingCountGame(Monopoly.Game):
+    """A Game that counts the tiles its players land on.
+
+    Attributes:
+        landings (list): The number of landings on each tile.
+    """
+
+    def __init__(self, player_count=None, rng=None, config=None):
+        super().__init__(player_count, rng, config)
+        self.landings = [0] * len(self.board)
+        self.tile_handlers = tuple(self.counting(handler) for handler in self.tile_handlers)
+
+    def counting(self, handler):
+        """Wraps a tile handler so it counts the landings it handles.
+
+        Args:
+            handler (function): The tile handler to wrap.
+
+        Returns:
+            function: The wrapped handler.
+        """
+
+        def count_landing(new_tile):
+            self.landings[new_tile.tile_index] += 1
+            handler(new_tile)
+
+        return count_landing
+
+
+def cross_check(n_games=2000, config=None, seed=None, chain=None):
+    """Compares the landing frequencies of simulated games against the chain.
+
+    Every player starts on GO rather than in the steady state, so the GO passes
+    per landing of short games run slightly below the chain's rate.
+
+    Args:
+        n_games (int): The number of games to simulate.
+        config (Monopoly.GameConfig): The settings of the simulated games.
+        seed (int): The seed for the simulated games.
+        chain (MarkovChain): The chain to compare against, built if None.
+
+    Returns:
+        dict: The empirical and analytic landing distributions, their total
+            variation distance and largest difference, and the GO passes per landing.
+    """
+
+    chain = chain if chain is not None else MarkovChain()
+    landings = np.zeros(chain.tile_count)
+    go_passes = 0
+
+    for game_seed in np.random.SeedSequence(seed).spawn(n_games):
+        game = LandingCountGame(rng=Monopoly.RandomStream(game_seed), config=config)
+        game.play()
+        landings += game.landings
+        go_passes += game.trip_around_board + 1
+
+    empirical = landings / landings.sum()
+    analytic = chain.landing_probabilities / chain.landing_probabilities.sum()
+    return {
+        "empirical": empirical,
+        "analytic": analytic,
+        "total_variation": 0.5 * float(np.abs(empirical - analytic).sum()),
+        "max_difference": float(np.abs(empirical - analytic).max()),
+        "empirical_go_rate": go_passes / landings.sum(),
+        "analytic_go_rate": chain.go_rate / chain.landing_probabilities.sum(),
+    }
@@ -0,0 +1,310 @@
+import argparse
+import hashlib
+import json
+import os
+from dataclasses import asdict
+
+import numpy as np
+
+import Monopoly
+from results import METADATA_FILE, load_stats
+from stats import SimulationStats
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Report generation. Renders the win rates, game lengths and loops until every
+property was bought, with a summary table, from the aggregated summary of a run
+rather than its per-game results, so a report takes the same time however many
+games were played. Every file of the report is only rendered again when the
+numbers it shows have changed.
+
+    python Monopoly.py --games 100000 --output runs/base
+    python report.py runs/base --output reports/base
+"""
+
+# bump whenever the rendering changes, so every report is rendered again
+REPORT_VERSION = 1
+
+# the hash of the inputs each file of a report was rendered from, by file name
+MANIFEST_FILE = "manifest.json"
+
+
+def pyplot():
+    """Imports matplotlib for rendering to files.
+
+    matplotlib is only imported here, so simulating and unchanged reports never pay for it.
+
+    Returns:
+        module: matplotlib.pyplot, on the Agg backend.
+    """
+
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    return plt
+
+
+def histogram_inputs(histogram, stats, label):
+    """Describes a histogram for plotting, without its empty trailing bins.
+
+    Args:
+        histogram (stats.Histogram): The histogram to plot.
+        stats (stats.RunningStats): The running stats of the same values.
+        label (str): The name of the values.
+
+    Returns:
+        dict: The label, the edges and counts of the bins, the values past the
+            last bin, and the mean of the values.
+    """
+
+    filled = np.flatnonzero(histogram.counts)
+    end = filled[-1] + 1 if len(filled) else 0
+    return {
+        "label": label,
+        "edges": histogram.edges[:end + 1].tolist(),
+        "counts": histogram.counts[:end].tolist(),
+        "overflow": histogram.overflow,
+        "mean": stats.mean,
+    }
+
+
+def report_inputs(stats, config=None):
+    """Collects the numbers shown by each file of a report.
+
+    Args:
+        stats (SimulationStats): The summary of the run.
+        config (Monopoly.GameConfig): The settings of the games, for the titles.
+
+    Returns:
+        dict: The inputs of each file, by file name.
+    """
+
+    house_rules = config is not None and config.house_rules
+    title = "with House Rules" if house_rules else "without House Rules"
+    summary = stats.snapshot()
+
+    return {
+        "win_rates.png": {
+            "title": "Player win rate " + title,
+            "win_rates": summary["win_rates"],
+            "intervals": summary["win_rate_intervals"],
+            "games": stats.games,
+        },
+        "turns.png": dict(histogram_inputs(stats.turn_histogram, stats.turns, "Turns"),
+                          title="Game length " + title),
+        "loops.png": dict(histogram_inputs(stats.loop_histogram, stats.loops, "Loops"),
+                          title="Loops around the board until every property was bought " + title),
+        "summary.md": {"config": None if config is None else asdict(config), "summary": summary},
+    }
+
+
+def plot_win_rates(inputs, path):
+    """Plots the win rate of each player, with its 95% interval.
+
+    Args:
+        inputs (dict): The "win_rates.png" inputs from report_inputs.
+        path (str): The file to save the figure to.
+    """
+
+    plt = pyplot()
+    rates = np.array(inputs["win_rates"])
+    intervals = np.array(inputs["intervals"]).reshape(-1, 2)
+    players = np.arange(1, len(rates) + 1)
+
+    figure, axes = plt.subplots()
+    axes.bar(players, rates, yerr=[rates - intervals[:, 0], intervals[:, 1] - rates], capsize=4)
+    axes.set_xticks(players)
+    axes.set_xlabel("Player")
+    axes.set_ylabel("Win rate over {} games".format(inputs["games"]))
+    axes.set_title(inputs["title"])
+    figure.savefig(path)
+    plt.close(figure)
+
+
+def plot_histogram(inputs, path):
+    """Plots a histogram of the games, marking the mean.
+
+    Args:
+        inputs (dict): The "turns.png" or "loops.png" inputs from report_inputs.
+        path (str): The file to save the figure to.
+    """
+
+    plt = pyplot()
+    figure, axes = plt.subplots()
+    if inputs["counts"]:
+        axes.stairs(inputs["counts"], inputs["edges"], fill=True)
+    axes.axvline(inputs["mean"], color="black", linestyle="--", label="mean {:.2f}".format(inputs["mean"]))
+    axes.set_xlabel(inputs["label"] + (" ({} games past the last bin)".format(inputs["overflow"])
+                                       if inputs["overflow"] else ""))
+    axes.set_ylabel("Games")
+    axes.set_title(inputs["title"], fontsize="medium")
+    axes.legend()
+    figure.savefig(path)
+    plt.close(figure)
+
+
+def write_summary(inputs, path):
+    """Writes the summary table of a run as Markdown.
+
+    Args:
+        inputs (dict): The "summary.md" inputs from report_inputs.
+        path (str): The file to write the table to.
+    """
+
+    summary = inputs["summary"]
+    lines = ["# Monopoly simulation report", ""]
+    if inputs["config"] is not None:
+        lines += ["| Setting | Value |", "| --- | --- |"]
+        lines += ["| {} | {} |".format(name, value) for name, value in inputs["config"].items()]
+        lines.append("")
+
+    lines += ["| Measure | Mean | 95% CI | Median | 95th percentile | Max |", "| --- | --- | --- | --- | --- | --- |"]
+    for name in ("turns", "loops"):
+        values = summary[name]
+        lines.append("| {} | {:.2f} | {:.2f} - {:.2f} | {:.0f} | {:.0f} | {:.0f} |".format(
+            name, values["mean"], *values["interval"], values["quantiles"]["0.5"], values["quantiles"]["0.95"],
+            values["max"]))
+
+    lines += ["", "| Player | Wins | Win rate | 95% CI |", "| --- | --- | --- | --- |"]
+    for player, (wins, rate, (low, high)) in enumerate(zip(summary["wins"], summary["win_rates"],
+                                                           summary["win_rate_intervals"])):
+        lines.append("| {} | {} | {:.4f} | {:.4f} - {:.4f} |".format(player + 1, wins, rate, low, high))
+
+    lines += ["", "{} games, ended by {}.".format(summary["games"], ", ".join(
+        "{} {}".format(reason.replace("_", " "), count) for reason, count in summary["end_reasons"].items()))]
+    with open(path, "w") as file:
+        file.write("\n".join(lines) + "\n")
+
+
+# renders each file of a report from its inputs
+RENDERERS = {
+    "win_rates.png": plot_win_rates,
+    "turns.png": plot_histogram,
+    "loops.png": plot_histogram,
+    "summary.md": write_summary,
+}
+
+
+def rounded(value, digits=9):
+    """Rounds every float in a set of inputs to a number of significant digits.
+
+    Summaries of the same games added in different chunks can differ in their
+    last bits, which would otherwise change the inputs of a figure that looks
+    the same.
+
+    Args:
+        value (float | dict | list): The inputs, or a float, dict or list within them.
+        digits (int): The significant digits kept.
+
+    Returns:
+        float | dict | list: The inputs with their floats rounded.
+    """
+
+    if isinstance(value, float):
+        return float("{:.{}g}".format(value, digits))
+    if isinstance(value, dict):
+        return {key: rounded(item, digits) for key, item in value.items()}
+    if isinstance(value, list):
+        return [rounded(item, digits) for item in value]
+    return value
+
+
+def inputs_hash(name, inputs):
+    """Hashes the inputs of a file of a report.
+
+    Args:
+        name (str): The file name.
+        inputs (dict): The inputs of the file.
+
+    Returns:
+        str: The hex digest of the inputs.
+    """
+
+    description = {"version": REPORT_VERSION, "name": name, "inputs": inputs}
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def render_report(stats, path, config=None, force=False):
+    """Renders the files of a report whose inputs have changed since they were last rendered.
+
+    Args:
+        stats (SimulationStats): The summary of the run.
+        path (str): The directory of the report.
+        config (Monopoly.GameConfig): The settings of the games, for the titles and table.
+        force (bool): Whether to render every file again.
+
+    Returns:
+        list: The names of the files rendered, the others were up to date.
+    """
+
+    os.makedirs(path, exist_ok=True)
+    manifest_path = os.path.join(path, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path) and not force:
+        with open(manifest_path) as file:
+            manifest = json.load(file)
+
+    # the inputs are hashed as JSON, so the quantiles are keyed by strings and the intervals are lists
+    inputs = rounded(json.loads(json.dumps(report_inputs(stats, config))))
+
+    rendered = []
+    for name, file_inputs in inputs.items():
+        digest = inputs_hash(name, file_inputs)
+        if manifest.get(name) == digest and os.path.exists(os.path.join(path, name)):
+            continue
+
+        RENDERERS[name](file_inputs, os.path.join(path, name))
+        manifest[name] = digest
+        rendered.append(name)
+
+    if rendered:
+        with open(manifest_path, "w") as file:
+            json.dump(manifest, file, indent=2)
+
+    return rendered
+
+
+def load_summary(path):
+    """Reads the summary of a run back from a results store or a saved summary.
+
+    Args:
+        path (str): The directory of a results store, or a JSON file holding a SimulationStats.state().
+
+    Returns:
+        tuple: The SimulationStats of the run, and its Monopoly.GameConfig, None if it isn't known.
+    """
+
+    if os.path.isdir(path):
+        with open(os.path.join(path, METADATA_FILE)) as file:
+            config = Monopoly.GameConfig(**json.load(file)["config"])
+        return load_stats(path), config
+
+    with open(path) as file:
+        state = json.load(file)
+    stats = SimulationStats(state["player_count"])
+    stats.restore(state)
+    return stats, None
+
+
+def main(argv=None):
+    """Renders the report of a stored run from the command line.
+
+    Args:
+        argv (list): The arguments, sys.argv[1:] if None.
+    """
+
+    parser = argparse.ArgumentParser(description="Renders the figures and summary table of a Monopoly run.")
+    parser.add_argument("run", help="the results store of the run, or a saved summary of it")
+    parser.add_argument("-o", "--output", required=True, help="the directory to write the report to")
+    parser.add_argument("--force", action="store_true", help="render every file, even those that are up to date")
+    args = parser.parse_args(argv)
+
+    stats, config = load_summary(args.run)
+    rendered = render_report(stats, args.output, config, args.force)
+    print("Rendered", ", ".join(rendered) if rendered else "nothing, the report is up to date")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,273 @@
+import json
+import os
+from dataclasses import asdict
+
+import numpy as np
+
+import Monopoly
+from board import load_board
+from runner import RESULT_NAMES
+from stats import SimulationStats
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Columnar store of the per-game results of a run. Each result is written to its
+own .npy file in the smallest dtype that fits it, with the run's metadata
+alongside, and read back memory-mapped so analysis never has to re-simulate.
+The summary of the run is saved next to the columns, so reports don't have to
+read them at all.
+"""
+
+METADATA_FILE = "metadata.json"
+STATS_FILE = "stats.json"
+
+# the dtypes a column can be narrowed to, smallest first
+COMPACT_DTYPES = (np.uint8, np.int8, np.uint16, np.int16, np.uint32, np.int32, np.int64)
+
+
+def compact_dtype(minimum, maximum):
+    """Finds the smallest dtype that holds every value in a range.
+
+    Args:
+        minimum (int): The smallest value.
+        maximum (int): The largest value.
+
+    Returns:
+        np.dtype: The smallest dtype that fits.
+    """
+
+    for dtype in COMPACT_DTYPES:
+        info = np.iinfo(dtype)
+        if info.min <= minimum and maximum <= info.max:
+            return np.dtype(dtype)
+
+    raise ValueError("values don't fit in 64 bits")
+
+
+class ResultWriter:
+    """Writes the per-game results of a run to a columnar store, chunk by chunk.
+
+    Chunks are appended to a raw scratch file per column, so memory use stays
+    constant however many games are run. Closing the writer narrows each column
+    to its compact dtype, streams it into a .npy file and writes the metadata.
+
+    Attributes:
+        path (str): The directory of the store.
+        metadata (dict): The metadata written alongside the results.
+        games (int): The number of games written so far.
+        shapes (dict): The shape of one game's entry in each column.
+        ranges (dict): The smallest and largest value seen in each column.
+    """
+
+    def __init__(self, path, metadata=None):
+        self.path = path
+        self.metadata = dict(metadata or {})
+        self.games = 0
+        self.shapes = {}
+        self.ranges = {}
+        self.scratch = {}
+        os.makedirs(path, exist_ok=True)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is None:
+            self.close()
+        else:
+            self.discard()
+
+    def scratch_path(self, name):
+        """Finds the scratch file of a column.
+
+        Args:
+            name (str): The name of the column.
+
+        Returns:
+            str: The path of the column's scratch file.
+        """
+
+        return os.path.join(self.path, name + ".tmp")
+
+    def add(self, results):
+        """Appends the results of a chunk of games.
+
+        Args:
+            results (dict): The RESULT_NAMES arrays of the games.
+        """
+
+        for name in RESULT_NAMES:
+            values = np.ascontiguousarray(results[name], dtype=np.int64)
+            if name not in self.scratch:
+                self.shapes[name] = values.shape[1:]
+                self.ranges[name] = [np.iinfo(np.int64).max, np.iinfo(np.int64).min]
+                self.scratch[name] = open(self.scratch_path(name), "wb")
+
+            if len(values):
+                self.ranges[name][0] = min(self.ranges[name][0], int(values.min()))
+                self.ranges[name][1] = max(self.ranges[name][1], int(values.max()))
+            self.scratch[name].write(values.tobytes())
+
+        self.games += len(results[RESULT_NAMES[0]])
+
+    def close(self, block_size=1 << 20):
+        """Writes the compact columns and the metadata, then removes the scratch files.
+
+        Args:
+            block_size (int): The number of games copied into a column at a time.
+        """
+
+        columns = {}
+        for name, file in self.scratch.items():
+            file.close()
+            minimum, maximum = self.ranges[name] if self.games else (0, 0)
+            dtype = compact_dtype(minimum, maximum)
+            shape = (self.games,) + self.shapes[name]
+
+            raw = np.memmap(self.scratch_path(name), dtype=np.int64, mode="r", shape=shape) if self.games else None
+            column = np.lib.format.open_memmap(os.path.join(self.path, name + ".npy"), mode="w+", dtype=dtype,
+                                               shape=shape)
+            for start in range(0, self.games, block_size):
+                column[start:start + block_size] = raw[start:start + block_size]
+            column.flush()
+            del raw, column
+
+            os.remove(self.scratch_path(name))
+            columns[name] = {"dtype": dtype.name, "shape": list(shape)}
+
+        self.scratch = {}
+        metadata = dict(self.metadata, games=self.games, columns=columns, engine_version=Monopoly.ENGINE_VERSION)
+
+        # written last and renamed into place, so a store with metadata is always complete
+        temporary = os.path.join(self.path, METADATA_FILE + ".tmp")
+        with open(temporary, "w") as file:
+            json.dump(metadata, file, indent=2)
+        os.replace(temporary, os.path.join(self.path, METADATA_FILE))
+
+    def discard(self):
+        """Removes the scratch files of an unfinished run."""
+
+        for name, file in self.scratch.items():
+            file.close()
+            os.remove(self.scratch_path(name))
+        self.scratch = {}
+
+
+def run_metadata(config, seed, engine="game", block_size=None, **extra):
+    """Describes a run, so its results can be reproduced from the store.
+
+    Args:
+        config (Monopoly.GameConfig): The settings of the games.
+        seed (int): The seed of the run.
+        engine (str): The engine the games were played with.
+        block_size (int): The number of games per block.
+        **extra: Any other details to record.
+
+    Returns:
+        dict: The metadata of the run.
+    """
+
+    return dict({"config": asdict(config), "seed": seed, "engine": engine, "block_size": block_size,
+                 "board": load_board(config.board).digest}, **extra)
+
+
+def load_results(path):
+    """Reads a store back, memory-mapping every column.
+
+    Args:
+        path (str): The directory of the store.
+
+    Returns:
+        tuple: The RESULT_NAMES arrays of the run, read-only and memory-mapped,
+            and the metadata of the run.
+    """
+
+    with open(os.path.join(path, METADATA_FILE)) as file:
+        metadata = json.load(file)
+
+    arrays = {name: np.load(os.path.join(path, name + ".npy"), mmap_mode="r") for name in metadata["columns"]}
+    return arrays, metadata
+
+
+def save_stats(path, stats):
+    """Saves the summary of a store's games next to its columns.
+
+    Args:
+        path (str): The directory of the store.
+        stats (SimulationStats): The summary of every game in the store.
+    """
+
+    # renamed into place, so a reader never sees half a summary
+    temporary = os.path.join(path, STATS_FILE + ".tmp")
+    with open(temporary, "w") as file:
+        json.dump(stats.state(), file)
+    os.replace(temporary, os.path.join(path, STATS_FILE))
+
+
+def load_stats(path, block_size=1 << 20):
+    """Summarises a store without loading it all into memory.
+
+    The saved summary is read if it covers every game in the store, otherwise
+    the columns are summarised block by block and the summary is saved for
+    next time.
+
+    Args:
+        path (str): The directory of the store.
+        block_size (int): The number of games read at a time.
+
+    Returns:
+        SimulationStats: The summary of the stored games.
+    """
+
+    with open(os.path.join(path, METADATA_FILE)) as file:
+        metadata = json.load(file)
+    stats = SimulationStats(metadata["config"]["player_count"])
+
+    if os.path.exists(os.path.join(path, STATS_FILE)):
+        with open(os.path.join(path, STATS_FILE)) as file:
+            state = json.load(file)
+        if state["games"] == metadata["games"]:
+            stats.restore(state)
+            return stats
+
+    arrays = load_results(path)[0]
+    for start in range(0, metadata["games"], block_size):
+        stats.add({name: np.asarray(array[start:start + block_size]) for name, array in arrays.items()})
+
+    save_stats(path, stats)
+    return stats
+
+
+def export_parquet(path, parquet_path):
+    """Copies a store into a single Parquet file, with the metadata in its schema.
+
+    Per-player columns are split into one column per player, e.g. "money_0".
+    Needs pyarrow to be installed.
+
+    Args:
+        path (str): The directory of the store.
+        parquet_path (str): The path of the Parquet file to write.
+    """
+
+    if pyarrow is None:
+        raise ImportError("exporting to Parquet needs pyarrow")
+
+    arrays, metadata = load_results(path)
+    columns = {}
+    for name, array in arrays.items():
+        if array.ndim == 1:
+            columns[name] = np.asarray(array)
+        else:
+            for player in range(array.shape[1]):
+                columns[name + "_" + str(player)] = np.asarray(array[:, player])
+
+    table = pyarrow.table(columns).replace_schema_metadata({"monopoly": json.dumps(metadata)})
+    pyarrow.parquet.write_table(table, parquet_path)
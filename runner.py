@@ -0,0 +1,584 @@
+import json
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from dataclasses import asdict
+
+import numpy as np
+
+import Monopoly
+import batch
+from board import load_board
+from stats import SimulationStats
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Parallel Monte Carlo runner. Splits the games of a run into blocks, each with
+its own reproducible random stream, and hands them out to a process pool in
+chunks sized to keep every worker busy. Long runs can checkpoint their
+aggregate as they go and resume from it after being interrupted.
+"""
+
+
+def _simulate_block(n_games, config, seed_seq, strategies=None):
+    """Plays a block of games.
+
+    Every game gets its own RandomStream, spawned from the block's
+    SeedSequence, so any single game can be replayed from its seed.
+
+    Args:
+        n_games (int): The number of games to play.
+        config (Monopoly.GameConfig): The settings of the games.
+        seed_seq (np.random.SeedSequence): The seed sequence for this block.
+        strategies (list): The strategy of each seat, the default strategy for every seat if None.
+
+    Returns:
+        tuple: Arrays of the turns, loops, winner, final money, bankruptcy turns and end reason of each game.
+    """
+
+    turns = np.empty(n_games, dtype=np.int32)
+    loops = np.empty(n_games, dtype=np.int16)
+    winners = np.empty(n_games, dtype=np.uint8)
+    money = np.empty((n_games, config.player_count), dtype=np.int32)
+    bankrupt_turns = np.empty((n_games, config.player_count), dtype=np.int32)
+    end_reasons = np.empty(n_games, dtype=np.uint8)
+
+    for i, game_seed in enumerate(seed_seq.spawn(n_games)):
+        game = Monopoly.Game(rng=Monopoly.RandomStream(game_seed), config=config, strategies=strategies)
+        turns[i], loops[i], winners[i] = game.play()
+        money[i] = [player.money for player in game.players]
+        bankrupt_turns[i] = [player.bankrupt_turn for player in game.players]
+        end_reasons[i] = game.end_reason
+
+    return turns, loops, winners, money, bankrupt_turns, end_reasons
+
+
+def _simulate_block_batch(n_games, config, seed_seq, strategies=None):
+    """Plays a block of games with the batch engine.
+
+    Args:
+        n_games (int): The number of games to play.
+        config (Monopoly.GameConfig): The settings of the games.
+        seed_seq (np.random.SeedSequence): The seed sequence for this block.
+        strategies (list): The strategy of each seat, all vectorized, the default strategy for every seat if None.
+
+    Returns:
+        tuple: Arrays of the turns, loops, winner, final money, bankruptcy turns and end reason of each game.
+    """
+
+    return batch.GameBatch(n_games, config, rng=seed_seq, strategies=strategies).play()
+
+
+# the per-game outputs of a run, in the order the workers return them
+RESULT_NAMES = ("turns", "loops", "winners", "money", "bankrupt_turn", "end_reason")
+
+ENGINES = {
+    "game": _simulate_block,
+    "batch": _simulate_block_batch,
+}
+
+# the number of games seeded together, the results of a run depend only on its seed and block size
+BLOCK_SIZE = 1000
+
+# the seconds of work each chunk handed to a worker is sized to take
+TARGET_CHUNK_SECONDS = 0.5
+
+
+def block_seed(root, index):
+    """Derives the seed of a block of games from the seed of the run.
+
+    Equivalent to the index-th child of root.spawn(), without having to spawn
+    every earlier child first.
+
+    Args:
+        root (np.random.SeedSequence): The seed sequence of the run.
+        index (int): The index of the block.
+
+    Returns:
+        np.random.SeedSequence: The seed sequence of the block.
+    """
+
+    return np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (index,), pool_size=root.pool_size)
+
+
+def _simulate_chunk(engine, blocks):
+    """Plays a chunk of consecutive blocks inside a worker process.
+
+    Args:
+        engine (str | function): The name of the engine to play the games with, or the function playing a block.
+        blocks (list): The arguments of each block, the game count first.
+
+    Returns:
+        tuple: The id of the worker process, the seconds it spent playing,
+            and the results of each block.
+    """
+
+    start = time.perf_counter()
+    play = ENGINES[engine] if isinstance(engine, str) else engine
+    results = [play(*block) for block in blocks]
+    return os.getpid(), time.perf_counter() - start, results
+
+
+class WorkerUsage:
+    """Holds how busy each worker process was during a run.
+
+    Attributes:
+        busy (dict): The seconds each worker, keyed by process id, spent playing games.
+        games (dict): The games each worker played.
+        chunks (int): The number of chunks handed out.
+        workers (int): The number of worker processes in the pool.
+        seconds (float): The wall-clock seconds of the run.
+    """
+
+    def __init__(self):
+        self.busy = {}
+        self.games = {}
+        self.chunks = 0
+        self.workers = 0
+        self.seconds = 0.0
+
+    def add(self, worker, seconds, games):
+        """Records a chunk finished by a worker.
+
+        Args:
+            worker (int): The process id of the worker.
+            seconds (float): The seconds the worker spent on the chunk.
+            games (int): The games in the chunk.
+        """
+
+        self.busy[worker] = self.busy.get(worker, 0.0) + seconds
+        self.games[worker] = self.games.get(worker, 0) + games
+        self.chunks += 1
+
+    @property
+    def utilization(self):
+        """dict: The fraction of the run each worker spent playing games."""
+
+        return {worker: busy / self.seconds if self.seconds else 0.0 for worker, busy in self.busy.items()}
+
+    @property
+    def total_utilization(self):
+        """float: The fraction of the pool's capacity spent playing games."""
+
+        capacity = self.seconds * self.workers
+        return sum(self.busy.values()) / capacity if capacity else 0.0
+
+    def summary(self):
+        """Summarises the usage of the pool.
+
+        Returns:
+            dict: The pool size, the chunks handed out, the wall-clock seconds,
+                and the overall and per-worker utilization.
+        """
+
+        return {
+            "workers": self.workers,
+            "chunks": self.chunks,
+            "seconds": self.seconds,
+            "utilization": self.total_utilization,
+            "worker_utilization": list(self.utilization.values()),
+        }
+
+
+def run_blocks(count, block, workers=None, engine="game", ordered=True, usage=None,
+               target_seconds=TARGET_CHUNK_SECONDS, deadline=None):
+    """Plays blocks of games across a pool of worker processes, handing out chunks as workers free up.
+
+    Idle workers take the next chunk from the pool's queue, so a worker that
+    drew long games never holds up the others. Each chunk is sized from the
+    seconds per game observed so far to take about target_seconds, starting
+    from a single block, and chunks shrink again towards the end of the run so
+    every worker finishes at about the same time.
+
+    Work other than plain runs, such as instrumented or paired games, is
+    played by passing the module-level function that plays one of its blocks
+    as the engine, its results are yielded as the function returns them.
+
+    Once the deadline has passed no chunk is started, the chunks still
+    running are abandoned and the blocks yielded so far are all there is.
+    Chunks are sized to end by the deadline, so a pool overshoots it by at
+    most the time to collect a result, a single worker by at most one block.
+
+    Args:
+        count (int): The number of blocks.
+        block (function): Gives the arguments of the block with a given index, the game count first,
+            for a named engine the game count, config and seed sequence.
+        workers (int): The number of worker processes, defaults to the CPU count.
+        engine (str | function): "game" to play each Game in turn, "batch" for the vectorized GameBatch
+            engine, or a function playing a block from its arguments.
+        ordered (bool): Whether to yield the blocks in order, or as soon as they complete.
+        usage (WorkerUsage): Records how busy each worker was, if given.
+        target_seconds (float): The seconds of work each chunk is sized to take.
+        deadline (float): The time.perf_counter() at which to stop, no limit if None.
+
+    Yields:
+        tuple: The index of each block and its RESULT_NAMES arrays, or what the engine function returned.
+    """
+
+    if workers is None:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, count))
+    if usage is not None:
+        usage.workers = workers
+    label = block_results if isinstance(engine, str) else (lambda results: results)
+    start = time.perf_counter()
+
+    # a single worker doesn't need a pool, run the blocks in this process
+    if workers == 1:
+        for index in range(count):
+            if deadline is not None and time.perf_counter() >= deadline:
+                return
+            arguments = block(index)
+            worker, seconds, (results,) = _simulate_chunk(engine, [arguments])
+            if usage is not None:
+                usage.add(worker, seconds, arguments[0])
+                usage.seconds = time.perf_counter() - start
+            yield index, label(results)
+        return
+
+    # chunks that haven't started are cancelled if the caller stops early,
+    # and the running ones are left to finish without being waited for
+    executor = ProcessPoolExecutor(max_workers=workers)
+    try:
+        pending = {}
+        finished = {}
+        next_block = 0
+        next_yield = 0
+        busy_seconds = 0.0
+        games_played = 0
+
+        while next_yield < count:
+            # keep two chunks per worker queued, and no more than four per worker waiting to be yielded
+            while (next_block < count and len(pending) < 2 * workers
+                   and (not ordered or len(pending) + len(finished) < 4 * workers)
+                   and (deadline is None or time.perf_counter() < deadline)):
+                remaining = count - next_block
+                chunk = [block(next_block)]
+                size = 1
+                if games_played:
+                    block_seconds = busy_seconds / games_played * chunk[0][0]
+                    size = int(target_seconds / block_seconds) if block_seconds else remaining
+                    if deadline is not None and block_seconds:
+                        size = min(size, int((deadline - time.perf_counter()) / block_seconds))
+                size = max(1, min(size, -(-remaining // (2 * workers))))
+
+                chunk += [block(index) for index in range(next_block + 1, next_block + size)]
+                games = sum(arguments[0] for arguments in chunk)
+                pending[executor.submit(_simulate_chunk, engine, chunk)] = next_block, games
+                next_block += size
+
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            done, _ = wait(pending, timeout, return_when=FIRST_COMPLETED)
+            if not done:
+                return
+            for future in done:
+                first, games = pending.pop(future)
+                worker, seconds, results = future.result()
+                busy_seconds += seconds
+                games_played += games
+                if usage is not None:
+                    usage.add(worker, seconds, games)
+                for index, arrays in enumerate(results, first):
+                    finished[index] = label(arrays)
+
+            if ordered:
+                while next_yield in finished:
+                    yield next_yield, finished.pop(next_yield)
+                    next_yield += 1
+            else:
+                for index in list(finished):
+                    yield index, finished.pop(index)
+                    next_yield += 1
+
+            if usage is not None:
+                usage.seconds = time.perf_counter() - start
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        if usage is not None:
+            usage.seconds = time.perf_counter() - start
+
+
+def iter_simulations(n_games, config=None, workers=None, seed=None, engine="game", block_size=BLOCK_SIZE,
+                     usage=None, deadline=None):
+    """Plays n_games games of Monopoly, yielding the results block by block.
+
+    The games are split into blocks of block_size games, and block i is seeded
+    with the i-th child of np.random.SeedSequence(seed). The blocks are played
+    across a pool of worker processes by run_blocks and yielded in order, so the
+    results are bit-identical for a given seed and block size, whatever the
+    number of workers.
+
+    Args:
+        n_games (int): The number of games to play.
+        config (Monopoly.GameConfig): The settings of the games, the defaults if None.
+        workers (int): The number of worker processes, defaults to the CPU count.
+        seed (int): The seed for the run, a fresh one is drawn if None.
+        engine (str): "game" to play each Game in turn, or "batch" for the vectorized GameBatch engine.
+        block_size (int): The number of games per block.
+        usage (WorkerUsage): Records how busy each worker was, if given.
+        deadline (float): The time.perf_counter() at which to stop, see run_blocks.
+
+    Yields:
+        dict: The RESULT_NAMES arrays of each block of games.
+    """
+
+    root = np.random.SeedSequence(seed)
+    config = config if config is not None else Monopoly.GameConfig()
+
+    def block(index):
+        return min(block_size, n_games - index * block_size), config, block_seed(root, index)
+
+    for _, results in run_blocks(-(-n_games // block_size), block, workers, engine, usage=usage,
+                                 deadline=deadline):
+        yield results
+
+
+def block_results(block):
+    """Labels the arrays returned by a worker.
+
+    Args:
+        block (tuple): The arrays of a block, in the order of RESULT_NAMES.
+
+    Returns:
+        dict: The RESULT_NAMES arrays of the block.
+    """
+
+    return dict(zip(RESULT_NAMES, block))
+
+
+def run_simulations(n_games, config=None, workers=None, seed=None, engine="game", block_size=BLOCK_SIZE):
+    """Plays n_games games of Monopoly across a pool of worker processes.
+
+    The results are bit-identical for a given seed and block size, whatever
+    the number of workers.
+
+    Args:
+        n_games (int): The number of games to play.
+        config (Monopoly.GameConfig): The settings of the games, the defaults if None.
+        workers (int): The number of worker processes, defaults to the CPU count.
+        seed (int): The seed for the run, a fresh one is drawn if None.
+        engine (str): "game" to play each Game in turn, or "batch" for the vectorized GameBatch engine.
+        block_size (int): The number of games per block.
+
+    Returns:
+        dict: The RESULT_NAMES arrays, one entry per game.
+    """
+
+    blocks = list(iter_simulations(n_games, config, workers, seed, engine, block_size))
+    return {name: np.concatenate([block[name] for block in blocks]) for name in RESULT_NAMES}
+
+
+# the seconds between the checkpoints of a run
+CHECKPOINT_SECONDS = 60.0
+
+
+def save_checkpoint(path, checkpoint):
+    """Writes a checkpoint to disk.
+
+    Args:
+        path (str): The file to write the checkpoint to.
+        checkpoint (dict): The checkpoint, plain values only.
+    """
+
+    # renamed into place, so a run killed mid-write still has its previous checkpoint
+    temporary = path + ".tmp"
+    with open(temporary, "w") as file:
+        json.dump(checkpoint, file)
+    os.replace(temporary, path)
+
+
+def run_checkpointed(n_games, checkpoint_path, config=None, workers=None, seed=None, engine="game",
+                     block_size=BLOCK_SIZE, interval=CHECKPOINT_SECONDS, progress=None, usage=None):
+    """Plays n_games games like iter_simulations, checkpointing the aggregate so an interrupted run can resume.
+
+    Every interval seconds, and once the run is done, the checkpoint is
+    written with the settings and seed of the run, the number of blocks
+    aggregated so far and the SimulationStats of those blocks. Blocks are
+    aggregated in order, so the blocks done are always the first ones, and
+    each block is seeded from the seed of the run and its index, so no
+    generator state has to be saved. Calling again with the same checkpoint
+    picks up at the first block that wasn't aggregated, and gives stats
+    identical to a run that was never interrupted.
+
+    Args:
+        n_games (int): The number of games to play.
+        checkpoint_path (str): The file of the checkpoint, resumed from if it exists.
+        config (Monopoly.GameConfig): The settings of the games, the defaults if None.
+        workers (int): The number of worker processes, defaults to the CPU count.
+        seed (int): The seed for a new run, a fresh one is drawn if None. A resumed run keeps its seed.
+        engine (str): "game" to play each Game in turn, or "batch" for the vectorized GameBatch engine.
+        block_size (int): The number of games per block.
+        interval (float): The seconds between checkpoints.
+        progress (function): Called with the SimulationStats after every block.
+        usage (WorkerUsage): Records how busy each worker was, if given.
+
+    Returns:
+        SimulationStats: The summary of all n_games games.
+    """
+
+    config = config if config is not None else Monopoly.GameConfig()
+    settings = {
+        "config": asdict(config),
+        "n_games": n_games,
+        "engine": engine,
+        "block_size": block_size,
+        "engine_version": Monopoly.ENGINE_VERSION,
+        "board": load_board(config.board).digest,
+    }
+    stats = SimulationStats(config.player_count)
+    blocks_done = 0
+
+    if os.path.exists(checkpoint_path):
+        with open(checkpoint_path) as file:
+            checkpoint = json.load(file)
+        changed = [name for name, value in settings.items() if checkpoint[name] != value]
+        if seed is not None and seed != checkpoint["seed"]:
+            changed.append("seed")
+        if changed:
+            raise ValueError("the checkpoint {} is of a run with a different {}".format(checkpoint_path,
+                                                                                       ", ".join(changed)))
+        seed = checkpoint["seed"]
+        blocks_done = checkpoint["blocks_done"]
+        stats.restore(checkpoint["stats"])
+
+    elif seed is None:
+        seed = np.random.SeedSequence().entropy
+
+    root = np.random.SeedSequence(seed)
+    block_count = -(-n_games // block_size)
+    first_block = blocks_done
+
+    def checkpoint():
+        save_checkpoint(checkpoint_path, dict(settings, seed=seed, blocks_done=blocks_done, stats=stats.state()))
+
+    def block(index):
+        index += first_block
+        return min(block_size, n_games - index * block_size), config, block_seed(root, index)
+
+    saved = time.perf_counter()
+    for _, results in run_blocks(block_count - blocks_done, block, workers, engine, usage=usage):
+        stats.add(results)
+        blocks_done += 1
+        if progress is not None:
+            progress(stats)
+
+        if time.perf_counter() - saved >= interval:
+            checkpoint()
+            saved = time.perf_counter()
+
+    checkpoint()
+    return stats
+
+
+def run_until_converged(config=None, win_rate_precision=0.002, turns_precision=None, max_games=10 ** 9,
+                        max_time=None, min_games=1000, workers=None, seed=None, engine="game",
+                        block_size=BLOCK_SIZE, progress=None, writer=None):
+    """Plays games in blocks until the estimates are precise enough.
+
+    Stops once the 95% confidence interval of every player's win rate is
+    within win_rate_precision of the estimate (and the mean turns within
+    turns_precision, if given), or once max_games games or max_time seconds
+    have been used. No block is started once max_time has passed, and the
+    blocks still running then are abandoned, so the run ends about on time.
+
+    Args:
+        config (Monopoly.GameConfig): The settings of the games, the defaults if None.
+        win_rate_precision (float): The target half-width of the win rate intervals, 0.002 for +-0.2 points.
+        turns_precision (float): The target half-width of the mean turns interval, ignored if None.
+        max_games (int): The most games to play.
+        max_time (float): The most seconds to run for, no limit if None.
+        min_games (int): The fewest games to play before checking the intervals.
+        workers (int): The number of worker processes, defaults to the CPU count.
+        seed (int): The seed for the run, a fresh one is drawn if None.
+        engine (str): "game" to play each Game in turn, or "batch" for the vectorized GameBatch engine.
+        block_size (int): The number of games per block.
+        progress (function): Called with the SimulationStats after every block.
+        writer (results.ResultWriter): Stores the per-game results of every block, if given.
+
+    Returns:
+        tuple: The SimulationStats of the games played, and a dict with the
+            number of games used, why the run stopped, the seconds taken,
+            the final interval half-widths and the usage of the workers.
+    """
+
+    config = config if config is not None else Monopoly.GameConfig()
+    start = time.perf_counter()
+    stats = SimulationStats(config.player_count)
+    stopped = "max_games"
+    deadline = start + max_time if max_time is not None else None
+
+    usage = WorkerUsage()
+    for results in iter_simulations(max_games, config, workers, seed, engine, block_size, usage, deadline):
+        stats.add(results)
+        if writer is not None:
+            writer.add(results)
+        if progress is not None:
+            progress(stats)
+
+        if stats.games >= min_games and converged(stats, win_rate_precision, turns_precision):
+            stopped = "converged"
+            break
+
+        if max_time is not None and time.perf_counter() - start >= max_time:
+            stopped = "max_time"
+            break
+    else:
+        # the blocks stopped before max_games were played, the deadline passed
+        if stats.games < max_games:
+            stopped = "max_time"
+
+    return stats, {
+        "games": stats.games,
+        "stopped": stopped,
+        "seconds": time.perf_counter() - start,
+        "win_rate_half_width": win_rate_half_width(stats),
+        "turns_half_width": turns_half_width(stats),
+        "usage": usage.summary(),
+    }
+
+
+def win_rate_half_width(stats):
+    """Finds the widest half-width of the players' win rate intervals.
+
+    Args:
+        stats (SimulationStats): The games played so far.
+
+    Returns:
+        float: The largest half-width.
+    """
+
+    return max((high - low) / 2 for low, high in stats.win_rate_intervals())
+
+
+def turns_half_width(stats):
+    """Finds the half-width of the mean turns interval.
+
+    Args:
+        stats (SimulationStats): The games played so far.
+
+    Returns:
+        float: The half-width.
+    """
+
+    low, high = stats.turns.confidence_interval()
+    return (high - low) / 2
+
+
+def converged(stats, win_rate_precision, turns_precision=None):
+    """Checks whether the estimates of a run are precise enough.
+
+    Args:
+        stats (SimulationStats): The games played so far.
+        win_rate_precision (float): The target half-width of the win rate intervals.
+        turns_precision (float): The target half-width of the mean turns interval, ignored if None.
+
+    Returns:
+        bool: Whether every interval is within its target.
+    """
+
+    if win_rate_half_width(stats) > win_rate_precision:
+        return False
+
+    return turns_precision is None or turns_half_width(stats) <= turns_precision
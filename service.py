@@ -0,0 +1,370 @@
+import asyncio
+import itertools
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field, fields
+from typing import Optional
+
+import numpy as np
+
+import Monopoly
+from runner import BLOCK_SIZE, ENGINES, block_results, block_seed, converged, turns_half_width
+from stats import SimulationStats
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Asyncio simulation service. Runs are submitted without blocking, played in
+blocks on a shared process pool, and stream their partial aggregates to any
+number of listeners until they finish or are cancelled.
+
+    async with SimulationService() as service:
+        client = LocalClient(service)
+        run_id = await client.submit({"player_count": 3, "n_games": 20000})
+        async for update in client.stream(run_id):
+            print(update["games"], update["mean_turns"])
+"""
+
+# the states of a run
+RUNNING = "running"
+DONE = "done"
+CONVERGED = "converged"
+CANCELLED = "cancelled"
+FAILED = "failed"
+
+
+@dataclass(frozen=True)
+class RunRequest:
+    """Holds the settings of a submitted run.
+
+    Attributes:
+        config (Monopoly.GameConfig): The settings of the games.
+        n_games (int): The most games to play.
+        seed (int): The seed of the run, a fresh one is drawn if None.
+        win_rate_precision (float): Stop early once the win rates are known to within this, if given.
+        min_games (int): The fewest games to play before checking the win rates.
+    """
+
+    config: Monopoly.GameConfig = field(default_factory=Monopoly.GameConfig)
+    n_games: int = 10000
+    seed: Optional[int] = None
+    win_rate_precision: Optional[float] = None
+    min_games: int = 1000
+
+
+def parse_request(values):
+    """Reads a run request from plain values, as a dashboard would send them.
+
+    Args:
+        values (dict): The RunRequest fields of the run, with the GameConfig
+            fields alongside them rather than nested in a config.
+
+    Returns:
+        RunRequest: The request.
+    """
+
+    names = {config_field.name for config_field in fields(Monopoly.GameConfig)}
+    config = Monopoly.GameConfig(**{name: value for name, value in values.items() if name in names})
+    return RunRequest(config, **{name: value for name, value in values.items() if name not in names})
+
+
+class Run:
+    """Holds the state of a run in the service.
+
+    Attributes:
+        id (int): The id of the run.
+        request (RunRequest): The settings of the run.
+        seed (int): The seed of the run, so it can be reproduced.
+        stats (SimulationStats): The aggregate of the games played so far.
+        status (str): RUNNING, DONE, CONVERGED, CANCELLED or FAILED.
+        error (BaseException): What made the run fail, if it did.
+        task (asyncio.Task): The task playing the run.
+    """
+
+    def __init__(self, id, request, seed):
+        self.id = id
+        self.request = request
+        self.seed = seed
+        self.stats = SimulationStats(request.config.player_count)
+        self.status = RUNNING
+        self.error = None
+        self.task = None
+        self.version = 0
+        self.changed = asyncio.Condition()
+
+    @property
+    def finished(self):
+        """bool: Whether the run has stopped, for whatever reason."""
+
+        return self.status != RUNNING
+
+    def snapshot(self):
+        """Summarises the run so far.
+
+        Returns:
+            dict: The run id, status and game count, the win counts and rates,
+                and the mean turns with the half-width of its interval.
+        """
+
+        return {
+            "run": self.id,
+            "status": self.status,
+            "games": self.stats.games,
+            "wins": self.stats.wins.tolist(),
+            "win_rates": self.stats.win_rates.tolist(),
+            "mean_turns": self.stats.turns.mean,
+            "turns_half_width": turns_half_width(self.stats) if self.stats.games > 1 else None,
+            "end_reasons": self.stats.end_reasons.tolist(),
+        }
+
+    async def notify(self):
+        """Wakes everyone streaming the run."""
+
+        async with self.changed:
+            self.version += 1
+            self.changed.notify_all()
+
+    async def updates(self):
+        """Streams the run's snapshot each time it changes, until it finishes.
+
+        Listeners that fall behind skip straight to the latest snapshot.
+
+        Yields:
+            dict: The snapshot of the run.
+        """
+
+        seen = -1
+        while True:
+            async with self.changed:
+                await self.changed.wait_for(lambda: self.version != seen)
+                seen = self.version
+                snapshot = self.snapshot()
+
+            yield snapshot
+            if snapshot["status"] != RUNNING:
+                return
+
+
+class SimulationService:
+    """Plays submitted runs on a shared process pool.
+
+    Each run is split into seeded blocks like runner.iter_simulations, so a
+    run gives the same results as iter_simulations with the same seed and
+    block size. Every run keeps at most two blocks per worker in flight, and
+    aggregates them in order as they complete.
+
+    Attributes:
+        workers (int): The number of worker processes.
+        engine (str): The engine the games are played with.
+        block_size (int): The number of games per block.
+        runs (dict): Every submitted Run, keyed by id.
+    """
+
+    def __init__(self, workers=None, engine="game", block_size=BLOCK_SIZE):
+        self.workers = workers or os.cpu_count() or 1
+        self.engine = engine
+        self.block_size = block_size
+        self.runs = {}
+        self.executor = None
+        self.ids = itertools.count(1)
+
+    async def __aenter__(self):
+        self.start()
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    def start(self):
+        """Starts the process pool."""
+
+        if self.executor is None:
+            self.executor = ProcessPoolExecutor(max_workers=self.workers)
+
+    async def close(self):
+        """Cancels every unfinished run and shuts the process pool down."""
+
+        for run in self.runs.values():
+            if run.task is not None and not run.task.done():
+                run.task.cancel()
+        await asyncio.gather(*(run.task for run in self.runs.values() if run.task is not None),
+                             return_exceptions=True)
+
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+            self.executor = None
+
+    def submit(self, request):
+        """Starts a run without waiting for it.
+
+        Args:
+            request (RunRequest): The settings of the run.
+
+        Returns:
+            Run: The run, which plays on in the background.
+        """
+
+        self.start()
+        seed = request.seed if request.seed is not None else np.random.SeedSequence().entropy
+        run = Run(next(self.ids), request, seed)
+        run.task = asyncio.get_running_loop().create_task(self.play(run))
+        self.runs[run.id] = run
+        return run
+
+    def cancel(self, run_id):
+        """Cancels a run, its blocks that haven't started are dropped.
+
+        Args:
+            run_id (int): The id of the run.
+
+        Returns:
+            bool: Whether the run was still going.
+        """
+
+        run = self.runs[run_id]
+        if run.finished:
+            return False
+        run.task.cancel()
+        return True
+
+    async def play(self, run):
+        """Plays a run's blocks on the pool, aggregating them in order.
+
+        Args:
+            run (Run): The run to play.
+        """
+
+        loop = asyncio.get_running_loop()
+        request = run.request
+        config = request.config
+        root = np.random.SeedSequence(run.seed)
+        simulate_block = ENGINES[self.engine]
+        block_count = -(-request.n_games // self.block_size)
+        next_block = 0
+        pending = []
+
+        try:
+            while next_block < block_count or pending:
+                # keep two blocks per worker in flight, aggregating the oldest first
+                while next_block < block_count and len(pending) < 2 * self.workers:
+                    size = min(self.block_size, request.n_games - next_block * self.block_size)
+                    pending.append(loop.run_in_executor(self.executor, simulate_block, size, config,
+                                                        block_seed(root, next_block)))
+                    next_block += 1
+
+                run.stats.add(block_results(await pending.pop(0)))
+                await run.notify()
+                if request.win_rate_precision is not None and run.stats.games >= request.min_games \
+                        and converged(run.stats, request.win_rate_precision):
+                    run.status = CONVERGED
+                    return
+
+            run.status = DONE
+
+        except asyncio.CancelledError:
+            run.status = CANCELLED
+            raise
+
+        except Exception as error:
+            run.status = FAILED
+            run.error = error
+
+        finally:
+            for future in pending:
+                future.cancel()
+            await run.notify()
+
+
+class LocalClient:
+    """An in-process client of a SimulationService, speaking plain dicts like a dashboard would.
+
+    Attributes:
+        service (SimulationService): The service the client talks to.
+    """
+
+    def __init__(self, service):
+        self.service = service
+
+    async def submit(self, request):
+        """Submits a run.
+
+        Args:
+            request (dict): The RunRequest and GameConfig fields of the run, see parse_request.
+
+        Returns:
+            int: The id of the run.
+        """
+
+        return self.service.submit(parse_request(request)).id
+
+    async def stream(self, run_id):
+        """Streams a run's partial aggregates until it finishes.
+
+        Args:
+            run_id (int): The id of the run.
+
+        Yields:
+            dict: The snapshot of the run after each block.
+        """
+
+        async for snapshot in self.service.runs[run_id].updates():
+            yield snapshot
+
+    async def status(self, run_id):
+        """Fetches the latest snapshot of a run.
+
+        Args:
+            run_id (int): The id of the run.
+
+        Returns:
+            dict: The snapshot of the run.
+        """
+
+        return self.service.runs[run_id].snapshot()
+
+    async def result(self, run_id):
+        """Waits for a run to finish.
+
+        Args:
+            run_id (int): The id of the run.
+
+        Returns:
+            dict: The final snapshot of the run.
+        """
+
+        run = self.service.runs[run_id]
+        await asyncio.gather(run.task, return_exceptions=True)
+        return run.snapshot()
+
+    async def cancel(self, run_id):
+        """Cancels a run.
+
+        Args:
+            run_id (int): The id of the run.
+
+        Returns:
+            bool: Whether the run was still going.
+        """
+
+        return self.service.cancel(run_id)
+
+
+async def demo():
+    """Submits two runs, streams one to completion and cancels the other."""
+
+    async with SimulationService() as service:
+        client = LocalClient(service)
+        run_id = await client.submit({"player_count": 3, "n_games": 5000, "seed": 1})
+        cancelled_id = await client.submit({"house_rules": True, "n_games": 100000, "seed": 2})
+
+        async for update in client.stream(run_id):
+            print("run", update["run"], update["status"], update["games"], "games, average turns",
+                  round(update["mean_turns"], 2), "wins", update["wins"])
+
+        await client.cancel(cancelled_id)
+        print(await client.result(cancelled_id))
+
+
+if __name__ == "__main__":
+    asyncio.run(demo())
@@ -0,0 +1,508 @@
+import math
+
+import numpy as np
+
+import Monopoly
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Streaming statistics for simulation results. Every accumulator updates from a
+chunk of games at a time and uses constant memory, however many games are run.
+"""
+
+# z-score of a 95% confidence interval
+Z_95 = 1.959963984540054
+
+
+class RunningStats:
+    """Holds the running count, mean and variance of a stream of values.
+
+    Uses Welford's method, with Chan's formula to merge a whole chunk of values
+    (or another RunningStats) at once.
+
+    Attributes:
+        count (int): The number of values seen.
+        mean (float): The mean of the values.
+        m2 (float): The sum of squared differences from the mean.
+        minimum (float): The smallest value seen.
+        maximum (float): The largest value seen.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = math.inf
+        self.maximum = -math.inf
+
+    def merge(self, count, mean, m2, minimum, maximum):
+        """Merges the summary of another set of values into this one.
+
+        Args:
+            count (int): The number of values.
+            mean (float): The mean of the values.
+            m2 (float): The sum of squared differences from their mean.
+            minimum (float): The smallest of the values.
+            maximum (float): The largest of the values.
+        """
+
+        if count == 0:
+            return
+
+        total = self.count + count
+        delta = mean - self.mean
+        self.mean += delta * count / total
+        self.m2 += m2 + delta * delta * self.count * count / total
+        self.count = total
+        self.minimum = min(self.minimum, minimum)
+        self.maximum = max(self.maximum, maximum)
+
+    def add(self, values):
+        """Adds a chunk of values.
+
+        Args:
+            values (np.ndarray): The values to add.
+        """
+
+        values = np.asarray(values, dtype=np.float64)
+        if len(values) == 0:
+            return
+
+        mean = values.mean()
+        self.merge(len(values), float(mean), float(((values - mean) ** 2).sum()), float(values.min()),
+                   float(values.max()))
+
+    def update(self, other):
+        """Merges another RunningStats into this one.
+
+        Args:
+            other (RunningStats): The stats to merge in.
+        """
+
+        self.merge(other.count, other.mean, other.m2, other.minimum, other.maximum)
+
+    def state(self):
+        """Writes the stats out as plain values, to be saved as JSON.
+
+        Returns:
+            dict: The count, mean, m2, minimum and maximum.
+        """
+
+        return {"count": self.count, "mean": self.mean, "m2": self.m2, "minimum": self.minimum,
+                "maximum": self.maximum}
+
+    def restore(self, state):
+        """Sets the stats back to a saved state.
+
+        Args:
+            state (dict): The state from state().
+        """
+
+        self.count = state["count"]
+        self.mean = state["mean"]
+        self.m2 = state["m2"]
+        self.minimum = state["minimum"]
+        self.maximum = state["maximum"]
+
+    @property
+    def variance(self):
+        """float: The sample variance of the values."""
+
+        return self.m2 / (self.count - 1) if self.count > 1 else 0.0
+
+    @property
+    def std(self):
+        """float: The sample standard deviation of the values."""
+
+        return math.sqrt(self.variance)
+
+    def confidence_interval(self, z=Z_95):
+        """Calculates a normal confidence interval for the mean.
+
+        Args:
+            z (float): The z-score of the interval, 95% by default.
+
+        Returns:
+            tuple: The lower and upper bounds of the interval.
+        """
+
+        half_width = z * self.std / math.sqrt(self.count) if self.count else math.inf
+        return self.mean - half_width, self.mean + half_width
+
+
+class Histogram:
+    """Holds the counts of a stream of values in fixed-width bins.
+
+    Values below the first bin or past the last one are counted in the
+    underflow and overflow counters.
+
+    Attributes:
+        low (float): The lower edge of the first bin.
+        bin_width (float): The width of each bin.
+        counts (np.ndarray): The number of values in each bin.
+        underflow (int): The number of values below the first bin.
+        overflow (int): The number of values past the last bin.
+    """
+
+    def __init__(self, low, high, bin_width=1):
+        self.low = low
+        self.bin_width = bin_width
+        self.counts = np.zeros(int(math.ceil((high - low) / bin_width)), dtype=np.int64)
+        self.underflow = 0
+        self.overflow = 0
+
+    @property
+    def edges(self):
+        """np.ndarray: The edges of the bins."""
+
+        return self.low + self.bin_width * np.arange(len(self.counts) + 1)
+
+    def add(self, values):
+        """Adds a chunk of values.
+
+        Args:
+            values (np.ndarray): The values to add.
+        """
+
+        bins = np.floor((np.asarray(values) - self.low) / self.bin_width).astype(np.int64)
+        inside = (bins >= 0) & (bins < len(self.counts))
+        self.underflow += int(np.count_nonzero(bins < 0))
+        self.overflow += int(np.count_nonzero(bins >= len(self.counts)))
+        self.counts += np.bincount(bins[inside], minlength=len(self.counts))
+
+    def update(self, other):
+        """Merges another Histogram with the same bins into this one.
+
+        Args:
+            other (Histogram): The histogram to merge in.
+        """
+
+        self.counts += other.counts
+        self.underflow += other.underflow
+        self.overflow += other.overflow
+
+    def state(self):
+        """Writes the histogram out as plain values, to be saved as JSON.
+
+        Returns:
+            dict: The bins, their counts, and the underflow and overflow.
+        """
+
+        return {"low": self.low, "bin_width": self.bin_width, "counts": self.counts.tolist(),
+                "underflow": self.underflow, "overflow": self.overflow}
+
+    def restore(self, state):
+        """Sets the histogram back to a saved state, bins included.
+
+        Args:
+            state (dict): The state from state().
+        """
+
+        self.low = state["low"]
+        self.bin_width = state["bin_width"]
+        self.counts = np.array(state["counts"], dtype=np.int64)
+        self.underflow = state["underflow"]
+        self.overflow = state["overflow"]
+
+
+class QuantileSketch:
+    """Holds a mergeable sketch of a stream of values for estimating quantiles.
+
+    Values are counted in logarithmically sized buckets, so every quantile is
+    estimated to within the relative accuracy whatever the range of the values
+    (the DDSketch scheme). Negative values are mirrored into a second set of
+    buckets and zeros are counted on their own.
+
+    Attributes:
+        relative_accuracy (float): The relative accuracy of the estimates.
+        gamma (float): The ratio between the upper and lower bounds of a bucket.
+        positive (dict): The count of each bucket of positive values.
+        negative (dict): The count of each bucket of negative values.
+        zero_count (int): The number of zeros seen.
+        count (int): The number of values seen.
+    """
+
+    def __init__(self, relative_accuracy=0.01):
+        self.relative_accuracy = relative_accuracy
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.positive = {}
+        self.negative = {}
+        self.zero_count = 0
+        self.count = 0
+
+    def bucket_counts(self, values, buckets):
+        """Counts values into a set of buckets.
+
+        Args:
+            values (np.ndarray): The positive values to count.
+            buckets (dict): The buckets to add the counts to.
+        """
+
+        keys, counts = np.unique(np.ceil(np.log(values) / math.log(self.gamma)).astype(np.int64), return_counts=True)
+        for key, count in zip(keys.tolist(), counts.tolist()):
+            buckets[key] = buckets.get(key, 0) + count
+
+    def add(self, values):
+        """Adds a chunk of values.
+
+        Args:
+            values (np.ndarray): The values to add.
+        """
+
+        values = np.asarray(values, dtype=np.float64)
+        self.bucket_counts(values[values > 0], self.positive)
+        self.bucket_counts(-values[values < 0], self.negative)
+        self.zero_count += int(np.count_nonzero(values == 0))
+        self.count += len(values)
+
+    def update(self, other):
+        """Merges another QuantileSketch with the same accuracy into this one.
+
+        Args:
+            other (QuantileSketch): The sketch to merge in.
+        """
+
+        for buckets, other_buckets in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, count in other_buckets.items():
+                buckets[key] = buckets.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+
+    def state(self):
+        """Writes the sketch out as plain values, to be saved as JSON.
+
+        Returns:
+            dict: The accuracy, the [key, count] pairs of each set of buckets, and the counts.
+        """
+
+        return {"relative_accuracy": self.relative_accuracy, "positive": sorted(self.positive.items()),
+                "negative": sorted(self.negative.items()), "zero_count": self.zero_count, "count": self.count}
+
+    def restore(self, state):
+        """Sets the sketch back to a saved state, accuracy included.
+
+        Args:
+            state (dict): The state from state().
+        """
+
+        self.relative_accuracy = state["relative_accuracy"]
+        self.gamma = (1 + self.relative_accuracy) / (1 - self.relative_accuracy)
+        self.positive = {key: count for key, count in state["positive"]}
+        self.negative = {key: count for key, count in state["negative"]}
+        self.zero_count = state["zero_count"]
+        self.count = state["count"]
+
+    def quantile(self, q):
+        """Estimates a quantile of the values.
+
+        Args:
+            q (float): The quantile to estimate, between 0 and 1.
+
+        Returns:
+            float: The estimated quantile, nan if no values have been seen.
+        """
+
+        if self.count == 0:
+            return math.nan
+
+        rank = q * (self.count - 1)
+        seen = 0
+
+        # walk the buckets from the most negative value to the most positive
+        for key in sorted(self.negative, reverse=True):
+            seen += self.negative[key]
+            if seen > rank:
+                return -2 * self.gamma ** key / (self.gamma + 1)
+
+        seen += self.zero_count
+        if seen > rank:
+            return 0.0
+
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank:
+                return 2 * self.gamma ** key / (self.gamma + 1)
+
+        return 2 * self.gamma ** max(self.positive) / (self.gamma + 1)
+
+
+def wilson_interval(successes, trials, z=Z_95):
+    """Calculates the Wilson score interval for a proportion.
+
+    Args:
+        successes (int): The number of successes.
+        trials (int): The number of trials.
+        z (float): The z-score of the interval, 95% by default.
+
+    Returns:
+        tuple: The lower and upper bounds of the interval.
+    """
+
+    if trials == 0:
+        return 0.0, 1.0
+
+    p = successes / trials
+    denominator = 1 + z * z / trials
+    centre = (p + z * z / (2 * trials)) / denominator
+    half_width = z * math.sqrt(p * (1 - p) / trials + z * z / (4 * trials * trials)) / denominator
+    return max(0.0, centre - half_width), min(1.0, centre + half_width)
+
+
+class SimulationStats:
+    """Holds the streaming summary of a simulation run.
+
+    Tracks the turns and loops (trips around the board before all properties
+    were bought) of every game, the number of games each player won, and how
+    many games each termination policy ended.
+
+    Attributes:
+        player_count (int): The number of players in each game.
+        games (int): The number of games added.
+        turns (RunningStats): The running mean and variance of the turns per game.
+        loops (RunningStats): The running mean and variance of the loops per game.
+        turn_histogram (Histogram): The histogram of the turns per game.
+        loop_histogram (Histogram): The histogram of the loops per game.
+        turn_quantiles (QuantileSketch): The quantile sketch of the turns per game.
+        loop_quantiles (QuantileSketch): The quantile sketch of the loops per game.
+        wins (np.ndarray): The number of games won by each player.
+        end_reasons (np.ndarray): The number of games ended by bankruptcy, the turn cap and stalemate.
+    """
+
+    def __init__(self, player_count, max_turns=10000, turn_bin_width=10, max_loops=200):
+        self.player_count = player_count
+        self.games = 0
+        self.turns = RunningStats()
+        self.loops = RunningStats()
+        self.turn_histogram = Histogram(0, max_turns, turn_bin_width)
+        self.loop_histogram = Histogram(-1, max_loops)
+        self.turn_quantiles = QuantileSketch()
+        self.loop_quantiles = QuantileSketch()
+        self.wins = np.zeros(player_count, dtype=np.int64)
+        self.end_reasons = np.zeros(len(Monopoly.END_REASONS), dtype=np.int64)
+
+    def add(self, results):
+        """Adds the results of a chunk of games.
+
+        Args:
+            results (dict): The "turns", "loops" and "winners" arrays of the games.
+        """
+
+        self.games += len(results["turns"])
+        self.turns.add(results["turns"])
+        self.loops.add(results["loops"])
+        self.turn_histogram.add(results["turns"])
+        self.loop_histogram.add(results["loops"])
+        self.turn_quantiles.add(results["turns"])
+        self.loop_quantiles.add(results["loops"])
+        self.wins += np.bincount(results["winners"], minlength=self.player_count)
+
+        # results stored before games could end early were all ended by bankruptcy
+        if "end_reason" in results:
+            self.end_reasons += np.bincount(results["end_reason"], minlength=len(self.end_reasons))
+        else:
+            self.end_reasons[Monopoly.END_BANKRUPTCY] += len(results["turns"])
+
+    def update(self, other):
+        """Merges the summary of another run with the same settings into this one.
+
+        Args:
+            other (SimulationStats): The summary to merge in.
+        """
+
+        self.games += other.games
+        self.turns.update(other.turns)
+        self.loops.update(other.loops)
+        self.turn_histogram.update(other.turn_histogram)
+        self.loop_histogram.update(other.loop_histogram)
+        self.turn_quantiles.update(other.turn_quantiles)
+        self.loop_quantiles.update(other.loop_quantiles)
+        self.wins += other.wins
+        self.end_reasons += other.end_reasons
+
+    # the accumulators saved by state, by attribute name
+    ACCUMULATORS = ("turns", "loops", "turn_histogram", "loop_histogram", "turn_quantiles", "loop_quantiles")
+
+    def state(self):
+        """Writes the summary out as plain values, to be saved as JSON.
+
+        The summary is a few kilobytes however many games it holds, so saved
+        runs can be reported on or merged without their per-game results.
+
+        Returns:
+            dict: The player and game counts, the state of every accumulator,
+                the wins and the end reasons.
+        """
+
+        state = {"player_count": self.player_count, "games": self.games, "wins": self.wins.tolist(),
+                 "end_reasons": self.end_reasons.tolist()}
+        for name in self.ACCUMULATORS:
+            state[name] = getattr(self, name).state()
+        return state
+
+    def restore(self, state):
+        """Sets the summary back to a saved state.
+
+        Args:
+            state (dict): The state from state(), of a run with the same player count.
+        """
+
+        if state["player_count"] != self.player_count:
+            raise ValueError("expected the state of a {} player run, got {} players".format(
+                self.player_count, state["player_count"]))
+
+        self.games = state["games"]
+        self.wins = np.array(state["wins"], dtype=np.int64)
+        self.end_reasons = np.array(state["end_reasons"], dtype=np.int64)
+        for name in self.ACCUMULATORS:
+            getattr(self, name).restore(state[name])
+
+    @property
+    def win_rates(self):
+        """np.ndarray: The fraction of games won by each player."""
+
+        return self.wins / self.games if self.games else np.zeros(self.player_count)
+
+    def win_rate_intervals(self, z=Z_95):
+        """Calculates confidence intervals for each player's win rate.
+
+        Args:
+            z (float): The z-score of the intervals, 95% by default.
+
+        Returns:
+            list: The lower and upper bounds of each player's interval.
+        """
+
+        return [wilson_interval(int(wins), self.games, z) for wins in self.wins]
+
+    def snapshot(self, z=Z_95):
+        """Summarises the games added so far.
+
+        Args:
+            z (float): The z-score of the confidence intervals, 95% by default.
+
+        Returns:
+            dict: The game count, means, standard deviations, confidence
+                intervals and quantiles of the turns and loops, the win
+                counts, rates and intervals of each player, and the games
+                ended by each termination policy.
+        """
+
+        summary = {"games": self.games}
+        for name, running, sketch in (("turns", self.turns, self.turn_quantiles),
+                                      ("loops", self.loops, self.loop_quantiles)):
+            summary[name] = {
+                "mean": running.mean,
+                "std": running.std,
+                "min": running.minimum,
+                "max": running.maximum,
+                "interval": running.confidence_interval(z),
+                "quantiles": {q: sketch.quantile(q) for q in (0.05, 0.25, 0.5, 0.75, 0.95, 0.99)},
+            }
+
+        summary["wins"] = self.wins.tolist()
+        summary["win_rates"] = self.win_rates.tolist()
+        summary["win_rate_intervals"] = self.win_rate_intervals(z)
+        summary["end_reasons"] = dict(zip(Monopoly.END_REASONS, self.end_reasons.tolist()))
+        return summary
@@ -0,0 +1,203 @@
+import numpy as np
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Player strategies. A strategy makes a player's decisions: whether to buy the
+property they landed on, how much to bid for a property at auction, and
+whether to pay their way out of jail instead of trying for doubles. Each Player
+of a Game carries its own strategy.
+
+A strategy that sets vectorized also makes the same decisions for many games
+at once from arrays, so the batch engine can play it without one Python call
+per decision.
+"""
+
+
+class Strategy:
+    """The decisions of a player.
+
+    The defaults bid a property's list price at auction, never pay to leave
+    jail, and keep $200 back when building under the full rules.
+
+    Attributes:
+        name (str): The name the strategy is reported under.
+        vectorized (bool): Whether the buy_many, bid_many and leave_jail_many methods are implemented.
+    """
+
+    name = "strategy"
+    vectorized = False
+
+    def wants_to_buy(self, game, player, tile):
+        """Decides whether the player buys the property they landed on, which they can afford.
+
+        Args:
+            game (Monopoly.Game): The game being played.
+            player (Monopoly.Player): The player deciding.
+            tile (board.Tile): The unowned property.
+
+        Returns:
+            bool: Whether the player buys the property.
+        """
+
+        raise NotImplementedError
+
+    def bid(self, game, player, tile):
+        """Decides the most the player would pay for a property at auction.
+
+        Args:
+            game (Monopoly.Game): The game being played.
+            player (Monopoly.Player): The player bidding.
+            tile (board.Tile): The property being auctioned.
+
+        Returns:
+            int: The player's highest bid, bids below the opening bid stay out of
+                the auction and bids above the player's money are cut down to it.
+        """
+
+        return tile.cost
+
+    def leave_jail(self, game, player):
+        """Decides whether a jailed player pays $50 to leave before rolling.
+
+        Args:
+            game (Monopoly.Game): The game being played.
+            player (Monopoly.Player): The jailed player.
+
+        Returns:
+            bool: Whether the player pays to leave.
+        """
+
+        return False
+
+    def build_reserve(self, game, player):
+        """Decides the money a player keeps back when building or lifting mortgages under the full rules.
+
+        Args:
+            game (Monopoly.Game): The game being played.
+            player (Monopoly.Player): The player building.
+
+        Returns:
+            int: The least money the player is left with.
+        """
+
+        return 200
+
+    def buy_many(self, money, cost, tile, uniforms):
+        """Decides wants_to_buy for many players at once.
+
+        Args:
+            money (np.ndarray): The money of each deciding player.
+            cost (np.ndarray): The cost of the property each landed on.
+            tile (np.ndarray): The index of the property each landed on.
+            uniforms (np.ndarray): A uniform draw for each decision.
+
+        Returns:
+            np.ndarray: Whether each player buys.
+        """
+
+        raise NotImplementedError
+
+    def bid_many(self, money, cost, tile, uniforms):
+        """Decides bid for many players at once.
+
+        Args:
+            money (np.ndarray): The money of each bidding player.
+            cost (np.ndarray): The cost of the property being auctioned to each.
+            tile (np.ndarray): The index of the property being auctioned to each.
+            uniforms (np.ndarray): A uniform draw for each bid.
+
+        Returns:
+            np.ndarray: The highest bid of each player.
+        """
+
+        return cost
+
+    def leave_jail_many(self, money, jail_time):
+        """Decides leave_jail for many jailed players at once.
+
+        Args:
+            money (np.ndarray): The money of each jailed player.
+            jail_time (np.ndarray): The turns each has served in jail.
+
+        Returns:
+            np.ndarray: Whether each player pays to leave.
+        """
+
+        return np.zeros(len(money), dtype=bool)
+
+    def __repr__(self):
+        return self.name
+
+
+class RandomStrategy(Strategy):
+    """Buys affordable properties at random, the original behaviour of the players.
+
+    At auction it bids a random amount between half and all of the list price.
+
+    Attributes:
+        buy_chance (float): The chance of buying an affordable property.
+    """
+
+    vectorized = True
+
+    def __init__(self, buy_chance=0.7):
+        self.buy_chance = buy_chance
+        self.name = "random" if buy_chance == 0.7 else "random({})".format(buy_chance)
+
+        # compared like the original 70% coin flip, so the default draws the same decisions
+        self.decline_chance = 0.30 if buy_chance == 0.7 else 1 - buy_chance
+
+    def wants_to_buy(self, game, player, tile):
+        return game.rng.random() > self.decline_chance
+
+    def bid(self, game, player, tile):
+        return int(tile.cost * (0.5 + 0.5 * game.rng.random()))
+
+    def buy_many(self, money, cost, tile, uniforms):
+        return uniforms > self.decline_chance
+
+    def bid_many(self, money, cost, tile, uniforms):
+        return (cost * (0.5 + 0.5 * uniforms)).astype(np.int64)
+
+
+class ReserveStrategy(Strategy):
+    """Buys, and bids up to the list price, while it keeps a cash reserve, and can pay its way out of jail.
+
+    Attributes:
+        reserve (int): The money the player keeps back after buying.
+        pay_jail (bool): Whether the player pays to leave jail whenever it can keep its reserve.
+    """
+
+    vectorized = True
+
+    def __init__(self, reserve=200, pay_jail=False):
+        self.reserve = reserve
+        self.pay_jail = pay_jail
+        self.name = "reserve({}{})".format(reserve, ", pay jail" if pay_jail else "")
+
+    def wants_to_buy(self, game, player, tile):
+        return player.money - tile.cost >= self.reserve
+
+    def bid(self, game, player, tile):
+        return min(tile.cost, player.money - self.reserve)
+
+    def leave_jail(self, game, player):
+        return self.pay_jail and player.money - 50 >= self.reserve
+
+    def build_reserve(self, game, player):
+        return self.reserve
+
+    def buy_many(self, money, cost, tile, uniforms):
+        return money - cost >= self.reserve
+
+    def bid_many(self, money, cost, tile, uniforms):
+        return np.minimum(cost, money - self.reserve)
+
+    def leave_jail_many(self, money, jail_time):
+        return self.pay_jail & (money - 50 >= self.reserve)
+
+
+# shared by every player that isn't given a strategy, it holds no state
+DEFAULT_STRATEGY = RandomStrategy()
@@ -0,0 +1,170 @@
+import hashlib
+import json
+import os
+from dataclasses import asdict, fields
+from itertools import product
+
+import numpy as np
+
+import Monopoly
+from board import load_board
+from runner import BLOCK_SIZE, RESULT_NAMES, block_seed, run_blocks
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Parameter sweeps. Runs a grid of game configs across a shared pool of worker
+processes and caches every cell on disk, so re-running a sweep only plays the
+cells that are missing.
+"""
+
+CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".sweep_cache")
+
+
+def config_grid(**axes):
+    """Builds every combination of the given settings.
+
+    Settings that aren't given keep their GameConfig defaults.
+
+    Args:
+        **axes: A list of values for each GameConfig field to sweep over,
+            e.g. house_rules=[False, True], player_count=[2, 4].
+
+    Returns:
+        list: A GameConfig for each combination of the values.
+    """
+
+    names = [field.name for field in fields(Monopoly.GameConfig)]
+    for name in axes:
+        if name not in names:
+            raise ValueError("GameConfig has no setting " + repr(name))
+
+    return [Monopoly.GameConfig(**dict(zip(axes, values))) for values in product(*axes.values())]
+
+
+def cell_key(config, n_games, seed, engine, block_size):
+    """Hashes everything that determines the results of a sweep cell.
+
+    Args:
+        config (Monopoly.GameConfig): The settings of the games.
+        n_games (int): The number of games in the cell.
+        seed (int): The seed of the cell.
+        engine (str): The engine the games are played with.
+        block_size (int): The number of games per block.
+
+    Returns:
+        str: The hex digest identifying the cell.
+    """
+
+    description = {
+        "config": asdict(config),
+        "n_games": n_games,
+        "seed": seed,
+        "engine": engine,
+        "block_size": block_size,
+        "engine_version": Monopoly.ENGINE_VERSION,
+        # the board file is keyed by its contents, so editing it invalidates its cells
+        "board": load_board(config.board).digest,
+        "results": RESULT_NAMES,
+    }
+    return hashlib.sha256(json.dumps(description, sort_keys=True).encode()).hexdigest()
+
+
+def cell_path(cache_dir, key):
+    """Finds the cache file of a sweep cell.
+
+    Args:
+        cache_dir (str): The directory of the cache.
+        key (str): The key of the cell.
+
+    Returns:
+        str: The path of the cell's file.
+    """
+
+    return os.path.join(cache_dir, key + ".npz")
+
+
+def save_cell(path, results, config):
+    """Writes the results of a sweep cell to the cache.
+
+    The file is written under a temporary name and then renamed, so an
+    interrupted sweep never leaves a partial cell behind.
+
+    Args:
+        path (str): The path of the cell's file.
+        results (dict): The RESULT_NAMES arrays of the cell.
+        config (Monopoly.GameConfig): The settings of the games.
+    """
+
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as file:
+        np.savez(file, config=np.array(json.dumps(asdict(config))), **results)
+    os.replace(temporary, path)
+
+
+def load_cell(path):
+    """Reads the results of a sweep cell from the cache.
+
+    Args:
+        path (str): The path of the cell's file.
+
+    Returns:
+        dict: The RESULT_NAMES arrays of the cell.
+    """
+
+    with np.load(path) as cell:
+        return {name: cell[name] for name in RESULT_NAMES}
+
+
+def run_sweep(configs, n_games, seed=0, workers=None, engine="game", block_size=BLOCK_SIZE, cache_dir=CACHE_DIR,
+              progress=None, usage=None):
+    """Plays n_games games for every config, reusing the cells already cached.
+
+    The blocks of every missing cell share one pool of worker processes, which
+    takes them in dynamically sized chunks, and each cell is written to the
+    cache as soon as its last block completes. A cell's results are identical
+    to iter_simulations with the same seed and block_size.
+
+    Args:
+        configs (list): The GameConfig of each cell.
+        n_games (int): The number of games per cell.
+        seed (int): The seed of every cell.
+        workers (int): The number of worker processes, defaults to the CPU count.
+        engine (str): "game" to play each Game in turn, or "batch" for the vectorized GameBatch engine.
+        block_size (int): The number of games per block.
+        cache_dir (str): The directory of the cache.
+        progress (function): Called with the config of each cell as it is completed.
+        usage (runner.WorkerUsage): Records how busy each worker was, if given.
+
+    Returns:
+        dict: The RESULT_NAMES arrays of each config.
+    """
+
+    if seed is None:
+        raise ValueError("a sweep needs a fixed seed to be cached")
+
+    paths = {config: cell_path(cache_dir, cell_key(config, n_games, seed, engine, block_size)) for config in configs}
+    missing = [config for config in dict.fromkeys(configs) if not os.path.exists(paths[config])]
+
+    root = np.random.SeedSequence(seed)
+    block_count = -(-n_games // block_size)
+    blocks = {config: [None] * block_count for config in missing}
+
+    def block(index):
+        config, i = missing[index // block_count], index % block_count
+        return min(block_size, n_games - i * block_size), config, block_seed(root, i)
+
+    for index, results in run_blocks(len(missing) * block_count, block, workers, engine, ordered=False,
+                                     usage=usage):
+        config, i = missing[index // block_count], index % block_count
+        blocks[config][i] = results
+        if all(done is not None for done in blocks[config]):
+            cell = {name: np.concatenate([done[name] for done in blocks[config]]) for name in RESULT_NAMES}
+            save_cell(paths[config], cell, config)
+            del blocks[config]
+            if progress is not None:
+                progress(config)
+
+    return {config: load_cell(paths[config]) for config in configs}
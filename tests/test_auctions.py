@@ -0,0 +1,36 @@
+import numpy as np
+import pytest
+
+from auctions import AUCTION_TYPES, ASCENDING, SEALED, clear_auction, clear_auctions
+
+
+@pytest.mark.parametrize("kind", AUCTION_TYPES)
+def test_bids_below_the_opening_bid_do_not_enter(kind):
+    assert clear_auction([0, 9, -5], 10, kind) == (-1, 0)
+
+
+def test_a_lone_bidder_pays_the_opening_bid():
+    assert clear_auction([0, 300, 5], 10, ASCENDING) == (1, 10)
+    assert clear_auction([0, 300, 5], 10, SEALED) == (1, 300)
+
+
+def test_ascending_price_is_one_increment_over_the_runner_up():
+    assert clear_auction([120, 300, 200], 10, ASCENDING) == (1, 210)
+    # never more than the winner's own bid
+    assert clear_auction([295, 300], 10, ASCENDING) == (1, 300)
+
+
+def test_ties_go_to_the_first_bidder():
+    assert clear_auction([50, 200, 200], 10, ASCENDING) == (1, 200)
+    assert clear_auction([50, 200, 200], 10, SEALED) == (1, 200)
+
+
+@pytest.mark.parametrize("kind", AUCTION_TYPES)
+@pytest.mark.parametrize("bidders", [1, 2, 5])
+def test_clearing_many_auctions_matches_one_at_a_time(kind, bidders):
+    bids = np.random.default_rng(bidders).integers(-20, 60, size=(2000, bidders))
+    winners, prices = clear_auctions(bids, 10, kind)
+
+    expected = [clear_auction(row.tolist(), 10, kind) for row in bids]
+    assert winners.tolist() == [winner for winner, _ in expected]
+    assert prices.tolist() == [price for _, price in expected]
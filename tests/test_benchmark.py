@@ -0,0 +1,38 @@
+import copy
+import json
+
+import numpy as np
+
+import Monopoly
+from benchmark import compare, run_benchmarks, time_games
+
+
+def test_time_games_counts_the_turns_it_played():
+    config = Monopoly.GameConfig(player_count=3)
+    timing = time_games(config, 20, seed=1, repeats=1)
+    seeds = np.random.SeedSequence(1).spawn(20)
+    turns = sum(Monopoly.Game(rng=Monopoly.RandomStream(seed), config=config).play()[0] for seed in seeds)
+
+    assert timing["games"] == 20 and timing["turns"] == turns
+    assert timing["games_per_second"] > 0
+
+
+def test_results_save_as_json_and_compare_against_themselves():
+    results = run_benchmarks(n_games=5, n_calls=200, repeats=1, player_counts=[2])
+    results = json.loads(json.dumps(results))
+
+    assert [(entry["player_count"], entry["house_rules"]) for entry in results["games"]] == [(2, False), (2, True)]
+    assert set(results["methods"]) >= {"roll_two_dice", "pay_rent", "set_owned", "auction_off"}
+    assert compare(results, results) == []
+
+
+def test_compare_flags_only_slowdowns_past_the_threshold():
+    baseline = {"games": [{"player_count": 2, "house_rules": False, "games_per_second": 100.0}],
+                "methods": {"pay_rent": 100.0, "set_owned": 100.0}}
+    current = copy.deepcopy(baseline)
+    current["games"][0]["games_per_second"] = 80.0
+    current["methods"]["pay_rent"] = 105.0
+    current["methods"]["set_owned"] = 150.0
+
+    flagged = {name: round(change, 2) for name, _, _, change in compare(baseline, current, threshold=0.1)}
+    assert flagged == {"games, 2 players, house rules False": 0.25, "set_owned": 0.5}
@@ -0,0 +1,83 @@
+import copy
+import json
+
+import numpy as np
+import pytest
+
+import Monopoly
+from board import CARD_UTILITY, STANDARD_BOARD, load_board, read_board, validate_board
+
+
+def standard_data():
+    with open(STANDARD_BOARD) as file:
+        return json.load(file)
+
+
+def problems(data):
+    with pytest.raises(ValueError) as error:
+        validate_board(data)
+    return str(error.value)
+
+
+def test_unwritable_cache_falls_back_to_the_compiled_board(tmp_path):
+    # a file where the cache directory should be, so creating it fails
+    blocked = tmp_path / "cache"
+    blocked.write_text("")
+
+    board = read_board(cache_dir=str(blocked))
+    standard = load_board()
+    assert board.digest == standard.digest
+    assert [tile.name for tile in board.tiles] == [tile.name for tile in standard.tiles]
+    assert np.array_equal(board.codes, standard.codes)
+
+
+def test_standard_board_is_valid():
+    validate_board(standard_data())
+
+
+def test_board_without_utilities_is_rejected():
+    data = standard_data()
+    for index in 12, 28:
+        data["tiles"][index] = {"name": "Chance", "type": "chance"}
+
+    assert "no utility" in problems(data)
+
+
+def test_card_targets_have_to_keep_their_type():
+    data = standard_data()
+    data["tiles"][5] = {"name": "Chance", "type": "chance"}
+    data["tiles"][39] = {"name": "Luxury Tax", "type": "tax", "cost": 100}
+
+    message = problems(data)
+    assert "tile 5 has to be a railroad" in message and "tile 39 has to be a property" in message
+
+
+def test_nearest_utility_card_without_utilities_stays_put():
+    game = Monopoly.Game(rng=Monopoly.RandomStream(0), config=Monopoly.GameConfig(full_rules=True))
+    game.layout = copy.copy(game.layout)
+    game.layout.utilities = ()
+    game.draw_card = lambda deck: (CARD_UTILITY, 0, 0)
+    game.current_player = game.players[0]
+    game.current_player.tile_index = 7
+
+    game.handle_card(game.board[7])
+    assert game.current_player.tile_index == 7
+
+
+def test_tiles_that_are_not_dicts_are_reported_with_the_rest():
+    data = standard_data()
+    data["tiles"][0] = "GO"
+    data["tiles"][10] = None
+    data["tiles"][1]["cost"] = -1
+
+    message = problems(data)
+    assert "tile 0 has to be GO" in message and "tile 10 has to be the jail" in message
+    assert "cost -1" in message
+
+
+@pytest.mark.parametrize("color", ["railroad", "utility"])
+def test_properties_cannot_take_a_reserved_color(color):
+    data = standard_data()
+    data["tiles"][1]["color"] = color
+
+    assert "reserved color" in problems(data)
@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+import Monopoly
+import runner
+from stats import SimulationStats
+from tracing import Tracer
+
+CONFIG = Monopoly.GameConfig(player_count=3)
+
+
+class Interrupted(Exception):
+    pass
+
+
+def interrupt_after(blocks):
+    calls = []
+
+    def progress(stats):
+        calls.append(stats.games)
+        if len(calls) == blocks:
+            raise Interrupted
+
+    return progress
+
+
+def plain_run(n_games, seed, block_size):
+    stats = SimulationStats(CONFIG.player_count)
+    for results in runner.iter_simulations(n_games, CONFIG, workers=1, seed=seed, block_size=block_size):
+        stats.add(results)
+    return stats
+
+
+def test_resumed_run_matches_an_uninterrupted_one(tmp_path):
+    path = str(tmp_path / "run.json")
+    with pytest.raises(Interrupted):
+        runner.run_checkpointed(2000, path, CONFIG, workers=2, seed=11, block_size=200, interval=0,
+                                progress=interrupt_after(4))
+
+    # the block that was interrupted before it was checkpointed is played again
+    with open(path) as file:
+        assert json.load(file)["blocks_done"] == 3
+
+    stats = runner.run_checkpointed(2000, path, CONFIG, workers=1, block_size=200, interval=0)
+    assert json.dumps(stats.state()) == json.dumps(plain_run(2000, 11, 200).state())
+
+    # a finished run is read straight back
+    again = runner.run_checkpointed(2000, path, CONFIG, block_size=200, progress=interrupt_after(1))
+    assert json.dumps(again.state()) == json.dumps(stats.state())
+
+
+def test_checkpoint_of_another_run_is_rejected(tmp_path):
+    path = str(tmp_path / "run.json")
+    runner.run_checkpointed(400, path, CONFIG, workers=1, seed=1, block_size=200)
+
+    with pytest.raises(ValueError, match="config"):
+        runner.run_checkpointed(400, path, Monopoly.GameConfig(), workers=1, block_size=200)
+    with pytest.raises(ValueError, match="seed"):
+        runner.run_checkpointed(400, path, CONFIG, workers=1, seed=2, block_size=200)
+
+
+def game_state(game):
+    return (game.turn_count, game.winner.id, [player.money for player in game.players],
+            [player.tile_index for player in game.players], [owner and owner.id for owner in game.owners],
+            game.houses, game.inflation, game.all_properties_bought_turn_count, game.decks, game.deck_positions)
+
+
+@pytest.mark.parametrize("config", [
+    Monopoly.GameConfig(),
+    Monopoly.GameConfig(player_count=3, house_rules=True, stalemate_window=100),
+    Monopoly.GameConfig(full_rules=True, max_turns=700),
+])
+def test_saved_game_resumes_identically(tmp_path, config):
+    path = str(tmp_path / "game.pkl")
+    for seed in range(8):
+        reference = Monopoly.Game(rng=Monopoly.RandomStream(seed), config=config)
+        reference.play()
+
+        game = Monopoly.Game(rng=Monopoly.RandomStream(seed), config=config, tracer=Tracer(64))
+        for stop in (seed + 1, 50, 200):
+            if game.play(stop_turn=stop) is not None:
+                break
+            Monopoly.save_game(game, path)
+            game = Monopoly.load_game(path)
+
+            # the loaded game plays on the shared board again
+            assert game.board is Monopoly.BOARD.tiles
+            assert all(tile is game.board[tile.tile_index] for player in game.players for tile in player.properties)
+
+        game.play()
+        assert game_state(game) == game_state(reference)
@@ -0,0 +1,45 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+import Monopoly
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_importing_runs_nothing_and_skips_plotting():
+    code = "import sys, Monopoly; print('matplotlib' in sys.modules)"
+    output = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, check=True).stdout
+
+    assert output.strip() == "False"
+
+
+def test_arguments_become_the_game_config():
+    args = Monopoly.parse_args(["-n", "10", "-p", "3", "--house-rules", "--max-turns", "200", "--auction", "sealed"])
+
+    assert (args.games, args.players, args.house_rules, args.max_turns, args.auction) == (10, 3, True, 200, "sealed")
+    with pytest.raises(SystemExit):
+        Monopoly.parse_args(["--checkpoint", "run.ckpt", "--output", "runs/base"])
+
+
+def test_stored_run_is_loaded_instead_of_played_again(tmp_path, capsys):
+    output = str(tmp_path / "run")
+    argv = ["-n", "120", "-p", "3", "-w", "1", "-s", "3", "--block-size", "50", "-q", "--output", output]
+
+    played = Monopoly.main(argv)
+    assert played.games == 120
+    assert "Loaded" not in capsys.readouterr().out
+
+    loaded = Monopoly.main(argv)
+    assert "Loaded 120 games" in capsys.readouterr().out
+    assert loaded.wins.tolist() == played.wins.tolist()
+
+
+def test_report_renders_headless(tmp_path):
+    pytest.importorskip("matplotlib")
+    report = tmp_path / "report"
+    Monopoly.main(["-n", "50", "-w", "1", "-s", "1", "-q", "--report", str(report)])
+
+    assert {"win_rates.png", "turns.png", "loops.png", "summary.md"} <= set(os.listdir(report))
@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+import Monopoly
+from runner import _simulate_block, _simulate_block_batch
+from strategies import RandomStrategy, ReserveStrategy
+
+GAMES = 2000
+
+# how many standard errors apart the two engines' estimates may be, loose enough for a fixed seed to pass
+# every time, tight enough that a rule played differently by one engine shows up
+TOLERANCE = 4.5
+
+
+def assert_means_agree(a, b, name):
+    standard_error = np.sqrt(a.var(ddof=1) / len(a) + b.var(ddof=1) / len(b))
+    assert abs(a.mean() - b.mean()) <= TOLERANCE * max(standard_error, 1e-9), name
+
+
+@pytest.mark.parametrize("config, strategies", [
+    (Monopoly.GameConfig(), None),
+    (Monopoly.GameConfig(player_count=3, house_rules=True), None),
+    (Monopoly.GameConfig(player_count=2, max_turns=300, stalemate_window=100), None),
+    (Monopoly.GameConfig(player_count=5, auction="sealed", inflation_turn=20), None),
+    (Monopoly.GameConfig(player_count=2), [ReserveStrategy(200, pay_jail=True), RandomStrategy(0.5)]),
+])
+def test_game_and_batch_engines_agree(config, strategies):
+    game = _simulate_block(GAMES, config, np.random.SeedSequence(2023), strategies)
+    batch = _simulate_block_batch(GAMES, config, np.random.SeedSequence(2023), strategies)
+    game_turns, _, game_winners, _, _, game_ends = game
+    batch_turns, _, batch_winners, _, _, batch_ends = batch
+
+    assert_means_agree(game_turns.astype(float), batch_turns.astype(float), "turns")
+    for player in range(config.player_count):
+        assert_means_agree(game_winners == player, batch_winners == player, "wins of player {}".format(player))
+    for reason, name in enumerate(Monopoly.END_REASONS):
+        assert_means_agree(game_ends == reason, batch_ends == reason, name)
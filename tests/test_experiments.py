@@ -0,0 +1,13 @@
+import Monopoly
+from experiments import paired_experiment
+
+
+def test_paired_experiment_does_not_depend_on_the_worker_count():
+    configs = [Monopoly.GameConfig(player_count=2), Monopoly.GameConfig(player_count=2, house_rules=True)]
+    single = paired_experiment(configs, 200, seed=6, workers=1, block_size=40)
+    pooled = paired_experiment(configs, 200, seed=6, workers=2, block_size=40)
+
+    assert single.games == pooled.games == 200
+    for config in range(len(configs)):
+        for one, other in zip(single.differences[config], pooled.differences[config]):
+            assert one.state() == other.state()
@@ -0,0 +1,41 @@
+import Monopoly
+
+
+def owned_count(game):
+    return sum(owner is not None for owner in game.owners)
+
+
+def test_bankruptcy_to_the_bank_returns_properties_to_the_count():
+    game = Monopoly.Game(rng=Monopoly.RandomStream(0), config=Monopoly.GameConfig(full_rules=True))
+    player = game.players[0]
+    for tile in game.board[1], game.board[3], game.board[5]:
+        game.buy_property(player, tile, 0)
+
+    game.go_bankrupt(player)
+
+    assert game.properties_bought_counter == owned_count(game) == 0
+
+
+def test_property_count_matches_owners_every_turn():
+    config = Monopoly.GameConfig(player_count=6, full_rules=True)
+    for seed in range(40):
+        game = Monopoly.Game(rng=Monopoly.RandomStream(seed), config=config)
+        turn = 0
+        while game.play(stop_turn=turn) is None:
+            assert game.properties_bought_counter == owned_count(game)
+            assert game.properties_bought_counter <= game.layout.property_count
+            if game.properties_bought_counter == game.layout.property_count:
+                assert game.all_properties_bought
+            turn += 5
+        assert game.properties_bought_counter == owned_count(game)
+
+
+def test_all_properties_bought_only_when_everything_is_owned():
+    config = Monopoly.GameConfig(player_count=6, full_rules=True)
+    for seed in range(300):
+        game = Monopoly.Game(rng=Monopoly.RandomStream(seed), config=config)
+        turn = 0
+        while game.play(stop_turn=turn) is None and not game.all_properties_bought:
+            turn += 1
+        if game.all_properties_bought and game.winner is None:
+            assert owned_count(game) == game.layout.property_count
@@ -0,0 +1,60 @@
+import Monopoly
+from instrument import Counters, InstrumentedGame, collect_counters
+from tracing import Tracer
+from strategies import ReserveStrategy
+
+
+def play_counted(seed, config, stops=()):
+    counters = Counters()
+    game = InstrumentedGame(rng=Monopoly.RandomStream(seed), config=config, counters=counters)
+    for stop in stops:
+        assert game.play(stop_turn=stop) is None
+    return game.play(), counters.counts
+
+
+def test_paused_game_counts_like_an_uninterrupted_one():
+    config = Monopoly.GameConfig(player_count=3)
+    for seed in range(10):
+        assert play_counted(seed, config, (5, 20, 40)) == play_counted(seed, config)
+
+
+def test_counts_games_only_once_they_finish():
+    counters = Counters()
+    game = InstrumentedGame(rng=Monopoly.RandomStream(0), counters=counters)
+    game.play(stop_turn=10)
+    assert counters.counts["games"] == 0 and counters.counts["turns"] == 0
+    game.play()
+    assert counters.counts["games"] == 1 and counters.counts["turns"] == game.turn_count
+
+
+def test_forwards_strategies_and_tracer():
+    strategies = [ReserveStrategy(300)] * 4
+    tracer = Tracer(16)
+    game = InstrumentedGame(rng=Monopoly.RandomStream(0), strategies=strategies, tracer=tracer)
+    assert [player.strategy for player in game.players] == strategies
+    assert game.tracer is tracer
+
+
+def test_counters_do_not_depend_on_the_worker_count():
+    config = Monopoly.GameConfig(player_count=3)
+    single = collect_counters(300, config, workers=1, seed=5, block_size=50)
+    pooled = collect_counters(300, config, workers=2, seed=5, block_size=50)
+
+    assert single.as_dict() == pooled.as_dict()
+    assert single.counts["games"] == 300
+
+
+def test_landing_on_your_own_property_is_not_a_rent_payment():
+    counters = Counters()
+    game = InstrumentedGame(rng=Monopoly.RandomStream(0), config=Monopoly.GameConfig(player_count=2),
+                            counters=counters)
+    owner, tenant = game.players
+    game.buy_property(owner, game.board[1], 0)
+
+    game.current_player = owner
+    game.pay_rent(game.board[1])
+    assert counters.counts["rent_payments"] == 0 and counters.counts["rent_paid"] == 0
+
+    game.current_player = tenant
+    game.pay_rent(game.board[1])
+    assert counters.counts["rent_payments"] == 1 and counters.counts["rent_paid"] == game.board[1].rent
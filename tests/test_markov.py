@@ -0,0 +1,37 @@
+import numpy as np
+import pytest
+
+from board import GO_TO_JAIL
+from markov import MarkovChain, cross_check, stationary_distribution
+
+
+@pytest.fixture(scope="module")
+def chain():
+    return MarkovChain()
+
+
+def test_stationary_distribution_of_a_two_state_chain():
+    transition = np.array([[0.9, 0.1], [0.5, 0.5]])
+    assert np.allclose(stationary_distribution(transition), [5 / 6, 1 / 6])
+
+
+def test_chain_is_a_proper_markov_chain(chain):
+    assert np.allclose(chain.transition.sum(axis=1), 1)
+    assert np.isclose(chain.stationary.sum(), 1)
+    assert np.allclose(chain.stationary @ chain.transition, chain.stationary)
+
+
+def test_nobody_stays_on_go_to_jail(chain):
+    tile = int(np.flatnonzero(chain.board.codes == GO_TO_JAIL)[0])
+    states = [chain.state_index(tile, jailed, counter) for jailed in (False, True) for counter in range(3)]
+
+    assert chain.landing_probabilities[tile] > 0
+    assert np.allclose(chain.stationary[states], 0)
+
+
+def test_chain_matches_simulated_landings(chain):
+    check = cross_check(300, seed=1, chain=chain)
+
+    assert check["total_variation"] < 0.02
+    assert check["max_difference"] < 0.004
+    assert abs(check["empirical_go_rate"] - check["analytic_go_rate"]) < 0.01
@@ -0,0 +1,41 @@
+import numpy as np
+
+import Monopoly
+
+
+def rolls(stream, count, decisions_between=0):
+    result = []
+    for _ in range(count):
+        result.append(stream.roll_two_dice())
+        for _ in range(decisions_between):
+            stream.random()
+    return result
+
+
+def test_dice_do_not_depend_on_the_decisions_drawn():
+    assert rolls(Monopoly.RandomStream(3), 3000) == rolls(Monopoly.RandomStream(3), 3000, decisions_between=2)
+
+
+def test_antithetic_stream_mirrors_the_dice():
+    plain = rolls(Monopoly.RandomStream(3), 3000)
+    mirrored = rolls(Monopoly.RandomStream(3, antithetic=True), 3000)
+
+    assert [doubles for doubles, _ in plain] == [doubles for doubles, _ in mirrored]
+    assert all(total + other == 14 for (_, total), (_, other) in zip(plain, mirrored))
+
+
+def test_dice_totals_follow_two_fair_dice():
+    totals = np.array([total for _, total in rolls(Monopoly.RandomStream(5), 72000)])
+    counts = np.bincount(totals, minlength=13)[2:]
+    expected = 72000 * np.array([1, 2, 3, 4, 5, 6, 5, 4, 3, 2, 1]) / 36
+
+    # chi-squared with 10 degrees of freedom, 29.6 is its 99.9th percentile
+    assert ((counts - expected) ** 2 / expected).sum() < 29.6
+
+
+def test_same_seed_plays_the_same_game():
+    config = Monopoly.GameConfig(player_count=3)
+    first = Monopoly.Game(rng=Monopoly.RandomStream(8), config=config).play()
+    second = Monopoly.Game(rng=Monopoly.RandomStream(8), config=config).play()
+
+    assert first == second
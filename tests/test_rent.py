@@ -0,0 +1,59 @@
+import json
+
+import numpy as np
+
+import Monopoly
+from batch import GameBatch
+from board import STANDARD_BOARD, load_board
+from markov import MarkovChain
+
+
+def test_rent_doubles_only_on_a_complete_set():
+    game = Monopoly.Game(rng=Monopoly.RandomStream(0), config=Monopoly.GameConfig(player_count=2))
+    owner, tenant = game.players
+    for group in game.layout.color_groups:
+        tiles = [game.board[index] for index in game.layout.group_tiles[group]]
+        for count, tile in enumerate(tiles, 1):
+            game.buy_property(owner, tile, 0)
+            assert game.set_owned(tile) == (count == len(tiles))
+            assert owner.sets == sum(game.set_owned(game.board[game.layout.group_tiles[owned][0]])
+                                     for owned in game.layout.color_groups
+                                     if owner.group_counts[owned])
+
+    tile = game.board[game.layout.group_tiles[game.layout.color_groups[0]][0]]
+    game.current_player = tenant
+    tenant.money = owner.money = 10000
+    game.pay_rent(tile)
+    assert tenant.money == 10000 - 2 * tile.rent
+
+
+def test_railroad_rent_follows_the_board(tmp_path):
+    with open(STANDARD_BOARD) as file:
+        data = json.load(file)
+    for tile in data["tiles"]:
+        if tile["type"] == "railroad":
+            tile["rent"] = 1000
+    path = tmp_path / "expensive.json"
+    path.write_text(json.dumps(data))
+
+    for full_rules in False, True:
+        config = Monopoly.GameConfig(player_count=2, board=str(path), full_rules=full_rules)
+        game = Monopoly.Game(rng=Monopoly.RandomStream(0), config=config)
+        owner, tenant = game.players
+        game.buy_property(owner, game.board[5], 0)
+        game.buy_property(owner, game.board[15], 0)
+        game.current_player = tenant
+        tenant.money = 10000
+        game.pay_rent(game.board[5])
+        assert tenant.money == 10000 - 2000
+
+    batch = GameBatch(1, Monopoly.GameConfig(player_count=2, board=str(path)))
+    for tile in 5, 15:
+        batch.buy_property(np.array([0]), np.array([0]), np.array([tile]))
+    assert batch.rent_due(np.array([0]), np.array([0]), np.array([5]), np.array([7]))[0] == 2000
+
+    owners = [None] * len(game.board)
+    owners[5] = owners[15] = 0
+    expensive = MarkovChain(load_board(str(path))).expected_rent(owners)
+    standard = MarkovChain().expected_rent(owners)
+    assert np.isclose(expensive[5], standard[5] * 40)
@@ -0,0 +1,58 @@
+import json
+import os
+
+import pytest
+
+import Monopoly
+from report import MANIFEST_FILE, load_summary, render_report
+from results import ResultWriter, run_metadata, save_stats
+from runner import iter_simulations
+from stats import SimulationStats
+
+pytest.importorskip("matplotlib")
+
+FILES = {"win_rates.png", "turns.png", "loops.png", "summary.md"}
+
+
+def summarise(n_games, seed=3):
+    stats = SimulationStats(3)
+    for block in iter_simulations(n_games, Monopoly.GameConfig(player_count=3), workers=1, seed=seed,
+                                  block_size=50):
+        stats.add(block)
+    return stats
+
+
+def test_unchanged_report_is_not_rendered_again(tmp_path):
+    stats = summarise(100)
+    assert set(render_report(stats, str(tmp_path))) == FILES
+    modified = {name: os.path.getmtime(tmp_path / name) for name in FILES}
+
+    assert render_report(stats, str(tmp_path)) == []
+    assert {name: os.path.getmtime(tmp_path / name) for name in FILES} == modified
+    assert set(render_report(stats, str(tmp_path), force=True)) == FILES
+
+
+def test_only_changed_files_are_rendered(tmp_path):
+    render_report(summarise(100), str(tmp_path))
+    os.remove(tmp_path / "loops.png")
+
+    assert render_report(summarise(100), str(tmp_path)) == ["loops.png"]
+    assert set(render_report(summarise(150), str(tmp_path))) == FILES
+    with open(tmp_path / MANIFEST_FILE) as file:
+        assert set(json.load(file)) == FILES
+
+
+def test_summary_is_loaded_from_a_store_or_a_saved_state(tmp_path):
+    config = Monopoly.GameConfig(player_count=3)
+    stats = summarise(100)
+    with ResultWriter(str(tmp_path / "run"), run_metadata(config, 3)) as writer:
+        for block in iter_simulations(100, config, workers=1, seed=3, block_size=50):
+            writer.add(block)
+    save_stats(str(tmp_path / "run"), stats)
+    with open(tmp_path / "state.json", "w") as file:
+        json.dump(stats.state(), file)
+
+    from_store, stored_config = load_summary(str(tmp_path / "run"))
+    from_state, no_config = load_summary(str(tmp_path / "state.json"))
+    assert stored_config == config and no_config is None
+    assert from_store.state() == from_state.state() == stats.state()
@@ -0,0 +1,66 @@
+import os
+
+import numpy as np
+import pytest
+
+import Monopoly
+from results import STATS_FILE, ResultWriter, compact_dtype, load_results, load_stats, run_metadata
+from runner import RESULT_NAMES, iter_simulations
+from stats import SimulationStats
+
+
+def test_compact_dtype_picks_the_smallest_fit():
+    assert compact_dtype(0, 255) == np.uint8
+    assert compact_dtype(-1, 100) == np.int8
+    assert compact_dtype(0, 70000) == np.uint32
+    assert compact_dtype(-1, 2 ** 40) == np.int64
+
+
+def test_store_round_trips_every_column(tmp_path):
+    config = Monopoly.GameConfig(player_count=3)
+    blocks = list(iter_simulations(250, config, workers=1, seed=4, block_size=100))
+    with ResultWriter(str(tmp_path), run_metadata(config, 4, block_size=100)) as writer:
+        for block in blocks:
+            writer.add(block)
+
+    arrays, metadata = load_results(str(tmp_path))
+    assert metadata["games"] == 250 and metadata["seed"] == 4
+    assert metadata["engine_version"] == Monopoly.ENGINE_VERSION
+    for name in RESULT_NAMES:
+        expected = np.concatenate([block[name] for block in blocks])
+        assert isinstance(arrays[name], np.memmap) and not arrays[name].flags.writeable
+        assert arrays[name].dtype == compact_dtype(expected.min(), expected.max())
+        assert arrays[name].dtype.name == metadata["columns"][name]["dtype"]
+        assert np.array_equal(arrays[name], expected), name
+    assert not [file for file in os.listdir(tmp_path) if file.endswith(".tmp")]
+
+
+def test_failed_run_leaves_no_store(tmp_path):
+    config = Monopoly.GameConfig()
+    with pytest.raises(RuntimeError):
+        with ResultWriter(str(tmp_path)) as writer:
+            writer.add(next(iter_simulations(10, config, workers=1, seed=1)))
+            raise RuntimeError("interrupted")
+
+    assert os.listdir(tmp_path) == []
+
+
+def test_stats_are_read_from_the_columns_then_from_the_saved_summary(tmp_path):
+    config = Monopoly.GameConfig(player_count=2)
+    blocks = list(iter_simulations(300, config, workers=1, seed=9, block_size=100))
+    with ResultWriter(str(tmp_path), run_metadata(config, 9)) as writer:
+        for block in blocks:
+            writer.add(block)
+
+    expected = SimulationStats(2)
+    for block in blocks:
+        expected.add(block)
+
+    summarised = load_stats(str(tmp_path), block_size=64)
+    assert os.path.exists(tmp_path / STATS_FILE)
+    assert summarised.games == 300 and summarised.wins.tolist() == expected.wins.tolist()
+    assert summarised.turns.mean == pytest.approx(expected.turns.mean)
+    assert summarised.loops.variance == pytest.approx(expected.loops.variance)
+
+    # the second read takes the saved summary instead of the columns
+    assert load_stats(str(tmp_path)).state() == summarised.state()
@@ -0,0 +1,37 @@
+import time
+
+import numpy as np
+import pytest
+
+import Monopoly
+from runner import RESULT_NAMES, run_simulations, run_until_converged
+
+
+@pytest.mark.parametrize("engine", ["game", "batch"])
+def test_results_do_not_depend_on_the_worker_count(engine):
+    config = Monopoly.GameConfig(player_count=3)
+    single = run_simulations(230, config, workers=1, seed=11, engine=engine, block_size=50)
+    pooled = run_simulations(230, config, workers=3, seed=11, engine=engine, block_size=50)
+
+    for name in RESULT_NAMES:
+        assert len(single[name]) == 230
+        assert np.array_equal(single[name], pooled[name]), name
+
+
+def test_different_seeds_play_different_games():
+    config = Monopoly.GameConfig(player_count=3)
+    games = run_simulations(200, config, workers=1, seed=11, block_size=50)
+
+    assert not np.array_equal(games["turns"], run_simulations(200, config, workers=1, seed=12, block_size=50)["turns"])
+    assert np.all(games["winners"] < config.player_count)
+
+
+def test_time_budget_stops_the_run_on_time():
+    start = time.perf_counter()
+    stats, report = run_until_converged(Monopoly.GameConfig(), win_rate_precision=1e-6, max_time=1.0,
+                                        workers=2, seed=1, block_size=50)
+    elapsed = time.perf_counter() - start
+
+    assert report["stopped"] == "max_time"
+    assert 0 < stats.games < 10 ** 9
+    assert elapsed < 1.5
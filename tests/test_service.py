@@ -0,0 +1,66 @@
+import asyncio
+
+import numpy as np
+
+from runner import iter_simulations
+from service import CANCELLED, CONVERGED, DONE, FAILED, LocalClient, SimulationService, parse_request
+
+
+def run_service(scenario, engine="game"):
+    async def main():
+        async with SimulationService(workers=2, engine=engine, block_size=250) as service:
+            return await scenario(LocalClient(service), service)
+
+    return asyncio.run(main())
+
+
+def test_stream_matches_a_plain_run():
+    async def scenario(client, service):
+        run_id = await client.submit({"player_count": 3, "n_games": 1500, "seed": 7})
+        return [update async for update in client.stream(run_id)]
+
+    updates = run_service(scenario)
+    games = [update["games"] for update in updates]
+    assert games == sorted(games)
+    assert updates[-1]["status"] == DONE
+    assert updates[-1]["games"] == 1500
+
+    winners = np.concatenate([results["winners"] for results in iter_simulations(
+        1500, parse_request({"player_count": 3}).config, workers=1, seed=7, block_size=250)])
+    assert updates[-1]["wins"] == np.bincount(winners, minlength=3).tolist()
+
+
+def test_cancel_stops_the_run():
+    async def scenario(client, service):
+        run_id = await client.submit({"n_games": 10 ** 6, "seed": 1})
+        async for update in client.stream(run_id):
+            if update["games"]:
+                break
+        assert await client.cancel(run_id)
+        return await client.result(run_id)
+
+    result = run_service(scenario)
+    assert result["status"] == CANCELLED
+    assert 0 < result["games"] < 10 ** 6
+
+
+def test_stops_on_convergence_after_the_minimum_games():
+    async def scenario(client, service):
+        run_id = await client.submit({"n_games": 10 ** 6, "seed": 2, "win_rate_precision": 0.2,
+                                      "min_games": 1000})
+        return await client.result(run_id)
+
+    result = run_service(scenario)
+    assert result["status"] == CONVERGED
+    assert result["games"] == 1000
+
+
+def test_worker_failure_fails_the_run():
+    async def scenario(client, service):
+        # the batch engine only plays the simplified rules, so every block raises in its worker
+        run_id = await client.submit({"n_games": 1000, "full_rules": True})
+        return await client.result(run_id), service.runs[run_id].error
+
+    result, error = run_service(scenario, engine="batch")
+    assert result["status"] == FAILED
+    assert isinstance(error, ValueError)
@@ -0,0 +1,72 @@
+import json
+import math
+
+import numpy as np
+
+import Monopoly
+from runner import run_simulations
+from stats import Histogram, QuantileSketch, RunningStats, SimulationStats, wilson_interval
+
+
+def test_chan_merge_equals_a_single_pass():
+    values = np.random.default_rng(0).exponential(200, 10000)
+    single = RunningStats()
+    single.add(values)
+    merged = RunningStats()
+    for chunk in np.array_split(values, 7):
+        part = RunningStats()
+        part.add(chunk)
+        merged.update(part)
+
+    assert merged.count == single.count == len(values)
+    assert math.isclose(merged.mean, values.mean(), rel_tol=1e-12)
+    assert math.isclose(merged.variance, values.var(ddof=1), rel_tol=1e-10)
+    assert (merged.minimum, merged.maximum) == (values.min(), values.max())
+
+
+def test_histogram_counts_past_its_last_bin_as_overflow():
+    histogram = Histogram(0, 10, bin_width=5)
+    histogram.add(np.array([0, 4, 5, 9, 10, 50]))
+
+    assert histogram.counts.tolist() == [2, 2]
+    assert histogram.overflow == 2
+
+
+def test_quantiles_are_within_the_relative_accuracy():
+    values = np.random.default_rng(1).lognormal(5, 1, 20000)
+    sketch = QuantileSketch(0.01)
+    for chunk in np.array_split(values, 5):
+        sketch.add(chunk)
+
+    for q in 0.05, 0.5, 0.95:
+        exact = np.quantile(values, q, method="lower")
+        assert abs(sketch.quantile(q) - exact) <= 0.011 * exact
+
+
+def test_wilson_interval_stays_inside_zero_and_one():
+    assert wilson_interval(0, 0) == (0.0, 1.0)
+    low, high = wilson_interval(0, 20)
+    assert low == 0.0 and 0 < high < 0.2
+    low, high = wilson_interval(50, 100)
+    assert math.isclose(0.5 - low, high - 0.5)
+
+
+def test_stats_merge_and_state_round_trip():
+    config = Monopoly.GameConfig(player_count=3)
+    games = run_simulations(400, config, workers=1, seed=2, block_size=100)
+    whole = SimulationStats(3)
+    whole.add(games)
+    merged = SimulationStats(3)
+    for start in range(0, 400, 100):
+        part = SimulationStats(3)
+        part.add({name: values[start:start + 100] for name, values in games.items()})
+        merged.update(part)
+
+    assert merged.games == whole.games == 400
+    assert merged.wins.tolist() == np.bincount(games["winners"], minlength=3).tolist()
+    assert math.isclose(merged.turns.mean, games["turns"].mean())
+    assert merged.snapshot()["end_reasons"] == whole.snapshot()["end_reasons"]
+
+    restored = SimulationStats(3)
+    restored.restore(json.loads(json.dumps(merged.state())))
+    assert json.dumps(restored.snapshot()) == json.dumps(merged.snapshot())
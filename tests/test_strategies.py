@@ -0,0 +1,12 @@
+import Monopoly
+from strategies import ReserveStrategy
+
+
+def test_choose_to_buy_still_works_without_a_tile():
+    strategies = [ReserveStrategy(1400), ReserveStrategy(0)]
+    game = Monopoly.Game(rng=Monopoly.RandomStream(0), config=Monopoly.GameConfig(player_count=2),
+                         strategies=strategies)
+    for player, wants in zip(game.players, (False, True)):
+        game.current_player = player
+        player.tile_index = 39
+        assert game.choose_to_buy() == game.choose_to_buy(game.board[39]) == wants
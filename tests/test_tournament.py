@@ -0,0 +1,21 @@
+import Monopoly
+from strategies import RandomStrategy, ReserveStrategy
+from tournament import run_tournament
+
+
+def test_full_rules_tournament_of_vectorized_strategies():
+    config = Monopoly.GameConfig(player_count=2, full_rules=True, max_turns=300)
+    results = run_tournament([RandomStrategy(), ReserveStrategy(200)], 20, config, seed=3, workers=1)
+
+    assert results.games[0, 1] == results.games[1, 0] == 40
+    assert results.wins[0, 1] + results.wins[1, 0] == 40
+
+
+def test_tournament_does_not_depend_on_the_worker_count():
+    strategies = [RandomStrategy(), RandomStrategy(1.0), ReserveStrategy(200)]
+    config = Monopoly.GameConfig(player_count=2)
+    single = run_tournament(strategies, 60, config, seed=4, workers=1, engine="game", block_size=25)
+    pooled = run_tournament(strategies, 60, config, seed=4, workers=2, engine="game", block_size=25)
+
+    assert (single.wins == pooled.wins).all()
+    assert (single.games == pooled.games).all()
@@ -0,0 +1,58 @@
+import numpy as np
+import pytest
+
+import Monopoly
+from tracing import Tracer, describe, replay, trace_game
+
+
+def state(game):
+    return {
+        "money": [player.money for player in game.players],
+        "tiles": [player.tile_index for player in game.players],
+        "jailed": [player.jailed for player in game.players],
+        "lost": [player.lost for player in game.players],
+        "owners": [None if owner is None else owner.id for owner in game.owners],
+        "sets": [player.sets for player in game.players],
+        "turn_count": game.turn_count,
+        "trips": game.trip_around_board,
+        "bought": game.properties_bought_counter,
+        "winner": None if game.winner is None else game.winner.id,
+    }
+
+
+@pytest.mark.parametrize("config", [Monopoly.GameConfig(player_count=3),
+                                    Monopoly.GameConfig(player_count=4, house_rules=True, auction="sealed")])
+def test_replay_reaches_the_final_state(config):
+    for seed in range(5):
+        game, tracer = trace_game(seed, config, capacity=16)
+        assert tracer.count == len(tracer.records) > 16
+        assert state(replay(tracer, config)) == state(game)
+
+
+def test_replay_stops_at_a_turn():
+    config = Monopoly.GameConfig(player_count=3)
+    tracer = Tracer(64)
+    game = Monopoly.Game(rng=Monopoly.RandomStream(2), config=config, tracer=tracer)
+    assert game.play(stop_turn=40) is None
+    paused = state(game)
+    game.play()
+
+    assert state(replay(tracer, config, turn=40)) == paused
+
+
+def test_ring_buffer_keeps_the_latest_turns():
+    config = Monopoly.GameConfig(player_count=3)
+    _, full = trace_game(4, config)
+    _, ring = trace_game(4, config, capacity=32, ring=True)
+
+    assert ring.dropped == full.count - 32
+    assert np.array_equal(ring.records, full.records[-32:])
+    with pytest.raises(ValueError):
+        replay(ring, config)
+
+
+def test_records_describe_their_turn():
+    _, tracer = trace_game(1, Monopoly.GameConfig(player_count=2))
+    line = describe(tracer.records[0])
+
+    assert line.startswith("turn 0 player 0 rolled")
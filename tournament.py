@@ -0,0 +1,192 @@
+import argparse
+import itertools
+
+import numpy as np
+
+import Monopoly
+from runner import BLOCK_SIZE, ENGINES, block_seed, run_blocks
+from strategies import RandomStrategy, ReserveStrategy
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Strategy tournaments. Every pair of strategies plays a set of games against
+each other, the seats alternating between the two, and once more with the
+seats swapped so neither gets the first move every game. The pairings are
+played in blocks across a pool of worker processes, and pairs of vectorized
+strategies are played by the batch engine.
+
+    python tournament.py --games 2000 --players 2
+"""
+
+# the strategies played by the command line tournament
+STRATEGIES = (
+    RandomStrategy(),
+    RandomStrategy(0.5),
+    RandomStrategy(1.0),
+    ReserveStrategy(0),
+    ReserveStrategy(200),
+    ReserveStrategy(200, pay_jail=True),
+    ReserveStrategy(500),
+)
+
+
+def seat_strategies(first, second, player_count):
+    """Seats two strategies alternately around the table.
+
+    Args:
+        first (strategies.Strategy): The strategy of the even seats, including the first player.
+        second (strategies.Strategy): The strategy of the odd seats.
+        player_count (int): The number of seats.
+
+    Returns:
+        list: The strategy of each seat.
+    """
+
+    return [first if seat % 2 == 0 else second for seat in range(player_count)]
+
+
+def play_pairing(n_games, config, seats, seed_seq, engine):
+    """Plays a block of games of a pairing inside a worker process.
+
+    Args:
+        n_games (int): The number of games to play.
+        config (Monopoly.GameConfig): The settings of the games.
+        seats (list): The strategy of each seat.
+        seed_seq (np.random.SeedSequence): The seed sequence for this block.
+        engine (str): The engine the games are played with.
+
+    Returns:
+        np.ndarray: The number of games won from each seat.
+    """
+
+    winners = ENGINES[engine](n_games, config, seed_seq, seats)[2]
+    return np.bincount(winners, minlength=config.player_count)
+
+
+class TournamentResults:
+    """Holds the outcome of a tournament.
+
+    Attributes:
+        strategies (list): The strategies that played.
+        wins (np.ndarray): wins[i, j] is the games strategy i won against strategy j.
+        games (np.ndarray): games[i, j] is the games played between strategies i and j.
+    """
+
+    def __init__(self, strategies):
+        self.strategies = list(strategies)
+        self.wins = np.zeros((len(strategies), len(strategies)), dtype=np.int64)
+        self.games = np.zeros((len(strategies), len(strategies)), dtype=np.int64)
+
+    @property
+    def win_rates(self):
+        """np.ndarray: The rate strategy i won at against strategy j, NaN on the diagonal."""
+
+        with np.errstate(invalid="ignore", divide="ignore"):
+            return np.where(self.games > 0, self.wins / self.games, np.nan)
+
+    @property
+    def scores(self):
+        """np.ndarray: The mean win rate of each strategy against all the others."""
+
+        return np.nanmean(self.win_rates, axis=1)
+
+    def table(self):
+        """Writes the win-rate matrix out as text, the strategies ranked by score.
+
+        Returns:
+            str: The matrix, with each row's strategy and score.
+        """
+
+        order = np.argsort(-self.scores, kind="stable")
+        width = max(len(str(strategy)) for strategy in self.strategies)
+
+        # columns are headed by the rank of the opponent
+        lines = [" " * (width + 4) + "".join("{:>7}".format(rank + 1) for rank in range(len(order))) + "    score"]
+        for rank, i in enumerate(order):
+            rates = "".join("{:>7}".format("-" if i == j else "{:.3f}".format(self.win_rates[i, j])) for j in order)
+            lines.append("{:>2}. {:<{}}{}    {:.3f}".format(rank + 1, str(self.strategies[i]), width, rates,
+                                                          self.scores[i]))
+        return "\n".join(lines)
+
+
+def run_tournament(strategies, n_games, config=None, seed=None, workers=None, engine=None, block_size=BLOCK_SIZE):
+    """Plays every pair of strategies against each other across a pool of worker processes.
+
+    Each pair plays n_games with the first strategy in the first seat and
+    n_games with the seats swapped, both from the same game seeds.
+
+    Args:
+        strategies (list): The strategies to play.
+        n_games (int): The number of games per pair and seating.
+        config (Monopoly.GameConfig): The settings of the games, the defaults if None.
+        seed (int): The seed for the tournament, a fresh one is drawn if None.
+        workers (int): The number of worker processes, defaults to the CPU count.
+        engine (str): The engine to play every pairing with, if None the batch
+            engine plays pairs of vectorized strategies under the simplified
+            rules and Game the rest.
+        block_size (int): The number of games per block.
+
+    Returns:
+        TournamentResults: The wins and games of every pair.
+    """
+
+    config = config if config is not None else Monopoly.GameConfig()
+    root = np.random.SeedSequence(seed)
+    results = TournamentResults(strategies)
+
+    tasks = []
+    owners = []
+    for pair, (i, j) in enumerate(itertools.combinations(range(len(strategies)), 2)):
+        pair_engine = engine
+        if pair_engine is None:
+            # the batch engine only plays the simplified rules
+            batchable = strategies[i].vectorized and strategies[j].vectorized and not config.full_rules
+            pair_engine = "batch" if batchable else "game"
+
+        pair_root = block_seed(root, pair)
+        for first, second in ((i, j), (j, i)):
+            seats = seat_strategies(strategies[first], strategies[second], config.player_count)
+            for block, start in enumerate(range(0, n_games, block_size)):
+                size = min(block_size, n_games - start)
+                tasks.append((size, config, seats, block_seed(pair_root, block), pair_engine))
+                owners.append((first, second, size))
+
+    def add(owner, seat_wins):
+        first, second, size = owner
+        results.wins[first, second] += seat_wins[0::2].sum()
+        results.wins[second, first] += seat_wins[1::2].sum()
+        results.games[first, second] += size
+        results.games[second, first] += size
+
+    for index, seat_wins in run_blocks(len(tasks), tasks.__getitem__, workers, play_pairing, ordered=False):
+        add(owners[index], seat_wins)
+
+    return results
+
+
+def main(argv=None):
+    """Plays a tournament of the built-in strategies from the command line.
+
+    Args:
+        argv (list): The arguments, sys.argv[1:] if None.
+    """
+
+    parser = argparse.ArgumentParser(description="Plays a tournament of Monopoly strategies.")
+    parser.add_argument("-n", "--games", type=int, default=2000, help="the number of games per pair and seating")
+    parser.add_argument("-p", "--players", type=int, default=2, help="the number of players in each game")
+    parser.add_argument("--house-rules", action="store_true", help="play with house rules")
+    parser.add_argument("-w", "--workers", type=int, default=None, help="the number of worker processes")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="the seed of the tournament")
+    parser.add_argument("--engine", choices=sorted(ENGINES), default=None,
+                        help="play every pairing with this engine, by default batch for vectorized strategies")
+    args = parser.parse_args(argv)
+
+    config = Monopoly.GameConfig(player_count=args.players, house_rules=args.house_rules)
+    results = run_tournament(STRATEGIES, args.games, config, args.seed, args.workers, args.engine)
+    print(results.table())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import numpy as np
+
+import Monopoly
+from board import CODE_COUNT, GO_TO_JAIL, TAX
+
+"""
+COMP3531 - Simulation & Modelling
+Final Project - Monopoly
+
+Per-turn event tracing. A Tracer attached to a Game records every turn as a
+fixed-size record in a preallocated structured array, either keeping the whole
+game or only the latest turns in a ring buffer, and replay rebuilds the state
+of the game at any turn from a full trace. Games without a tracer only pay for
+a None check per turn.
+"""
+
+# the action of a turn where the player rolled a third double and went to jail without moving,
+# every other turn's action is the type code of the tile landed on
+TRIPLE_DOUBLES = CODE_COUNT
+
+# outcomes of a turn
+NONE = 0
+BOUGHT = 1
+AUCTIONED = 2
+UNSOLD = 3
+RENT = 4
+TAXED = 5
+BANKRUPT = 6
+JAILED = 7
+
+OUTCOME_NAMES = ("none", "bought", "auctioned", "unsold", "rent", "taxed", "bankrupt", "jailed")
+
+TRACE_DTYPE = np.dtype([
+    ("turn", np.int32),             # the game's turn count when the turn was played
+    ("player", np.uint8),           # the id of the player whose turn it was
+    ("roll", np.uint8),             # the sum of the dice
+    ("doubles", np.bool_),          # whether the dice were doubles
+    ("from_tile", np.uint8),        # the tile the player started on
+    ("to_tile", np.uint8),          # the tile the player landed on
+    ("tile", np.uint8),             # the tile the player ended on, the jail if they were sent there
+    ("action", np.uint8),           # the type code of the tile landed on, or TRIPLE_DOUBLES
+    ("outcome", np.uint8),          # what happened on the tile
+    ("passed_go", np.bool_),        # whether the player passed GO
+    ("rent", np.int32),             # the rent paid to another player, or the tax paid
+    ("money", np.int32),            # the player's money after the turn
+    ("other", np.int8),             # the owner paid rent or the winner of the auction, -1 if none
+    ("other_money", np.int32),      # that player's money after the turn
+    ("jailed", np.bool_),           # whether the player is jailed after the turn
+    ("jail_time", np.uint8),        # the turns the player has served in jail
+    ("doubles_count", np.uint8),    # the doubles the player has rolled in a row
+    ("inflation", np.int32),        # the game's inflation rate during the turn
+])
+
+
+class Tracer:
+    """Records the turns of a Game.
+
+    In full-capture mode the buffer doubles whenever it fills up, so every turn
+    is kept. In ring-buffer mode it never grows, and once full each new turn
+    overwrites the oldest.
+
+    The tracer keeps its own copy of every player's money and of the owners,
+    and works out the rent paid and who bought the tile by comparing them with
+    the game after each turn, so the game itself does no extra work.
+
+    Attributes:
+        buffer (np.ndarray): The preallocated TRACE_DTYPE records.
+        ring (bool): Whether only the latest turns are kept.
+        count (int): The number of turns recorded, including overwritten ones.
+        money (list): Every player's money after the last recorded turn.
+        owners (list): The owner id of each tile after the last recorded turn, -1 if unowned.
+    """
+
+    def __init__(self, capacity=4096, ring=False):
+        self.buffer = np.zeros(capacity, dtype=TRACE_DTYPE)
+        self.ring = ring
+        self.count = 0
+        self.money = []
+        self.owners = []
+
+    def start(self, game):
+        """Takes the starting state of a game, called when the tracer is attached.
+
+        Args:
+            game (Monopoly.Game): The game being traced.
+        """
+
+        self.count = 0
+        self.money = [player.money for player in game.players]
+        self.owners = [-1 if owner is None else owner.id for owner in game.owners]
+
+    @property
+    def dropped(self):
+        """int: The number of turns overwritten in ring-buffer mode."""
+
+        return max(0, self.count - len(self.buffer))
+
+    @property
+    def records(self):
+        """np.ndarray: The recorded turns, oldest first."""
+
+        if self.count <= len(self.buffer):
+            return self.buffer[:self.count].copy()
+
+        split = self.count % len(self.buffer)
+        return np.concatenate([self.buffer[split:], self.buffer[:split]])
+
+    def record(self, game, doubles, previous_place, new_tile):
+        """Records the turn that was just played.
+
+        Args:
+            game (Monopoly.Game): The game being traced.
+            doubles (bool): Whether the dice were doubles.
+            previous_place (int): The tile the player started on.
+            new_tile (board.Tile): The tile the player landed on, None if they rolled a third double.
+        """
+
+        if self.count == len(self.buffer) and not self.ring:
+            self.buffer = np.concatenate([self.buffer, np.zeros(len(self.buffer), dtype=TRACE_DTYPE)])
+
+        player = game.current_player
+        entry = self.buffer[self.count % len(self.buffer)]
+        self.count += 1
+
+        outcome = NONE
+        rent = 0
+        other = -1
+
+        if new_tile is None:
+            action = TRIPLE_DOUBLES
+            to_tile = previous_place
+            outcome = JAILED
+        else:
+            action = new_tile.code
+            to_tile = new_tile.tile_index
+
+            if new_tile.group >= 0:
+                owner = game.owners[to_tile]
+                if self.owners[to_tile] >= 0:
+                    outcome = BANKRUPT if player.lost else RENT
+                elif owner is None:
+                    outcome = UNSOLD
+                else:
+                    outcome = BOUGHT if owner is player else AUCTIONED
+                    self.owners[to_tile] = owner.id
+
+                # the rent paid to, or the auction won by, another player
+                if owner is not None and owner is not player:
+                    other = owner.id
+                    if outcome == RENT:
+                        rent = owner.money - self.money[other]
+
+            elif action == TAX:
+                outcome = BANKRUPT if player.lost else TAXED
+                rent = 0 if player.lost else new_tile.cost
+
+            elif action == GO_TO_JAIL:
+                outcome = JAILED
+
+        entry["turn"] = game.turn_count
+        entry["player"] = player.id
+        entry["roll"] = game.current_roll
+        entry["doubles"] = doubles
+        entry["from_tile"] = previous_place
+        entry["to_tile"] = to_tile
+        entry["tile"] = player.tile_index
+        entry["action"] = action
+        entry["outcome"] = outcome
+        entry["passed_go"] = new_tile is not None and to_tile < previous_place
+        entry["rent"] = rent
+        entry["money"] = player.money
+        entry["other"] = other
+        entry["other_money"] = game.players[other].money if other >= 0 else 0
+        entry["jailed"] = player.jailed
+        entry["jail_time"] = player.jail_time
+        entry["doubles_count"] = player.doubles_count
+        entry["inflation"] = game.inflation
+
+        self.money[player.id] = player.money
+        if other >= 0:
+            self.money[other] = game.players[other].money
+
+
+def trace_game(seed=None, config=None, capacity=4096, ring=False):
+    """Plays a game with a tracer attached.
+
+    Args:
+        seed (int | np.random.SeedSequence): The seed of the game.
+        config (Monopoly.GameConfig): The settings of the game.
+        capacity (int): The number of records preallocated.
+        ring (bool): Whether to keep only the latest capacity turns.
+
+    Returns:
+        tuple: The finished Game and its Tracer.
+    """
+
+    tracer = Tracer(capacity, ring)
+    game = Monopoly.Game(rng=Monopoly.RandomStream(seed), config=config, tracer=tracer)
+    game.play()
+    return game, tracer
+
+
+def replay(records, config=None, turn=None):
+    """Rebuilds the state of a game from its trace.
+
+    The returned Game has the money, positions, jail status, owners and
+    counters the traced game had when it reached turn, before that turn was
+    played. Its dice are fresh, so it can't be played on from there. The
+    trace doesn't hold the buildings, mortgages or cards of the full rules, so
+    only games played with the simplified rules can be replayed.
+
+    Args:
+        records (np.ndarray | Tracer): The full trace of the game, from its first turn.
+        config (Monopoly.GameConfig): The settings of the traced game.
+        turn (int): The turn to rebuild the state at, the end of the game if None.
+
+    Returns:
+        Monopoly.Game: The game as it was at turn.
+    """
+
+    if isinstance(records, Tracer):
+        if records.dropped:
+            raise ValueError("the ring buffer has overwritten the start of the game, it can't be replayed")
+        records = records.records
+
+    game = Monopoly.Game(config=config)
+    for entry in records:
+        if turn is not None and entry["turn"] >= turn:
+            break
+
+        player = game.players[entry["player"]]
+        game.current_player = player
+        game.current_roll = int(entry["roll"])
+        game.inflation = int(entry["inflation"])
+
+        player.tile_index = int(entry["tile"])
+        player.money = int(entry["money"])
+        player.jailed = bool(entry["jailed"])
+        player.jail_time = int(entry["jail_time"])
+        player.doubles_count = int(entry["doubles_count"])
+        if entry["other"] >= 0:
+            game.players[entry["other"]].money = int(entry["other_money"])
+
+        if entry["passed_go"]:
+            game.trip_around_board += 1
+
+        outcome = entry["outcome"]
+        if outcome == BOUGHT or outcome == AUCTIONED:
+            # the money was already paid, it is in the record
+            buyer = player if outcome == BOUGHT else game.players[entry["other"]]
+            game.buy_property(buyer, game.board[entry["to_tile"]], 0)
+
+        elif outcome == BANKRUPT:
+            player.lost = True
+            player.bankrupt_turn = int(entry["turn"])
+            game.remaining_players -= 1
+
+        # a third double goes to jail without finishing the turn
+        game.turn_count = int(entry["turn"]) + (entry["action"] != TRIPLE_DOUBLES)
+
+    if game.remaining_players == 1:
+        game.winner = next(player for player in game.players if not player.lost)
+
+    return game
+
+
+def describe(entry, board=None):
+    """Writes a trace record out as a line of text.
+
+    Args:
+        entry (np.void): A TRACE_DTYPE record.
+        board (board.Board): The board the game was played on, the standard board if None.
+
+    Returns:
+        str: The description of the turn.
+    """
+
+    if entry["action"] == TRIPLE_DOUBLES:
+        landed = "rolled a third double"
+    else:
+        landed = "{} -> {} ({})".format(entry["from_tile"], entry["to_tile"],
+                                         (board or Monopoly.BOARD).tiles[entry["to_tile"]].name)
+
+    text = "turn {} player {} rolled {}{}: {}, {}".format(
+        entry["turn"], entry["player"], entry["roll"], " (doubles)" if entry["doubles"] else "", landed,
+        OUTCOME_NAMES[entry["outcome"]])
+    if entry["rent"]:
+        text += " {}".format(entry["rent"])
+    if entry["other"] >= 0:
+        text += " with player {}".format(entry["other"])
+    return text + ", ${}".format(entry["money"])